@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Admission control for agent runs.
+
+A report run holds the model, the tools and an SMTP connection for tens of
+seconds. Without a limit, one user starting ten runs at once slows every
+other user on the instance, and a burst of traffic makes every run slow
+instead of queueing the excess. ``AdmissionControlMiddleware`` sits in
+front of the ADK run endpoints (``/run``, ``/run_sse``, ``/run_live``) and
+applies three rules:
+
+- At most ``max_in_flight`` runs execute at once.
+- A user may have at most ``max_per_user`` runs running or waiting. One
+  more is refused at once, so a single user can neither take over the
+  slots nor fill the queue.
+- Runs over the global limit wait in a FIFO queue of at most ``max_queue``
+  entries for at most ``queue_timeout`` seconds.
+
+Refused runs get ``429 Too Many Requests`` with a ``Retry-After`` estimated
+from recent run times (websockets are closed with code 1013, "try again
+later"). A slot is held until the response has been sent, which includes
+the whole event stream of ``/run_sse``.
+
+The limits apply per server process; with ``--workers`` each worker has its
+own. Counters and timings are served as JSON at ``/admission/status``.
+
+Configuration (environment variables):
+    ADMISSION_MAX_IN_FLIGHT   Concurrent runs; 0 disables (default 16)
+    ADMISSION_MAX_PER_USER    Runs per user, running or queued (default 2)
+    ADMISSION_MAX_QUEUE       Runs waiting for a slot (default 64)
+    ADMISSION_QUEUE_TIMEOUT   Seconds a run may wait (default 30)
+    ADMISSION_PATHS           Comma-separated paths to limit
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Iterable, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+RUN_PATHS = ("/run", "/run_sse", "/run_live")
+
+# Weight of the newest run in the moving average of run times.
+_RUN_TIME_WEIGHT = 0.2
+
+
+class AdmissionRejected(Exception):
+    """A run was refused; ``reason`` is user_limit, queue_full or timeout."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Run refused ({reason}); retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Global and per-user limits on concurrent runs, with a bounded queue.
+
+    Not thread-safe: use it from a single event loop.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        max_per_user: int = 2,
+        max_queue: int = 64,
+        queue_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._clock = clock
+        self.in_flight = 0
+        # Runs per user, running or queued
+        self._per_user: Dict[str, int] = {}
+        self._queue: Deque[Tuple[str, "asyncio.Future[None]"]] = deque()
+        self.admitted = 0
+        self.rejected = {"user_limit": 0, "queue_full": 0, "timeout": 0}
+        self.queued_total = 0
+        self._waited_runs = 0
+        self._wait_total = 0.0
+        self.max_wait = 0.0
+        self._run_time: Optional[float] = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from recent run times."""
+        run_time = self._run_time or 1.0
+        waves = (self.queued + 1) / max(1, self.max_in_flight)
+        return max(1, math.ceil(run_time * max(1.0, waves)))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        return AdmissionRejected(reason, self.retry_after())
+
+    def _leave(self, user: str) -> None:
+        remaining = self._per_user[user] - 1
+        if remaining:
+            self._per_user[user] = remaining
+        else:
+            del self._per_user[user]
+
+    async def acquire(self, user: str) -> float:
+        """
+        Wait for a run slot.
+
+        Returns:
+            Seconds spent queued.
+
+        Raises:
+            AdmissionRejected: If the user is at their limit, the queue is
+                full, or no slot freed up within ``queue_timeout``.
+        """
+        if self._per_user.get(user, 0) >= self.max_per_user:
+            raise self._reject("user_limit")
+        if self.in_flight < self.max_in_flight and not self._queue:
+            self.in_flight += 1
+            self._per_user[user] = self._per_user.get(user, 0) + 1
+            self.admitted += 1
+            return 0.0
+        if self.queued >= self.max_queue:
+            raise self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (user, waiter)
+        self._queue.append(entry)
+        self._per_user[user] = self._per_user.get(user, 0) + 1
+        self.queued_total += 1
+        started = self._clock()
+        try:
+            # release() hands its slot over by resolving the future
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the caller was cancelled: pass it on
+                self.release(user)
+            else:
+                self._leave(user)
+                try:
+                    self._queue.remove(entry)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject("timeout") from None
+            raise
+        waited = self._clock() - started
+        self._waited_runs += 1
+        self._wait_total += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.admitted += 1
+        return waited
+
+    def release(self, user: str, run_time: Optional[float] = None) -> None:
+        """Free a slot, handing it to the oldest waiting run if any."""
+        self._leave(user)
+        if run_time is not None:
+            self._run_time = (
+                run_time
+                if self._run_time is None
+                else self._run_time + _RUN_TIME_WEIGHT * (run_time - self._run_time)
+            )
+        while self._queue:
+            _, waiter = self._queue.popleft()
+            if not waiter.done():  # skip waiters that already gave up
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, user: str) -> AsyncIterator[float]:
+        """Hold a run slot for the duration of the block."""
+        waited = await self.acquire(user)
+        started = self._clock()
+        try:
+            yield waited
+        finally:
+            self.release(user, self._clock() - started)
+
+    def stats(self) -> dict:
+        """Current load, limits and counters."""
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "users": len(self._per_user),
+            "limits": {
+                "max_in_flight": self.max_in_flight,
+                "max_per_user": self.max_per_user,
+                "max_queue": self.max_queue,
+                "queue_timeout_s": self.queue_timeout,
+            },
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "rejected": dict(self.rejected),
+            "queue_wait_avg_s": (
+                self._wait_total / self._waited_runs if self._waited_runs else 0.0
+            ),
+            "queue_wait_max_s": self.max_wait,
+            "run_time_avg_s": self._run_time,
+            "retry_after_s": self.retry_after(),
+        }
+
+
+def _user_key(scope) -> str:
+    user = scope.get("state", {}).get("user")
+    if user and user.get("email"):
+        return user["email"]
+    client = scope.get("client")
+    return f"client:{client[0]}" if client else "anonymous"
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying an ``AdmissionController`` to the run paths.
+
+    Add it inside the authentication middleware, so runs are counted per
+    signed-in user; without authentication they are counted per client IP.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        paths: Iterable[str] = RUN_PATHS,
+    ):
+        self.app = app
+        self.controller = controller
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or (
+            scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            async with self.controller.admit(_user_key(scope)):
+                await self.app(scope, receive, send)
+        except AdmissionRejected as e:
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1013})
+                return
+            response = JSONResponse(
+                {
+                    "detail": "Too many concurrent runs, please retry later",
+                    "reason": e.reason,
+                },
+                status_code=429,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """The process-wide controller, or None if ``ADMISSION_MAX_IN_FLIGHT=0``."""
+    global _controller
+    max_in_flight = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "16"))
+    if max_in_flight <= 0:
+        return None
+    if _controller is None:
+        _controller = AdmissionController(
+            max_in_flight=max_in_flight,
+            max_per_user=int(os.getenv("ADMISSION_MAX_PER_USER", "2")),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "64")),
+            queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30")),
+        )
+    return _controller
+
+
+def add_admission_control(app) -> Optional[AdmissionController]:
+    """
+    Limit the app's run endpoints and serve ``/admission/status``.
+
+    Call it before adding the authentication middleware.
+
+    Returns:
+        The controller, or None if admission control is disabled.
+    """
+    controller = get_admission_controller()
+    if controller is None:
+        print("⚠️  Admission control disabled (ADMISSION_MAX_IN_FLIGHT=0)")
+        return None
+    paths = [
+        path.strip()
+        for path in os.getenv("ADMISSION_PATHS", ",".join(RUN_PATHS)).split(",")
+        if path.strip()
+    ]
+    app.add_middleware(AdmissionControlMiddleware, controller=controller, paths=paths)
+
+    @app.get("/admission/status")
+    async def admission_status():
+        """Run admission counters and queue metrics."""
+        return controller.stats()
+
+    print(
+        f"🚦 Admission control: {controller.max_in_flight} runs, "
+        f"{controller.max_per_user} per user, queue {controller.max_queue}"
+    )
+    return controller
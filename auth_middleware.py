@@ -4,21 +4,82 @@ Google OAuth2 Authentication Middleware for ADK FastAPI Application
 
 This middleware provides Google Sign-In authentication for the ADK web interface.
 Users who are not authenticated will be redirected to Google Sign-In.
+
+It is a pure ASGI middleware: authenticated requests are handed to the app
+with the original ``receive`` and ``send`` callables, so responses
+(including streamed and SSE responses from ``/run_sse``) pass through
+without buffering, copying or an extra task per request.
 """
 
-import json
+import asyncio
 import os
-from typing import Optional
+import re
+from typing import Iterable, Optional
+from urllib.parse import quote
 
 from authlib.integrations.starlette_client import OAuth
 from fastapi import HTTPException, Request
-from fastapi.responses import RedirectResponse
-from google.auth.transport import requests
-from google.oauth2 import id_token
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import JSONResponse, RedirectResponse
+from starlette.requests import cookie_parser
+
+from google_token_verifier import get_discovery, get_verifier
+from http_pool import get_http_client
+from session_store import get_session_store
+from session_tokens import get_signer
+from trend_spotter.request_context import request_scope
+
+SESSION_COOKIE_NAME = "auth_session"
 
 
-class GoogleOAuth2Middleware(BaseHTTPMiddleware):
+def get_session_backend():
+    """
+    The server-side session store if ``SESSION_STORE`` is set, otherwise the
+    signer for self-contained session tokens. Both expose ``issue``,
+    ``verify`` and ``revoke``.
+    """
+    return get_session_store() or get_signer()
+
+
+async def call_session_backend(method: str, *args):
+    """
+    Call ``method`` on the session backend without blocking the event loop.
+
+    A ``blocking`` backend (the SQLite store, which can wait on another
+    worker's write lock) is called on a worker thread; the signer and the
+    in-memory store answer from memory and are called directly.
+    """
+    backend = get_session_backend()
+    func = getattr(backend, method)
+    if backend.blocking:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+
+def encode_session_cookie(user_info: dict) -> str:
+    """
+    Issue the session cookie value: an opaque session ID (``session_store.py``)
+    or a signed token (``session_tokens.py``).
+
+    Only the user's ``sub`` and ``email`` are kept.
+    """
+    return get_session_backend().issue(user_info)
+
+
+def compile_path_prefixes(prefixes: Iterable[str]) -> "re.Pattern[str]":
+    """One regex matching any path that starts with one of ``prefixes``."""
+    # Longest first, so the alternation never stops at a shorter prefix.
+    ordered = sorted(prefixes, key=len, reverse=True)
+    return re.compile("|".join(re.escape(prefix) for prefix in ordered))
+
+
+def _session_cookie(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            return cookie_parser(value.decode("latin-1")).get(SESSION_COOKIE_NAME)
+    return None
+
+
+class GoogleOAuth2Middleware:
     """
     Middleware to handle Google OAuth2 authentication for ADK web interface.
 
@@ -27,10 +88,12 @@ class GoogleOAuth2Middleware(BaseHTTPMiddleware):
     2. Redirects unauthenticated users to Google Sign-In
     3. Handles OAuth2 callback and validates tokens
     4. Sets session cookies for authenticated users
+    5. Runs each authenticated request in a request context carrying the
+       user's email (see ``trend_spotter/request_context.py``)
     """
 
     def __init__(self, app, client_id: str, client_secret: str, redirect_uri: str):
-        super().__init__(app)
+        self.app = app
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
@@ -47,48 +110,74 @@ class GoogleOAuth2Middleware(BaseHTTPMiddleware):
             client_kwargs={"scope": "openid email profile"},
         )
 
+        # ID tokens are verified off the event loop against cached certs;
+        # the discovery document is also cached on disk across restarts.
+        # Both are shared with the startup warmup (see warmup.py).
+        self.verifier = get_verifier(client_id)
+        self.discovery = get_discovery()
+
         # Paths that don't require authentication
         self.public_paths = {
             "/auth/login",
             "/auth/callback",
             "/auth/logout",
             "/health",
+            "/ready",
             "/docs",
             "/redoc",
             "/openapi.json",
         }
+        # Matched once per request instead of testing each prefix in turn
+        self._auth_routes = {
+            "/auth/login": self._handle_login,
+            "/auth/callback": self._handle_callback,
+            "/auth/logout": self._handle_logout,
+        }
+        self._public = compile_path_prefixes(self.public_paths)
 
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope, receive, send):
         """
         Process the request through the authentication middleware.
         """
-        path = request.url.path
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
 
         # Handle authentication routes first (these are always public)
-        if path == "/auth/login":
-            return await self._handle_login(request)
-        elif path == "/auth/callback":
-            return await self._handle_callback(request)
-        elif path == "/auth/logout":
-            return await self._handle_logout(request)
+        handler = self._auth_routes.get(path)
+        if handler is not None and scope["type"] == "http":
+            request = Request(scope, receive)
+            try:
+                response = await handler(request)
+            except HTTPException as e:
+                response = JSONResponse({"detail": e.detail}, status_code=e.status_code)
+            await response(scope, receive, send)
+            return
 
         # Allow other public paths without authentication
-        if any(path.startswith(public_path) for public_path in self.public_paths):
-            return await call_next(request)
+        if self._public.match(path):
+            await self.app(scope, receive, send)
+            return
 
         # For all other paths (including root /), check authentication
-        user_info = await self._get_user_from_session(request)
+        user_info = await self._get_user_from_session(scope)
         if not user_info:
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1008})
+                return
             # Redirect to login
-            login_url = f"/auth/login?next={request.url.path}"
-            return RedirectResponse(url=login_url, status_code=302)
+            login_url = f"/auth/login?next={quote(path)}"
+            await RedirectResponse(url=login_url, status_code=302)(scope, receive, send)
+            return
 
-        # Add user info to request state
-        request.state.user = user_info
+        # Add user info to request state (read back as request.state.user)
+        scope.setdefault("state", {})["user"] = user_info
 
-        # Continue with the request
-        response = await call_next(request)
-        return response
+        # Continue with the request; the whole response, streamed or not,
+        # is produced inside this request's context.
+        with request_scope(user_email=user_info.get("email")):
+            await self.app(scope, receive, send)
 
     async def _handle_login(self, request: Request) -> RedirectResponse:
         """
@@ -112,7 +201,10 @@ class GoogleOAuth2Middleware(BaseHTTPMiddleware):
             "prompt": "consent",
         }
 
-        auth_url = f"https://accounts.google.com/o/oauth2/auth?{urlencode(auth_params)}"
+        authorization_endpoint = await self.discovery.endpoint(
+            "authorization_endpoint", "https://accounts.google.com/o/oauth2/auth"
+        )
+        auth_url = f"{authorization_endpoint}?{urlencode(auth_params)}"
         return RedirectResponse(url=auth_url, status_code=302)
 
     async def _handle_callback(self, request: Request) -> RedirectResponse:
@@ -127,9 +219,7 @@ class GoogleOAuth2Middleware(BaseHTTPMiddleware):
                     status_code=400, detail="No authorization code provided"
                 )
 
-            # Exchange code for tokens using direct HTTP request
-            import httpx
-
+            # Exchange code for tokens over the shared, kept-alive client
             token_data = {
                 "client_id": self.client_id,
                 "client_secret": self.client_secret,
@@ -138,17 +228,17 @@ class GoogleOAuth2Middleware(BaseHTTPMiddleware):
                 "redirect_uri": self.redirect_uri,
             }
 
-            async with httpx.AsyncClient() as client:
-                token_response = await client.post(
-                    "https://oauth2.googleapis.com/token", data=token_data
-                )
-                token_response.raise_for_status()
-                token_json = token_response.json()
-
-            # Verify the ID token
-            id_info = id_token.verify_oauth2_token(
-                token_json["id_token"], requests.Request(), self.client_id
+            token_endpoint = await self.discovery.endpoint(
+                "token_endpoint", "https://oauth2.googleapis.com/token"
+            )
+            token_response = await get_http_client().post(
+                token_endpoint, data=token_data
             )
+            token_response.raise_for_status()
+            token_json = token_response.json()
+
+            # Verify the ID token (cached certs, signature check off the loop)
+            id_info = await self.verifier.verify(token_json["id_token"])
 
             # Extract user information
             user_info = {
@@ -166,7 +256,7 @@ class GoogleOAuth2Middleware(BaseHTTPMiddleware):
                 )
 
             # Create session
-            session_data = json.dumps(user_info)
+            session_data = await call_session_backend("issue", user_info)
 
             # Get next URL from state
             next_url = request.query_params.get("state", "/")
@@ -174,12 +264,12 @@ class GoogleOAuth2Middleware(BaseHTTPMiddleware):
             # Create response with session cookie
             response = RedirectResponse(url=next_url, status_code=302)
             response.set_cookie(
-                key="auth_session",
+                key=SESSION_COOKIE_NAME,
                 value=session_data,
                 httponly=True,
                 secure=False,  # Set to False for local development
                 samesite="lax",
-                max_age=3600 * 24,  # 24 hours
+                max_age=get_session_backend().max_age,  # 24 hours by default
             )
 
             return response
@@ -192,24 +282,21 @@ class GoogleOAuth2Middleware(BaseHTTPMiddleware):
         """
         Handle user logout.
         """
+        session_cookie = request.cookies.get(SESSION_COOKIE_NAME)
+        if session_cookie:
+            await call_session_backend("revoke", session_cookie)
         response = RedirectResponse(url="/", status_code=302)
-        response.delete_cookie("auth_session")
+        response.delete_cookie(SESSION_COOKIE_NAME)
         return response
 
-    async def _get_user_from_session(self, request: Request) -> Optional[dict]:
+    async def _get_user_from_session(self, scope) -> Optional[dict]:
         """
-        Get user information from session cookie.
+        Get user information from the signed session cookie.
         """
-        try:
-            session_cookie = request.cookies.get("auth_session")
-            if not session_cookie:
-                return None
-
-            user_info = json.loads(session_cookie)
-            return user_info
-
-        except (json.JSONDecodeError, KeyError):
+        session_cookie = _session_cookie(scope)
+        if not session_cookie:
             return None
+        return await call_session_backend("verify", session_cookie)
 
 
 def create_auth_middleware(app):
@@ -8,6 +8,7 @@ to provide secure access to the agent interface.
 
 import os
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Load environment variables from .env file
@@ -21,97 +22,215 @@ sys.path.insert(0, str(Path(__file__).parent))
 try:
     # Import auth middleware after path setup
     from auth_middleware import create_auth_middleware
-    from user_context_middleware import add_user_context_middleware
 except ImportError:
     # Fallback if middleware is not available
     def create_auth_middleware(app):
         return app
 
-    def add_user_context_middleware(app):
-        return app
+
+@asynccontextmanager
+async def server_lifespan(app=None):
+    """
+    Per-process startup: open the pooled HTTP client (see ``http_pool.py``),
+    resume email deliveries left in the spool by a previous run and start
+    the background warmup behind ``/ready`` (see ``warmup.py``).
+
+    This runs in every worker after the fork, so the spool's thread is
+    never started in the pre-fork parent.
+    """
+    from http_pool import http_client_lifespan
+
+    async with http_client_lifespan(app):
+        if os.getenv("EMAIL_SPOOL_PATH"):
+            from trend_spotter.sub_agents.email_agent import (
+                resume_spooled_deliveries,
+            )
+
+            if resume_spooled_deliveries():
+                print(f"📬 Email spool enabled at {os.getenv('EMAIL_SPOOL_PATH')}")
+        warmup = getattr(getattr(app, "state", None), "warmup", None)
+        if warmup is not None:
+            warmup.start()
+        try:
+            yield
+        finally:
+            if warmup is not None:
+                await warmup.stop()
+            # Write session events still queued by localdb:// services
+            from sqlite_services import close_services
+
+            await close_services()
+
+
+def create_app(agents_dir: str = ".", web: bool = True):
+    """
+    Build the ADK FastAPI application with authentication middleware.
+
+    Raises:
+        ImportError: If the ADK modules are not available.
+    """
+    from fastapi import Request
+    from google.adk.cli.fast_api import get_fast_api_app
+
+    from server_metrics import add_metrics, metrics_plugins
+    from sqlite_services import register_services
+    from trend_spotter.cassette import plugins_from_env
+    from trend_spotter.compaction import compaction_plugins
+
+    # Accept localdb:// session and artifact URIs (see sqlite_services.py)
+    register_services()
+
+    # Create the ADK FastAPI application
+    app = get_fast_api_app(
+        agents_dir=agents_dir,
+        session_service_uri=os.getenv("SESSION_SERVICE_URI"),
+        artifact_service_uri=os.getenv("ARTIFACT_SERVICE_URI"),
+        memory_service_uri=os.getenv("MEMORY_SERVICE_URI"),
+        allow_origins=(
+            os.getenv("ALLOW_ORIGINS", "").split(",")
+            if os.getenv("ALLOW_ORIGINS")
+            else None
+        ),
+        web=web,
+        trace_to_cloud=os.getenv("TRACE_TO_CLOUD", "false").lower() == "true",
+        # Record/replay model and tool traffic when TREND_SPOTTER_CASSETTE
+        # is set (see trend_spotter/cassette.py)
+        # (and per-agent/tool durations for /metrics, see server_metrics.py;
+        # bounded session histories, see trend_spotter/compaction.py)
+        extra_plugins=plugins_from_env() + metrics_plugins() + compaction_plugins(),
+        # Pooled HTTP client and email spool, started in each worker
+        lifespan=server_lifespan,
+    )
+
+    # Limit concurrent agent runs; added before the auth middleware so it
+    # runs inside it and can count runs per signed-in user
+    from admission_control import add_admission_control
+
+    admission_controller = add_admission_control(app)
+
+    # Add SessionMiddleware required for OAuth2
+    # (must be added before auth middleware)
+    from starlette.middleware.sessions import SessionMiddleware
+
+    from session_tokens import derive_key, session_secret
+
+    # Get OAuth2 configuration to check if we need authentication
+    client_id = os.getenv("GOOGLE_OAUTH2_CLIENT_ID")
+    client_secret = os.getenv("GOOGLE_OAUTH2_CLIENT_SECRET")
+
+    if client_id and client_secret:
+        # Add session middleware first; every worker must use the same key
+        # or the OAuth state set by one is rejected by another
+        app.add_middleware(
+            SessionMiddleware,
+            secret_key=derive_key(session_secret(), "oauth-state"),
+        )
+
+        # Then add Google OAuth2 authentication middleware; it also sets
+        # the signed-in user's request context for the agents
+        app = create_auth_middleware(app)
+    else:
+        print("⚠️  OAuth2 credentials not found - running without authentication")
+
+    # Compress responses and set browser cache headers for the web UI;
+    # outside authentication, so login redirects and errors are covered too
+    from compression_middleware import add_compression
+
+    app = add_compression(app)
+
+    # Request metrics and /metrics wrap everything, authentication included
+    app = add_metrics(app, admission_controller)
+
+    # Add custom authentication status endpoint
+    @app.get("/auth/status")
+    async def auth_status(request: Request):
+        """Get current authentication status."""
+        user = getattr(request.state, "user", None)
+        if user:
+            return {
+                "authenticated": True,
+                "user": {
+                    "email": user.get("email"),
+                    "name": user.get("name"),
+                    "picture": user.get("picture"),
+                },
+            }
+        return {"authenticated": False}
+
+    # /ready flips once the agents and clients are warm; /health at once
+    from warmup import Warmup, add_readiness_routes, default_steps, warmup_enabled
+
+    app.state.warmup = Warmup(default_steps(agents_dir)) if warmup_enabled() else None
+    add_readiness_routes(app, app.state.warmup)
+
+    # Serve archived reports (linked from emails in EMAIL_REPORT_MODE=link)
+    from trend_spotter.report_archive import add_report_routes, get_archive
+
+    archive = get_archive()
+    if archive is not None:
+        add_report_routes(app, archive)
+
+    return app
 
 
 def start_authenticated_server(
-    agents_dir: str = ".", host: str = "0.0.0.0", port: int = 8080, reload: bool = False
+    agents_dir: str = ".",
+    host: str = "0.0.0.0",
+    port: int = 8080,
+    reload: bool = False,
+    workers: int = 1,
 ):
     """
     Start the ADK server with Google OAuth2 authentication.
+
+    With ``workers`` > 1 the app and agents are loaded once and the process
+    forks that many uvicorn workers sharing the port (see ``prefork.py``).
     """
     try:
         # Import ADK modules
         import uvicorn
-        from google.adk.cli.fast_api import get_fast_api_app
 
-        print("🚀 Starting ADK server with Google OAuth2 authentication...")
+        if workers > 1 and reload:
+            print("⚠️  --reload runs a single worker; ignoring --workers")
+            workers = 1
+        if workers > 1 and os.getenv("SESSION_STORE", "").lower() == "memory":
+            print(
+                "⚠️  SESSION_STORE=memory is per worker - a session issued by one "
+                "worker is unknown to the others. Use SESSION_STORE=sqlite."
+            )
+
+        if os.getenv("GOOGLE_OAUTH2_CLIENT_ID"):
+            print("🚀 Starting ADK server with Google OAuth2 authentication...")
+        else:
+            print("🚀 Starting ADK server...")
         print(f"   Agents directory: {agents_dir}")
         print(f"   Host: {host}")
         print(f"   Port: {port}")
+        print(f"   Workers: {workers}")
         print("")
 
-        # Create the ADK FastAPI application
-        app = get_fast_api_app(
-            agents_dir=agents_dir,
-            session_service_uri=os.getenv("SESSION_SERVICE_URI"),
-            artifact_service_uri=os.getenv("ARTIFACT_SERVICE_URI"),
-            memory_service_uri=os.getenv("MEMORY_SERVICE_URI"),
-            allow_origins=(
-                os.getenv("ALLOW_ORIGINS", "").split(",")
-                if os.getenv("ALLOW_ORIGINS")
-                else None
-            ),
-            web=True,  # Enable web UI
-            trace_to_cloud=os.getenv("TRACE_TO_CLOUD", "false").lower() == "true",
-        )
-
-        # Add SessionMiddleware required for OAuth2
-        # (must be added before auth middleware)
-        import secrets
-
-        from starlette.middleware.sessions import SessionMiddleware
-
-        # Get OAuth2 configuration to check if we need authentication
-        client_id = os.getenv("GOOGLE_OAUTH2_CLIENT_ID")
-        client_secret = os.getenv("GOOGLE_OAUTH2_CLIENT_SECRET")
+        if workers > 1:
+            from prefork import PreforkServer, preload_agents
 
-        if client_id and client_secret:
-            # Add session middleware first
-            app.add_middleware(
-                SessionMiddleware,
-                secret_key=os.getenv("SESSION_SECRET_KEY", secrets.token_urlsafe(32)),
-            )
-
-            # Then add Google OAuth2 authentication middleware
-            app = create_auth_middleware(app)
+            agents = preload_agents(agents_dir)
+            print(f"📦 Preloaded agents: {', '.join(agents) or 'none'}")
 
-            # Add user context middleware after authentication
-            app = add_user_context_middleware(app)
-        else:
-            print("⚠️  OAuth2 credentials not found - running without authentication")
-
-        # Add custom authentication status endpoint
-        @app.get("/auth/status")
-        async def auth_status(request):
-            """Get current authentication status."""
-            user = getattr(request.state, "user", None)
-            if user:
-                return {
-                    "authenticated": True,
-                    "user": {
-                        "email": user.get("email"),
-                        "name": user.get("name"),
-                        "picture": user.get("picture"),
-                    },
-                }
-            return {"authenticated": False}
+        app = create_app(agents_dir)
 
         print("🌐 Server will be available at:")
         print(f"   - Main app: http://{host}:{port}/")
         print(f"   - API docs: http://{host}:{port}/docs")
         print(f"   - Auth status: http://{host}:{port}/auth/status")
+        print(f"   - Readiness: http://{host}:{port}/ready")
         print(f"   - Logout: http://{host}:{port}/auth/logout")
+        print(f"   - Run admission: http://{host}:{port}/admission/status")
+        if os.getenv("REPORT_ARCHIVE_DIR"):
+            print(f"   - Archived reports: http://{host}:{port}/reports/<digest>")
         print("")
 
         # Start the server
+        if workers > 1:
+            sys.exit(PreforkServer(app, host=host, port=port, workers=workers).run())
         uvicorn.run(app, host=host, port=port, reload=reload, log_level="info")
 
     except ImportError as e:
@@ -142,9 +261,21 @@ if __name__ == "__main__":
     parser.add_argument(
         "--reload", action="store_true", help="Enable auto-reload for development"
     )
+    parser.add_argument(
+        "--workers",
+        default=None,
+        help="Worker processes, or 'auto' for one per CPU "
+        "(default: $WEB_CONCURRENCY or 1)",
+    )
 
     args = parser.parse_args()
 
+    from prefork import worker_count
+
     start_authenticated_server(
-        agents_dir=args.agents_dir, host=args.host, port=args.port, reload=args.reload
+        agents_dir=args.agents_dir,
+        host=args.host,
+        port=args.port,
+        reload=args.reload,
+        workers=worker_count(args.workers),
     )
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Response compression and browser caching for the web UI and the API.
+
+The ADK web UI is a 5 MB JavaScript bundle plus chunks, and the API
+answers with JSON; both were sent uncompressed and the UI was downloaded
+again on every visit. ``CompressionMiddleware`` fixes both:
+
+- Compression is negotiated from ``Accept-Encoding``: brotli when the
+  optional ``brotli`` package is installed (``pip install brotli``), else
+  gzip. Only bodies of compressible types above a size threshold are
+  compressed, and only when they are complete: a single chunk, or chunks
+  with a declared ``Content-Length`` (files). Streaming responses
+  (``/run_sse``'s event stream, any chunked body of unknown length) pass
+  through untouched, so events are never held back.
+- UI files whose names carry a content hash (``main-KCUV4MHY.js``) are
+  served with ``Cache-Control: private, max-age=31536000, immutable``, so a
+  browser fetches each build once. Other UI files (``index.html``, which
+  names the current bundle) get ``no-cache`` and are revalidated with
+  their ETag; an unchanged file costs a 304.
+- Compressed UI files are cached in memory by path, ETag and encoding, so
+  each is compressed once per process, in a worker thread.
+
+A compressed response's ETag gets the encoding as a suffix
+(``"abc"`` -> ``"abc-gzip"``). For the UI files, the suffix is removed
+from ``If-None-Match`` before the app sees it and added back to a 304, so
+revalidation still works. Other routes may tag their own encodings (the
+report archive serves ``"<digest>-gzip"``), so their ETags and
+conditional requests are left alone.
+
+The middleware sits inside the metrics middleware and outside
+authentication. The auth middleware's own responses are small and are not
+cached.
+
+Configuration (environment variables):
+    COMPRESSION_MIN_SIZE    Smallest body to compress, in bytes (default 1024)
+    COMPRESSION_CACHE_MB    Memory for compressed UI files (default 64)
+"""
+
+import asyncio
+import gzip
+import os
+import re
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+IMMUTABLE = "private, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+STATIC_PREFIXES = ("/dev-ui/",)
+
+# Types worth compressing; images, fonts and archives are already compressed
+_COMPRESSIBLE = re.compile(
+    r"^(text/(?!event-stream)|application/(json|javascript|xml|wasm|.*\+json|"
+    r".*\+xml)|image/svg\+xml)",
+    re.IGNORECASE,
+)
+# A content hash before the extension: chunk-25OK43GT.js, main.3f2a9c1b.css
+_HASHED_NAME = re.compile(r"[.-]([A-Za-z0-9]{8,})\.[A-Za-z0-9]+$")
+# Off the event loop above this size
+_THREAD_THRESHOLD = 256 * 1024
+# Larger chunked bodies are passed through rather than held in memory
+MAX_BUFFERED_BODY = 32 * 1024 * 1024
+
+
+def is_fingerprinted(path: str) -> bool:
+    """Whether a file name carries a build hash, so its content never changes."""
+    match = _HASHED_NAME.search(path)
+    if not match:
+        return False
+    digest = match.group(1)
+    return digest.isupper() or any(c.isdigit() for c in digest)
+
+
+def negotiate(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """
+    The preferred encoding the client accepts, or None for identity.
+
+    Args:
+        accept_encoding: The request's ``Accept-Encoding`` header.
+        available: Encodings we can produce, most preferred first.
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in available:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def _tag_etag(etag: str, encoding: str) -> str:
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return f"{etag}-{encoding}"
+
+
+def _untag_if_none_match(value: str) -> Tuple[str, Optional[str]]:
+    """Strip our encoding suffix from each tag; returns the encoding seen."""
+    found = None
+
+    def strip(match):
+        nonlocal found
+        found = match.group(2)
+        return match.group(1) + '"'
+
+    value = re.sub(r'("[^"]*?)-(br|gzip)"', strip, value)
+    return value, found
+
+
+class _CompressedCache:
+    """LRU of compressed static bodies, bounded by total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key: tuple, body: bytes) -> None:
+        if len(body) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """ASGI middleware for negotiated compression and UI cache headers."""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        static_prefixes: Iterable[str] = STATIC_PREFIXES,
+        cache_bytes: int = 64 * 1024 * 1024,
+    ):
+        """
+        Args:
+            gzip_level, brotli_quality: For dynamic responses. Cached UI
+                files are compressed once at the highest practical level.
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.static_prefixes = tuple(static_prefixes)
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+        self.cache = _CompressedCache(cache_bytes)
+
+    def compress(self, body: bytes, encoding: str, static: bool) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=9 if static else self.brotli_quality)
+        return gzip.compress(body, compresslevel=9 if static else self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        tagged_with = None
+        static = scope["path"].startswith(self.static_prefixes)
+        for index, (name, value) in enumerate(scope["headers"]):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+            elif name == b"if-none-match" and static:
+                untagged, tagged_with = _untag_if_none_match(value.decode("latin-1"))
+                if tagged_with:
+                    # Edit in place: outer middleware reads this scope back
+                    scope["headers"] = list(scope["headers"])
+                    scope["headers"][index] = (name, untagged.encode("latin-1"))
+        encoding = negotiate(accept, self.encodings)
+        if encoding is None and not static:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _Responder(self, scope, send, encoding, static, tagged_with)
+        await self.app(scope, receive, responder)
+
+
+class _Responder:
+    """The ``send`` callable for one response."""
+
+    def __init__(self, middleware, scope, send, encoding, static, tagged_with):
+        self.middleware = middleware
+        self.scope = scope
+        self.send = send
+        self.encoding = encoding if scope["method"] != "HEAD" else None
+        self.static = static
+        # Encoding suffix removed from If-None-Match (UI files only), if any
+        self.tagged_with = tagged_with
+        self.start = None
+        self.chunks = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if self.passthrough:
+            await self.send(message)
+            return
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = MutableHeaders(scope=message)
+            if self.static and message["status"] in (200, 304):
+                headers.setdefault(
+                    "Cache-Control",
+                    IMMUTABLE if is_fingerprinted(self.scope["path"]) else REVALIDATE,
+                )
+            if (
+                message["status"] == 304
+                and self.tagged_with
+                and "etag" in headers
+                and "content-encoding" not in headers
+            ):
+                # The client revalidated a compressed copy; name that variant
+                headers["ETag"] = _tag_etag(headers["etag"], self.tagged_with)
+                headers.add_vary_header("Accept-Encoding")
+            return
+        if message["type"] != "http.response.body" or self.start is None:
+            await self.send(message)
+            return
+
+        if self.chunks is None:
+            self._decide(message)
+            if self.passthrough:
+                await self.send(self.start)
+                await self.send(message)
+                return
+        self.chunks.append(message.get("body", b""))
+        if message.get("more_body", False):
+            return
+
+        headers = MutableHeaders(scope=self.start)
+        body = await self._compressed(b"".join(self.chunks), headers.get("etag"))
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(body))
+        if "etag" in headers:
+            headers["ETag"] = _tag_etag(headers["etag"], self.encoding)
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": body})
+
+    def _decide(self, first: dict) -> None:
+        """Compress (buffering the body) or pass the response through."""
+        headers = MutableHeaders(scope=self.start)
+        compressible = bool(
+            _COMPRESSIBLE.match(headers.get("content-type", ""))
+            and "content-encoding" not in headers
+            and self.start["status"] not in (204, 206, 304)
+        )
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+        # A declared length means a complete body (e.g. a file sent in
+        # chunks); without one, several chunks are a stream
+        declared = headers.get("content-length", "")
+        size = int(declared) if declared.isdigit() else None
+        if first.get("more_body", False):
+            if size is None or size > MAX_BUFFERED_BODY:
+                size = -1
+        elif size is None:
+            size = len(first.get("body", b""))
+        self.passthrough = (
+            not compressible
+            or self.encoding is None
+            or size < 0
+            or size < self.middleware.minimum_size
+        )
+        self.chunks = []
+
+    async def _compressed(self, body: bytes, etag: Optional[str]) -> bytes:
+        middleware = self.middleware
+        key = None
+        if self.static and etag:
+            key = (self.scope["path"], etag, self.encoding)
+            cached = middleware.cache.get(key)
+            if cached is not None:
+                return cached
+        if len(body) > _THREAD_THRESHOLD:
+            compressed = await asyncio.to_thread(
+                middleware.compress, body, self.encoding, self.static
+            )
+        else:
+            compressed = middleware.compress(body, self.encoding, self.static)
+        if key is not None:
+            middleware.cache.put(key, compressed)
+        return compressed
+
+
+def add_compression(app):
+    """Compress ``app``'s responses and set UI cache headers."""
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+        cache_bytes=int(float(os.getenv("COMPRESSION_CACHE_MB", "64")) * 1024 * 1024),
+    )
+    encodings = "brotli, gzip" if brotli is not None else "gzip"
+    print(f"🗜️  Response compression: {encodings}")
+    return app
@@ -16,6 +16,8 @@ GOOGLE_CLOUD_LOCATION=${GOOGLE_CLOUD_LOCATION:-"us-central1"}
 SERVICE_NAME=${SERVICE_NAME:-"trend-spotter-service"}
 APP_NAME=${APP_NAME:-"trend-spotter-app"}
 AGENT_PATH=${AGENT_PATH:-"./trend_spotter"}
+# Max concurrent requests per instance; measure with tests/load/run_load.py
+CLOUD_RUN_CONCURRENCY=${CLOUD_RUN_CONCURRENCY:-""}
 
 echo "🚀 Starting ADK deployment..."
 echo "Project: $GOOGLE_CLOUD_PROJECT"
@@ -67,6 +69,14 @@ adk deploy cloud_run \
   --with_ui \
   "$AGENT_PATH"
 
+if [ -n "$CLOUD_RUN_CONCURRENCY" ]; then
+  echo ""
+  echo "🚦 Setting instance concurrency to $CLOUD_RUN_CONCURRENCY..."
+  gcloud run services update "$SERVICE_NAME" \
+    --region="$GOOGLE_CLOUD_LOCATION" \
+    --concurrency="$CLOUD_RUN_CONCURRENCY"
+fi
+
 echo ""
 echo "🔐 Configuring Google Authentication..."
 
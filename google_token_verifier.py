@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Non-blocking Google ID token verification for the OAuth2 callback.
+
+``id_token.verify_oauth2_token`` fetches Google's signing certificates
+with a blocking HTTP request and then checks the RSA signature, all on the
+event loop thread. While that runs, every other request on the instance
+waits. This module replaces it with:
+
+- ``GoogleIDTokenVerifier`` fetches the certificates over the shared HTTP
+  client (``http_pool.py``) and keeps them in memory for as long as their
+  ``Cache-Control`` allows. Concurrent logins share a single refresh. The
+  certificates are fetched again early when a token names a key ID the
+  cache does not have yet (key rotation). The signature check itself runs
+  in a worker thread.
+- ``OIDCDiscovery`` loads Google's OpenID configuration (authorization and
+  token endpoints) and caches it on disk as well as in memory, so a
+  restarted server does not fetch it again before its own first login.
+
+If a refresh fails, the last good copy is used, so a short Google outage
+does not stop users from signing in.
+"""
+
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+import httpx
+from google.auth import jwt
+
+from http_pool import get_http_client
+from trend_spotter.metrics import CACHE_LOOKUPS
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Used when a response carries no usable Cache-Control.
+DEFAULT_MAX_AGE = 3600.0
+# Minimum gap between refreshes forced by an unknown key ID.
+MIN_FORCED_REFRESH_INTERVAL = 30.0
+
+_CERTS_HIT = CACHE_LOOKUPS.labels("google_certs", "hit")
+_CERTS_MISS = CACHE_LOOKUPS.labels("google_certs", "miss")
+_DISCOVERY_HIT = CACHE_LOOKUPS.labels("oidc_discovery", "hit")
+_DISCOVERY_MISS = CACHE_LOOKUPS.labels("oidc_discovery", "miss")
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)", re.IGNORECASE)
+
+
+def cache_lifetime(
+    headers: Mapping[str, str], default: float = DEFAULT_MAX_AGE
+) -> float:
+    """
+    Seconds a response may be reused, from its Cache-Control and Age headers.
+    """
+    cache_control = headers.get("cache-control", "")
+    if re.search(r"no-store|no-cache", cache_control, re.IGNORECASE):
+        return 0.0
+    match = _MAX_AGE.search(cache_control)
+    if not match:
+        return default
+    try:
+        age = float(headers.get("age", "0"))
+    except ValueError:
+        age = 0.0
+    return max(0.0, float(match.group(1)) - age)
+
+
+async def _get_json(url: str, http_client: Optional[httpx.AsyncClient]):
+    response = await (http_client or get_http_client()).get(url)
+    response.raise_for_status()
+    return response.json(), response.headers
+
+
+class GoogleIDTokenVerifier:
+    """Verifies Google ID tokens against cached signing certificates."""
+
+    def __init__(
+        self,
+        audience: str,
+        certs_url: str = GOOGLE_CERTS_URL,
+        http_client: Optional[httpx.AsyncClient] = None,
+        clock_skew: int = 10,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.audience = audience
+        self.certs_url = certs_url
+        self.http_client = http_client
+        self.clock_skew = clock_skew
+        self._clock = clock
+        self._certs: Optional[Dict[str, str]] = None
+        self._expires_at = 0.0
+        self._fetched_at = float("-inf")
+        self._lock: Optional[asyncio.Lock] = None
+        self.fetches = 0
+
+    async def certs(self, force: bool = False) -> Dict[str, str]:
+        """Signing certificates by key ID, refreshed when they expire."""
+        if self._certs is not None:
+            now = self._clock()
+            if (force and now - self._fetched_at < MIN_FORCED_REFRESH_INTERVAL) or (
+                not force and now < self._expires_at
+            ):
+                _CERTS_HIT.inc()
+                return self._certs
+        stale = self._certs
+        # Created lazily so it binds to the server's event loop.
+        self._lock = self._lock or asyncio.Lock()
+        async with self._lock:
+            # Another login may have refreshed while we waited for the lock.
+            if self._certs is not stale or (
+                not force and self._certs and self._clock() < self._expires_at
+            ):
+                return self._certs
+            try:
+                certs, headers = await _get_json(self.certs_url, self.http_client)
+            except (httpx.HTTPError, ValueError) as e:
+                if self._certs is None:
+                    raise
+                print(f"⚠️  Google cert refresh failed, using cached certs: {e}")
+                return self._certs
+            self.fetches += 1
+            _CERTS_MISS.inc()
+            self._certs = certs
+            self._fetched_at = self._clock()
+            self._expires_at = self._fetched_at + cache_lifetime(headers)
+            return certs
+
+    async def verify(self, token: str) -> Mapping[str, Any]:
+        """
+        Verify an ID token's signature, audience, expiry and issuer.
+
+        Raises:
+            ValueError: If the token is invalid.
+        """
+        certs = await self.certs()
+        kid = jwt.decode_header(token).get("kid")
+        if kid not in certs:
+            # Google rotated its keys before our cached copy expired.
+            certs = await self.certs(force=True)
+        claims = await asyncio.to_thread(
+            jwt.decode,
+            token,
+            certs=certs,
+            audience=self.audience,
+            clock_skew_in_seconds=self.clock_skew,
+        )
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+        return claims
+
+
+class OIDCDiscovery:
+    """OpenID Connect discovery document, cached in memory and on disk."""
+
+    def __init__(
+        self,
+        url: str = GOOGLE_DISCOVERY_URL,
+        cache_path: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.url = url
+        self.cache_path = cache_path
+        self.http_client = http_client
+        self._clock = clock
+        self._metadata: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self.fetches = 0
+        self._load_from_disk()
+
+    def _load_from_disk(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as cached:
+                entry = json.load(cached)
+            if entry.get("url") == self.url:
+                self._metadata = entry["metadata"]
+                self._expires_at = float(entry["expires_at"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save_to_disk(self) -> None:
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+                json.dump(
+                    {
+                        "url": self.url,
+                        "expires_at": self._expires_at,
+                        "metadata": self._metadata,
+                    },
+                    tmp,
+                )
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠️  Could not cache OIDC discovery at {self.cache_path}: {e}")
+
+    async def get(self) -> Dict[str, Any]:
+        """The discovery document, fetched only when the cached copy expired."""
+        if self._metadata is not None and self._clock() < self._expires_at:
+            _DISCOVERY_HIT.inc()
+            return self._metadata
+        self._lock = self._lock or asyncio.Lock()
+        async with self._lock:
+            if self._metadata is not None and self._clock() < self._expires_at:
+                return self._metadata
+            try:
+                metadata, headers = await _get_json(self.url, self.http_client)
+            except (httpx.HTTPError, ValueError) as e:
+                if self._metadata is None:
+                    raise
+                print(f"⚠️  OIDC discovery refresh failed, using cached copy: {e}")
+                return self._metadata
+            self.fetches += 1
+            _DISCOVERY_MISS.inc()
+            self._metadata = metadata
+            self._expires_at = self._clock() + cache_lifetime(headers)
+            self._save_to_disk()
+            return metadata
+
+    async def endpoint(self, name: str, default: str) -> str:
+        """A discovery endpoint (e.g. ``token_endpoint``), or ``default``."""
+        try:
+            return (await self.get()).get(name) or default
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"⚠️  OIDC discovery unavailable, using {default}: {e}")
+            return default
+
+
+_verifiers: Dict[str, GoogleIDTokenVerifier] = {}
+_discovery: Optional[OIDCDiscovery] = None
+
+
+def get_verifier(audience: str) -> GoogleIDTokenVerifier:
+    """The process-wide verifier for an OAuth client ID."""
+    verifier = _verifiers.get(audience)
+    if verifier is None:
+        verifier = _verifiers.setdefault(audience, GoogleIDTokenVerifier(audience))
+    return verifier
+
+
+def get_discovery() -> OIDCDiscovery:
+    """Google's discovery document, cached at ``OIDC_DISCOVERY_CACHE``."""
+    global _discovery
+    if _discovery is None:
+        _discovery = OIDCDiscovery(
+            cache_path=os.getenv("OIDC_DISCOVERY_CACHE", ".adk/oidc_discovery.json")
+        )
+    return _discovery
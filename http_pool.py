@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+App-lifetime pooled HTTP client for the server's outbound calls.
+
+The OAuth token exchange, Google certificate fetches and OIDC discovery
+share one ``httpx.AsyncClient``. Connections to Google stay open between
+logins, so only the first login pays for DNS, TCP and TLS. HTTP/2 is used
+when the optional ``h2`` package is installed (``pip install httpx[http2]``).
+
+``create_app`` opens the client on startup and closes it on shutdown via
+``http_client_lifespan``. Outside the server (scripts, tests),
+``get_http_client`` creates it on first use.
+
+Tuning (environment variables):
+    HTTP_POOL_MAX_CONNECTIONS   Max open connections (default 100)
+    HTTP_POOL_MAX_KEEPALIVE     Idle connections kept open (default 20)
+    HTTP_POOL_KEEPALIVE_EXPIRY  Seconds an idle connection is kept (default 60)
+    HTTP_TIMEOUT                Read/write/pool timeout in seconds (default 10)
+    HTTP_CONNECT_TIMEOUT        Connect timeout in seconds (default 5)
+"""
+
+import importlib.util
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import httpx
+
+from trend_spotter.metrics import OUTBOUND_DURATION
+
+_client: Optional[httpx.AsyncClient] = None
+_STARTED = "trend_spotter_started"
+
+
+async def _start_timer(request: httpx.Request) -> None:
+    request.extensions[_STARTED] = time.perf_counter()
+
+
+async def _observe_latency(response: httpx.Response) -> None:
+    """Record time to response headers by host (e.g. oauth2.googleapis.com)."""
+    request = response.request
+    started = request.extensions.get(_STARTED)
+    if started is not None:
+        outcome = "ok" if response.status_code < 400 else "error"
+        OUTBOUND_DURATION.labels(request.url.host, outcome).observe(
+            time.perf_counter() - started
+        )
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """A new pooled client configured from the environment."""
+    return httpx.AsyncClient(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "60")),
+        ),
+        timeout=httpx.Timeout(
+            float(os.getenv("HTTP_TIMEOUT", "10")),
+            connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+        ),
+        event_hooks={"request": [_start_timer], "response": [_observe_latency]},
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client, created on first use if startup did not open it."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def http_client_lifespan(app=None):
+    """FastAPI lifespan: open the shared client on startup, close on shutdown."""
+    get_http_client()
+    try:
+        yield
+    finally:
+        await close_http_client()
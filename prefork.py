@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Pre-fork multi-worker mode for the authenticated server.
+
+``uvicorn.run`` serves from one process, so an instance uses a single CPU
+core however many it has. ``PreforkServer`` follows gunicorn's pre-fork
+model instead:
+
+1. The parent builds the app and loads the agent graph once
+   (``preload_agents``). It then freezes the garbage collector, so those
+   objects stay shared copy-on-write with the workers and are not copied
+   into every worker by the first collection.
+2. It binds the listening socket and forks the workers. Each worker runs
+   its own uvicorn event loop on the inherited socket; the kernel hands
+   each new connection to one of them.
+3. It supervises them: a worker that dies is replaced, and SIGTERM or
+   SIGINT shuts every worker down gracefully.
+
+Workers share no memory once forked. Anything a later request needs must
+travel with the request (signed cookies, keyed with the shared
+``session_tokens.session_secret``) or live in a store every worker can
+reach (``SESSION_STORE=sqlite``). ``os.fork`` is POSIX-only; on other
+platforms run a single worker.
+
+Worker count (``--workers`` or ``WEB_CONCURRENCY``):
+    N       Exactly N workers
+    auto    One per CPU available to the process, honouring CPU affinity
+            and the container's cgroup CPU quota
+"""
+
+import gc
+import math
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Dict, List, Optional
+
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, encoding="ascii") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(
+    cpu_max: str = CGROUP_V2_CPU_MAX,
+    v1_quota: str = CGROUP_V1_QUOTA,
+    v1_period: str = CGROUP_V1_PERIOD,
+) -> Optional[int]:
+    """CPUs allowed by the container's CFS quota, or None if unlimited."""
+    quota = period = None
+    limit = _read(cpu_max)
+    if limit:
+        fields = limit.split()
+        if fields[0] != "max" and len(fields) == 2:
+            quota, period = fields
+    else:
+        quota, period = _read(v1_quota), _read(v1_period)
+    try:
+        quota_us, period_us = int(quota), int(period)
+    except (TypeError, ValueError):
+        return None
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return max(1, math.ceil(quota_us / period_us))
+
+
+def cpu_count() -> int:
+    """CPUs this process may run on."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS or Windows
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+
+def worker_count(value: Optional[str] = None) -> int:
+    """
+    Parse a worker count: a positive number or ``auto``.
+
+    Args:
+        value: The requested count; ``WEB_CONCURRENCY`` (default 1) if None.
+
+    Raises:
+        ValueError: If the value is neither ``auto`` nor a positive integer.
+    """
+    if value is None:
+        value = os.getenv("WEB_CONCURRENCY") or "1"
+    value = str(value).strip().lower()
+    if value == "auto":
+        return cpu_count()
+    workers = int(value)
+    if workers < 1:
+        raise ValueError(f"Worker count must be at least 1, got {workers}")
+    return workers
+
+
+def preload_agents(agents_dir: str = ".") -> List[str]:
+    """
+    Import every agent under ``agents_dir`` before forking.
+
+    The ADK loads an agent on its first request. Loading it here means the
+    workers inherit the imported modules and only look them up.
+
+    Returns:
+        The names of the agents that loaded.
+    """
+    from google.adk.cli.utils.agent_loader import AgentLoader
+
+    loader = AgentLoader(agents_dir)
+    loaded = []
+    for name in loader.list_agents():
+        try:
+            loader.load_agent(name)
+        except Exception as e:  # not every package in the directory is an agent
+            print(f"⚠️  Could not preload agent {name}: {e}")
+            continue
+        loaded.append(name)
+    return loaded
+
+
+class PreforkServer:
+    """Serves one ASGI app from several forked uvicorn workers."""
+
+    def __init__(
+        self,
+        app,
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        workers: int = 1,
+        log_level: str = "info",
+        graceful_timeout: float = 30.0,
+        min_uptime: float = 5.0,
+        backlog: int = 2048,
+    ):
+        """
+        Args:
+            app: The ASGI application, fully built in the parent.
+            graceful_timeout: Seconds workers get to finish in-flight
+                requests on shutdown before they are killed.
+            min_uptime: A worker that exits sooner than this after starting
+                is treated as a startup failure and stops the server
+                instead of being restarted in a loop.
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.worker_count = workers
+        self.log_level = log_level
+        self.graceful_timeout = graceful_timeout
+        self.min_uptime = min_uptime
+        self.backlog = backlog
+        self.socket: Optional[socket.socket] = None
+        self.workers: Dict[int, float] = {}  # pid -> start time
+        self._stopping = False
+        self._kill_at: Optional[float] = None
+
+    def bind(self) -> socket.socket:
+        """Open the listening socket the workers will share."""
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.backlog)
+        sock.set_inheritable(True)
+        self.port = sock.getsockname()[1]
+        self.socket = sock
+        return sock
+
+    def spawn(self) -> int:
+        """Fork one worker; returns its pid."""
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._serve()
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        return pid
+
+    def _serve(self) -> None:
+        import uvicorn
+
+        # uvicorn installs its own graceful-shutdown handlers
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)
+        config = uvicorn.Config(self.app, log_level=self.log_level)
+        uvicorn.Server(config).run(sockets=[self.socket])
+
+    def stop(self, *_) -> None:
+        """Ask every worker to finish its requests and exit."""
+        if self._stopping:
+            return
+        self._stopping = True
+        self._kill_at = time.monotonic() + self.graceful_timeout
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGTERM)
+
+    def _signal(self, pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def run(self) -> int:
+        """
+        Fork the workers and supervise them until shutdown.
+
+        Returns:
+            The exit status: 0 after a requested shutdown, 1 if a worker
+            failed during startup.
+        """
+        if self.socket is None:
+            self.bind()
+        # Keep the preloaded app out of the collector's reach so forked
+        # workers don't dirty (and copy) its memory pages
+        gc.collect()
+        gc.freeze()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        print(
+            f"🧵 Pre-fork server {os.getpid()}: {self.worker_count} workers on "
+            f"http://{self.host}:{self.port}"
+        )
+        sys.stdout.flush()
+        for _ in range(self.worker_count):
+            self.spawn()
+
+        status = 0
+        while self.workers:
+            pid, wait_status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                if self._kill_at is not None and time.monotonic() > self._kill_at:
+                    for straggler in list(self.workers):
+                        self._signal(straggler, signal.SIGKILL)
+                    self._kill_at = None
+                time.sleep(0.1)
+                continue
+            started = self.workers.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(wait_status)
+            print(f"⚠️  Worker {pid} exited with code {code}")
+            if time.monotonic() - started < self.min_uptime:
+                print("❌ Worker failed during startup - stopping the server")
+                status = 1
+                self.stop()
+                continue
+            self.spawn()
+
+        self.socket.close()
+        print("👋 Pre-fork server stopped")
+        return status
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Request metrics and the Prometheus ``/metrics`` endpoint.
+
+``MetricsMiddleware`` wraps the whole app, authentication included. For
+every HTTP request it records latency and status by route. The route is
+the matched path template (``/apps/{app_name}/users/{user_id}/sessions``),
+so metrics stay bounded however many users and sessions there are.
+Requests that reach no route (redirects to login, 404s) share the
+``unrouted`` label, except the known paths in ``static_routes``.
+
+It also answers ``GET /metrics`` itself, before authentication, so a
+Prometheus scraper needs no Google login. Set ``METRICS_TOKEN`` to require
+``Authorization: Bearer <token>`` on it.
+
+Every worker process (``--workers``) keeps its own counters; each scrape
+reports the worker that answered it.
+
+Set ``METRICS_ENABLED=false`` to turn recording and the endpoint off.
+"""
+
+import hmac
+import os
+import time
+from typing import Iterable, List, Optional
+
+from starlette.responses import PlainTextResponse, Response
+
+from admission_control import RUN_PATHS
+from trend_spotter.metrics import (
+    CONTENT_TYPE,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    RUNS_IN_FLIGHT,
+    Counter,
+    Gauge,
+    render,
+)
+
+METRICS_PATH = "/metrics"
+STATIC_ROUTES = ("/auth/login", "/auth/callback", "/auth/logout")
+
+
+def _route_label(scope, static_routes) -> str:
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template:
+        return template
+    return scope["path"] if scope["path"] in static_routes else "unrouted"
+
+
+def _authorized(scope, token: str) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            return hmac.compare_digest(value, b"Bearer " + token.encode("utf-8"))
+    return False
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request metrics and serving ``/metrics``."""
+
+    def __init__(
+        self,
+        app,
+        token: Optional[str] = None,
+        run_paths: Iterable[str] = RUN_PATHS,
+        static_routes: Iterable[str] = STATIC_ROUTES,
+    ):
+        self.app = app
+        self.token = token
+        self.run_paths = frozenset(run_paths)
+        self.static_routes = frozenset(static_routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["path"] == METRICS_PATH:
+            await self._serve_metrics(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        is_run = scope["path"] in self.run_paths
+        HTTP_IN_FLIGHT.inc()
+        if is_run:
+            RUNS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = _route_label(scope, self.static_routes)
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            HTTP_IN_FLIGHT.dec()
+            if is_run:
+                RUNS_IN_FLIGHT.dec()
+
+    async def _serve_metrics(self, scope, receive, send):
+        if self.token and not _authorized(scope, self.token):
+            response = PlainTextResponse("Unauthorized", status_code=401)
+        else:
+            response = Response(render(), media_type=CONTENT_TYPE)
+        await response(scope, receive, send)
+
+
+def _register_admission_metrics(controller) -> None:
+    Gauge(
+        "trend_spotter_admission_queue_depth",
+        "Agent runs waiting for an admission slot.",
+        function=lambda: controller.queued,
+    )
+    Counter(
+        "trend_spotter_admission_rejected_total",
+        "Agent runs refused with 429, by reason.",
+        ("reason",),
+        function=lambda: {(k,): v for k, v in controller.rejected.items()},
+    )
+    Gauge(
+        "trend_spotter_admission_queue_wait_max_seconds",
+        "Longest time an admitted run waited in the queue.",
+        function=lambda: controller.max_wait,
+    )
+
+
+def metrics_enabled() -> bool:
+    return os.getenv("METRICS_ENABLED", "true").lower() != "false"
+
+
+def metrics_plugins() -> List[str]:
+    """ADK plugins recording per-agent, model and tool durations."""
+    return ["trend_spotter.stage_timing.MetricsPlugin"] if metrics_enabled() else []
+
+
+def add_metrics(app, admission_controller=None):
+    """
+    Record request metrics for ``app`` and serve ``/metrics``.
+
+    Add it last, so it wraps the authentication middleware too.
+    """
+    if not metrics_enabled():
+        return app
+    if admission_controller is not None:
+        _register_admission_metrics(admission_controller)
+    app.add_middleware(MetricsMiddleware, token=os.getenv("METRICS_TOKEN") or None)
+    print(f"📈 Prometheus metrics at {METRICS_PATH}")
+    return app
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Server-side session store for the authentication cookie.
+
+With ``SESSION_STORE`` set, the ``auth_session`` cookie holds only an
+opaque random session ID. The user, and any per-user state, stay on the
+server. Sessions can then be revoked (logout, or every session of one
+user), counted, and given extra data without growing the cookie. Without
+``SESSION_STORE``, the cookie carries a signed token as before (see
+``session_tokens.py``).
+
+Backends:
+    memory  ``MemorySessionStore``: an LRU ``OrderedDict`` bounded by
+            ``SESSION_STORE_MAX_SESSIONS``. Per process only, so use it
+            with a single worker.
+    sqlite  ``SQLiteSessionStore``: a WAL-mode database at
+            ``SESSION_STORE_PATH``, shared by every worker on the host.
+
+Sessions expire after ``SESSION_TTL`` seconds without use (sliding
+expiry). A background sweeper deletes expired sessions every
+``SESSION_SWEEP_INTERVAL`` seconds.
+
+Only a SHA-256 of each session ID is stored as the key, so a copy of the
+store cannot be used to impersonate anyone.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+def _key(session_id: str) -> str:
+    return hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+
+
+def _user_fields(user_info: dict) -> dict:
+    return {"sub": user_info.get("sub"), "email": user_info.get("email")}
+
+
+class SessionStore(ABC):
+    """
+    Interface shared by the backends.
+
+    ``issue``/``verify``/``revoke`` match ``SessionTokenSigner``, so the
+    auth middleware can use either. Backends whose calls can block (disk,
+    locks held by other processes) set ``blocking``; the middleware then
+    runs them on a worker thread instead of the event loop.
+    """
+
+    ttl: float
+    blocking: bool = False
+
+    @property
+    def max_age(self) -> int:
+        """Cookie lifetime; the session itself also ends after ``ttl`` idle."""
+        return int(self.ttl)
+
+    @abstractmethod
+    def issue(self, user_info: dict) -> str:
+        """Create a session and return its opaque ID for the cookie."""
+
+    @abstractmethod
+    def verify(self, session_id: str) -> Optional[dict]:
+        """The session's user, refreshing its expiry, or None."""
+
+    @abstractmethod
+    def revoke(self, session_id: str) -> None:
+        """End one session."""
+
+    @abstractmethod
+    def revoke_user(self, email: str) -> int:
+        """End every session of a user; returns how many were ended."""
+
+    @abstractmethod
+    def get_data(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Per-session state stored with ``update_data``."""
+
+    @abstractmethod
+    def update_data(self, session_id: str, **values: Any) -> bool:
+        """Merge ``values`` into the session's state; False if it is gone."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of live sessions."""
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """Delete expired sessions; returns how many were deleted."""
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process LRU store; issuing, verifying and revoking are O(1).
+
+    Entries are kept in last-use order. With a sliding TTL that is also
+    expiry order, so sweeping pops from the front until it reaches a live
+    session. When ``max_sessions`` is reached, the least recently used
+    session is evicted.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 100_000,
+        ttl: float = 24 * 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._clock = clock
+        # key -> [expires_at, user, data]
+        self._sessions: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, session_id: str) -> Optional[list]:
+        key = _key(session_id)
+        entry = self._sessions.get(key)
+        if entry is None:
+            return None
+        now = self._clock()
+        if entry[0] <= now:
+            del self._sessions[key]
+            return None
+        entry[0] = now + self.ttl
+        self._sessions.move_to_end(key)
+        return entry
+
+    def issue(self, user_info: dict) -> str:
+        session_id = secrets.token_urlsafe(32)
+        with self._lock:
+            self._sweep_locked()
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+            self._sessions[_key(session_id)] = [
+                self._clock() + self.ttl,
+                _user_fields(user_info),
+                {},
+            ]
+        return session_id
+
+    def verify(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._live(session_id)
+            return entry[1] if entry else None
+
+    def revoke(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(_key(session_id), None)
+
+    def revoke_user(self, email: str) -> int:
+        with self._lock:
+            keys = [k for k, e in self._sessions.items() if e[1]["email"] == email]
+            for key in keys:
+                del self._sessions[key]
+        return len(keys)
+
+    def get_data(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._live(session_id)
+            return dict(entry[2]) if entry else None
+
+    def update_data(self, session_id: str, **values: Any) -> bool:
+        with self._lock:
+            entry = self._live(session_id)
+            if entry is None:
+                return False
+            entry[2].update(values)
+            return True
+
+    def count(self) -> int:
+        with self._lock:
+            self._sweep_locked()
+            return len(self._sessions)
+
+    def _sweep_locked(self) -> int:
+        now = self._clock()
+        swept = 0
+        while self._sessions:
+            key, entry = next(iter(self._sessions.items()))
+            if entry[0] > now:
+                break
+            del self._sessions[key]
+            swept += 1
+        return swept
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep_locked()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    email TEXT,
+    user TEXT NOT NULL,
+    data TEXT NOT NULL DEFAULT '{}',
+    expires REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires);
+CREATE INDEX IF NOT EXISTS sessions_email ON sessions (email);
+"""
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite store shared between processes; lookups use the primary key.
+
+    To avoid a write on every request, a session's expiry is pushed forward
+    at most once every ``touch_interval`` seconds. ``sweep`` also trims the
+    table to ``max_sessions``, starting with the sessions closest to expiry.
+    Calls can wait up to 30 seconds on another process's write lock, so the
+    store is ``blocking``.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        max_sessions: int = 1_000_000,
+        ttl: float = 24 * 3600,
+        touch_interval: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self._clock = clock
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _live(self, session_id: str, columns: str):
+        key = _key(session_id)
+        db = self._connect()
+        now = self._clock()
+        row = db.execute(
+            f"SELECT expires, {columns} FROM sessions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[0] <= now:
+            return None
+        if row[0] - now < self.ttl - self.touch_interval:
+            db.execute(
+                "UPDATE sessions SET expires = ? WHERE key = ?", (now + self.ttl, key)
+            )
+        return row[1]
+
+    def issue(self, user_info: dict) -> str:
+        session_id = secrets.token_urlsafe(32)
+        user = _user_fields(user_info)
+        self._connect().execute(
+            "INSERT INTO sessions (key, email, user, expires) VALUES (?, ?, ?, ?)",
+            (
+                _key(session_id),
+                user["email"],
+                json.dumps(user),
+                self._clock() + self.ttl,
+            ),
+        )
+        return session_id
+
+    def verify(self, session_id: str) -> Optional[dict]:
+        user = self._live(session_id, "user")
+        return json.loads(user) if user else None
+
+    def revoke(self, session_id: str) -> None:
+        self._connect().execute(
+            "DELETE FROM sessions WHERE key = ?", (_key(session_id),)
+        )
+
+    def revoke_user(self, email: str) -> int:
+        return (
+            self._connect()
+            .execute("DELETE FROM sessions WHERE email = ?", (email,))
+            .rowcount
+        )
+
+    def get_data(self, session_id: str) -> Optional[Dict[str, Any]]:
+        data = self._live(session_id, "data")
+        return json.loads(data) if data is not None else None
+
+    def update_data(self, session_id: str, **values: Any) -> bool:
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            data = self._live(session_id, "data")
+            if data is not None:
+                merged = dict(json.loads(data), **values)
+                db.execute(
+                    "UPDATE sessions SET data = ? WHERE key = ?",
+                    (json.dumps(merged), _key(session_id)),
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return data is not None
+
+    def count(self) -> int:
+        return (
+            self._connect()
+            .execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires > ?", (self._clock(),)
+            )
+            .fetchone()[0]
+        )
+
+    def sweep(self) -> int:
+        db = self._connect()
+        swept = db.execute(
+            "DELETE FROM sessions WHERE expires <= ?", (self._clock(),)
+        ).rowcount
+        overflow = db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - (
+            self.max_sessions
+        )
+        if overflow > 0:
+            swept += db.execute(
+                "DELETE FROM sessions WHERE key IN ("
+                "SELECT key FROM sessions ORDER BY expires LIMIT ?)",
+                (overflow,),
+            ).rowcount
+        return swept
+
+
+class SessionSweeper:
+    """Daemon thread that calls ``store.sweep()`` periodically."""
+
+    def __init__(self, store: SessionStore, interval: float = 60.0):
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="session-sweeper", daemon=True
+        )
+
+    def start(self) -> "SessionSweeper":
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                swept = self.store.sweep()
+                if swept:
+                    print(f"🧹 Swept {swept} expired session(s)")
+            except Exception as e:  # keep sweeping on transient DB errors
+                print(f"❌ Session sweep failed: {e}")
+
+
+_store: Optional[SessionStore] = None
+_sweeper: Optional[SessionSweeper] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """
+    The store selected by ``SESSION_STORE`` (with its sweeper running), or
+    None when sessions are signed cookies.
+
+    Raises:
+        ValueError: If ``SESSION_STORE`` names an unknown backend.
+    """
+    global _store, _sweeper
+    backend = os.getenv("SESSION_STORE", "").strip().lower()
+    if not backend:
+        return None
+    with _store_lock:
+        if _store is None:
+            ttl = float(os.getenv("SESSION_TTL", str(24 * 3600)))
+            if backend == "memory":
+                _store = MemorySessionStore(
+                    max_sessions=int(os.getenv("SESSION_STORE_MAX_SESSIONS", "100000")),
+                    ttl=ttl,
+                )
+            elif backend == "sqlite":
+                _store = SQLiteSessionStore(
+                    os.getenv("SESSION_STORE_PATH", ".adk/sessions.db"),
+                    max_sessions=int(
+                        os.getenv("SESSION_STORE_MAX_SESSIONS", "1000000")
+                    ),
+                    ttl=ttl,
+                )
+            else:
+                raise ValueError(
+                    f"Unknown SESSION_STORE {backend!r}; use 'memory' or 'sqlite'"
+                )
+            _sweeper = SessionSweeper(
+                _store, float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+            ).start()
+        return _store
+
+
+def reset_session_store() -> None:
+    """Stop the sweeper and forget the store (tests, reconfiguration)."""
+    global _store, _sweeper
+    with _store_lock:
+        if _sweeper is not None:
+            _sweeper.stop(timeout=5)
+        _store = _sweeper = None
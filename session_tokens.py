@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Signed, compact session tokens for the authentication cookie.
+
+A token is ``v1.<payload>.<signature>``:
+
+- The payload is the URL-safe base64 of a small JSON object holding only
+  the claims the server needs: ``s`` (Google subject), ``e`` (email) and
+  ``x`` (expiry, Unix seconds).
+- The signature is the URL-safe base64 of an HMAC-SHA256 over the
+  ``v1.<payload>`` prefix, keyed with ``SESSION_SECRET_KEY``.
+
+A changed claim, a forged signature and an expired token are all rejected.
+Tokens that verified successfully are kept in a small in-process LRU cache,
+so a user's later requests cost one dictionary lookup and an expiry check.
+They skip both the HMAC and the JSON parsing.
+
+Every server process must use the same key (``session_secret``). It is
+``SESSION_SECRET_KEY`` when set, otherwise it is derived from the OAuth
+client secret. Only without either is a random key generated; sessions then
+end when the server restarts.
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from trend_spotter.metrics import CACHE_LOOKUPS
+
+_VERSION = "v1"
+_CACHE_HIT = CACHE_LOOKUPS.labels("session_tokens", "hit")
+_CACHE_MISS = CACHE_LOOKUPS.labels("session_tokens", "miss")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class SessionTokenSigner:
+    """Issues and verifies session tokens; caches verified ones."""
+
+    # Verification is in memory; see ``SessionStore.blocking``
+    blocking = False
+
+    def __init__(
+        self,
+        secret: str,
+        max_age: int = 24 * 3600,
+        cache_size: int = 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._key = secret.encode("utf-8")
+        self.max_age = max_age
+        self.cache_size = cache_size
+        self._clock = clock
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sign(self, message: str) -> str:
+        digest = hmac.new(self._key, message.encode("ascii"), hashlib.sha256)
+        return _b64encode(digest.digest())
+
+    def issue(self, user_info: dict) -> str:
+        """Create a token for a signed-in user (``sub`` and ``email``)."""
+        claims = {
+            "s": user_info.get("sub"),
+            "e": user_info.get("email"),
+            "x": int(self._clock()) + self.max_age,
+        }
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        message = f"{_VERSION}.{payload}"
+        return f"{message}.{self._sign(message)}"
+
+    def verify(self, token: str) -> Optional[dict]:
+        """
+        The user of a valid token, or None if it is malformed, tampered
+        with or expired.
+
+        Returns:
+            ``{"sub": ..., "email": ...}``; treat it as read-only, it is
+            shared between requests through the cache.
+        """
+        # Tokens are base64url; anything else (such as a forged cookie with
+        # non-ASCII characters) cannot be signed or compared, only rejected.
+        if not token.isascii():
+            return None
+        now = self._clock()
+        with self._lock:
+            cached = self._cache.get(token)
+            if cached is not None:
+                if cached["exp"] > now:
+                    self._cache.move_to_end(token)
+                    _CACHE_HIT.inc()
+                    return cached["user"]
+                del self._cache[token]
+                return None
+        _CACHE_MISS.inc()
+
+        message, _, signature = token.rpartition(".")
+        if not message.startswith(_VERSION + ".") or not hmac.compare_digest(
+            signature, self._sign(message)
+        ):
+            return None
+        try:
+            claims = json.loads(_b64decode(message[len(_VERSION) + 1 :]))
+            exp = float(claims["x"])
+            user = {"sub": claims["s"], "email": claims["e"]}
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            return None
+        if exp <= now:
+            return None
+
+        with self._lock:
+            self._cache[token] = {"user": user, "exp": exp}
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return user
+
+    def revoke(self, token: str) -> None:
+        """
+        Forget a cached token. The token itself stays valid until it
+        expires; use a server-side store (``session_store.py``) to revoke.
+        """
+        with self._lock:
+            self._cache.pop(token, None)
+
+
+def derive_key(secret: str, purpose: str) -> str:
+    """A key for one purpose, derived from ``secret`` with HMAC-SHA256."""
+    digest = hmac.new(secret.encode("utf-8"), purpose.encode("utf-8"), hashlib.sha256)
+    return _b64encode(digest.digest())
+
+
+_random_secret: Optional[str] = None
+_signer: Optional[SessionTokenSigner] = None
+_signer_lock = threading.Lock()
+
+
+def session_secret() -> str:
+    """
+    The key shared by every worker for signing session data.
+
+    ``SESSION_SECRET_KEY`` if set. Otherwise it is derived from
+    ``GOOGLE_OAUTH2_CLIENT_SECRET``, so all workers and instances agree
+    without extra configuration (rotating the client secret then signs
+    everyone out). Without either, a random key is generated once per
+    process; the pre-fork server (``prefork.py``) generates it before
+    forking, so its workers still share it.
+    """
+    global _random_secret
+    secret = os.getenv("SESSION_SECRET_KEY")
+    if secret:
+        return secret
+    client_secret = os.getenv("GOOGLE_OAUTH2_CLIENT_SECRET")
+    if client_secret:
+        return derive_key(client_secret, "trend-spotter-session")
+    with _signer_lock:
+        if _random_secret is None:
+            print(
+                "⚠️  SESSION_SECRET_KEY not set - sessions will not survive "
+                "a restart or work across instances"
+            )
+            _random_secret = secrets.token_urlsafe(32)
+        return _random_secret
+
+
+def get_signer() -> SessionTokenSigner:
+    """The process-wide signer, keyed with ``session_secret()``."""
+    global _signer
+    secret = session_secret()
+    with _signer_lock:
+        if _signer is None:
+            _signer = SessionTokenSigner(
+                secret,
+                max_age=int(os.getenv("SESSION_MAX_AGE", str(24 * 3600))),
+                cache_size=int(os.getenv("SESSION_TOKEN_CACHE_SIZE", "1024")),
+            )
+        return _signer
@@ -0,0 +1,793 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed ADK session and artifact services.
+
+Without ``SESSION_SERVICE_URI`` and ``ARTIFACT_SERVICE_URI`` the ADK keeps
+sessions and artifacts in memory on Cloud Run, so conversations vanish on
+every restart and each worker sees only its own. These services keep them
+in one SQLite file instead, shared by every worker on the host, without a
+managed database:
+
+- The database runs in WAL mode, so readers never wait for the writer, and
+  each service reuses a small pool of open connections. Queries run in
+  worker threads, off the event loop.
+- ``append_event`` only queues the event. Queued events are written in one
+  transaction when ``batch_size`` are waiting, ``flush_ms`` after the first,
+  or before any read of the sessions, so a run's burst of events costs one
+  commit instead of one each. A crash loses at most the last ``flush_ms``
+  of events; ``batch_size=1`` writes every event at once.
+- Sessions are keyed by (app, user, session) and events by session and
+  sequence number, so per-user listings and session loads (including
+  ``num_recent_events`` and ``after_timestamp``) are index lookups.
+
+Reads flush the reading process's own queue only: with ``--workers``,
+another worker's events appear once that worker flushes, ``flush_ms``
+later at most.
+
+Configure them with a ``localdb://`` URI; the path follows the scheme and
+both services may share a file:
+
+    SESSION_SERVICE_URI=localdb://.adk/adk.db
+    ARTIFACT_SERVICE_URI=localdb://.adk/adk.db
+    SESSION_SERVICE_URI=localdb:///var/lib/trend-spotter/adk.db?batch_size=1
+
+Query parameters: ``pool_size`` (default 4), ``batch_size`` (default 32)
+and ``flush_ms`` (default 50).
+"""
+
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+from google.adk.artifacts.base_artifact_service import (
+    ArtifactVersion,
+    BaseArtifactService,
+)
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.errors.input_validation_error import InputValidationError
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import (
+    BaseSessionService,
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.session import Session
+from google.adk.sessions.state import State
+from google.genai import types
+from pydantic_core import to_jsonable_python
+
+SCHEME = "localdb"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS adk_sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS adk_sessions_updated
+    ON adk_sessions (app_name, update_time);
+CREATE TABLE IF NOT EXISTS adk_events (
+    seq INTEGER PRIMARY KEY,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS adk_events_session
+    ON adk_events (app_name, user_id, session_id, seq);
+CREATE TABLE IF NOT EXISTS adk_app_state (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS adk_user_state (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS adk_artifacts (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    part TEXT NOT NULL,
+    mime_type TEXT,
+    custom_metadata TEXT NOT NULL,
+    create_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, scope, filename, version)
+) WITHOUT ROWID;
+"""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(to_jsonable_python(value, fallback=str))
+
+
+class SQLiteDatabase:
+    """A pool of WAL-mode connections to one SQLite file."""
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        self.pool_size = pool_size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Not pooled: connections must not be carried across the pre-fork
+        # server's fork, so each worker opens its own on first use
+        db = self._open()
+        try:
+            db.executescript(_SCHEMA)
+        finally:
+            db.close()
+
+    def _open(self) -> sqlite3.Connection:
+        db = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection, opening one while the pool has room."""
+        try:
+            db = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._opened < self.pool_size
+                if grow:
+                    self._opened += 1
+            db = self._open() if grow else self._idle.get()
+        try:
+            yield db
+        finally:
+            self._idle.put(db)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """A write transaction, taking the write lock up front."""
+        with self.connection() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    async def run(self, function: Callable, *args) -> Any:
+        """Call ``function(*args)`` in a worker thread."""
+        return await asyncio.to_thread(function, *args)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _split_state(state: Optional[Dict[str, Any]]) -> Tuple[dict, dict, dict]:
+    """App, user and session parts of a state delta; temp keys are dropped."""
+    app, user, session = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app[key[len(State.APP_PREFIX) :]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user[key[len(State.USER_PREFIX) :]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session[key] = value
+    return app, user, session
+
+
+def _merge_scoped_state(db, app_name: str, user_id: str, delta: Tuple[dict, dict]):
+    app_delta, user_delta = delta
+    if app_delta:
+        row = db.execute(
+            "SELECT state FROM adk_app_state WHERE app_name = ?", (app_name,)
+        ).fetchone()
+        state = dict(json.loads(row[0]) if row else {}, **app_delta)
+        db.execute(
+            "INSERT OR REPLACE INTO adk_app_state VALUES (?, ?)",
+            (app_name, _dumps(state)),
+        )
+    if user_delta:
+        row = db.execute(
+            "SELECT state FROM adk_user_state WHERE app_name = ? AND user_id = ?",
+            (app_name, user_id),
+        ).fetchone()
+        state = dict(json.loads(row[0]) if row else {}, **user_delta)
+        db.execute(
+            "INSERT OR REPLACE INTO adk_user_state VALUES (?, ?, ?)",
+            (app_name, user_id, _dumps(state)),
+        )
+
+
+def _scoped_state(db, app_name: str, user_id: str) -> Dict[str, Any]:
+    """App and user state, with their prefixes, for merging into a session."""
+    merged = {}
+    row = db.execute(
+        "SELECT state FROM adk_app_state WHERE app_name = ?", (app_name,)
+    ).fetchone()
+    for key, value in (json.loads(row[0]) if row else {}).items():
+        merged[State.APP_PREFIX + key] = value
+    row = db.execute(
+        "SELECT state FROM adk_user_state WHERE app_name = ? AND user_id = ?",
+        (app_name, user_id),
+    ).fetchone()
+    for key, value in (json.loads(row[0]) if row else {}).items():
+        merged[State.USER_PREFIX + key] = value
+    return merged
+
+
+class SQLiteSessionService(BaseSessionService):
+    """ADK session service storing sessions and events in SQLite."""
+
+    def __init__(
+        self,
+        path: str,
+        pool_size: int = 4,
+        batch_size: int = 32,
+        flush_ms: float = 50.0,
+    ):
+        self.db = SQLiteDatabase(path, pool_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_delay = flush_ms / 1000.0
+        # (app, user, session, timestamp, event JSON, scoped and session deltas)
+        self._pending: List[tuple] = []
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.flushes = 0
+
+    # -- writes -----------------------------------------------------------
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        await self.flush()
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        app_delta, user_delta, session_state = _split_state(state)
+        now = time.time()
+
+        def create():
+            with self.db.transaction() as db:
+                try:
+                    db.execute(
+                        "INSERT INTO adk_sessions VALUES (?, ?, ?, ?, ?)",
+                        (app_name, user_id, session_id, _dumps(session_state), now),
+                    )
+                except sqlite3.IntegrityError:
+                    raise AlreadyExistsError(
+                        f"Session with id {session_id} already exists."
+                    ) from None
+                _merge_scoped_state(db, app_name, user_id, (app_delta, user_delta))
+                return _scoped_state(db, app_name, user_id)
+
+        scoped = await self.db.run(create)
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state={**session_state, **scoped},
+            last_update_time=now,
+        )
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        app_delta, user_delta, session_delta = _split_state(
+            event.actions.state_delta if event.actions else None
+        )
+        self._pending.append(
+            (
+                session.app_name,
+                session.user_id,
+                session.id,
+                event.timestamp,
+                event.model_dump_json(exclude_none=True),
+                (app_delta, user_delta),
+                session_delta,
+            )
+        )
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(
+                self._flush_later()
+            )
+        return event
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        try:
+            await self.flush()
+        except Exception as e:  # the next read or append retries the batch
+            print(f"❌ Could not write session events: {e}")
+
+    def _write_batch(self, batch: List[tuple]) -> None:
+        with self.db.transaction() as db:
+            states: Dict[tuple, Optional[dict]] = {}
+            rows = []
+            for app, user, sid, timestamp, event_json, scoped, delta in batch:
+                key = (app, user, sid)
+                if key not in states:
+                    row = db.execute(
+                        "SELECT state FROM adk_sessions "
+                        "WHERE app_name = ? AND user_id = ? AND id = ?",
+                        key,
+                    ).fetchone()
+                    states[key] = json.loads(row[0]) if row else None
+                if states[key] is None:
+                    continue  # the session was deleted meanwhile
+                states[key].update(delta)
+                _merge_scoped_state(db, app, user, scoped)
+                rows.append((app, user, sid, timestamp, event_json))
+            db.executemany(
+                "INSERT INTO adk_events (app_name, user_id, session_id, "
+                "timestamp, event) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            last_update = {}
+            for app, user, sid, timestamp, _ in rows:
+                last_update[(app, user, sid)] = timestamp
+            db.executemany(
+                "UPDATE adk_sessions SET state = ?, update_time = ? "
+                "WHERE app_name = ? AND user_id = ? AND id = ?",
+                [
+                    (_dumps(states[key]), timestamp) + key
+                    for key, timestamp in last_update.items()
+                ],
+            )
+
+    async def flush(self) -> None:
+        """Write every queued event, in one transaction."""
+        self._flush_lock = self._flush_lock or asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                await self.db.run(self._write_batch, batch)
+            except BaseException:
+                self._pending[:0] = batch  # keep them for the next flush
+                raise
+            self.flushes += 1
+
+    async def replace_events(self, session: Session) -> None:
+        """Store ``session.events`` as the session's whole history."""
+        await self.flush()
+        key = (session.app_name, session.user_id, session.id)
+        rows = [
+            key + (event.timestamp, event.model_dump_json(exclude_none=True))
+            for event in session.events
+        ]
+
+        def replace():
+            with self.db.transaction() as db:
+                db.execute(
+                    "DELETE FROM adk_events "
+                    "WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                    key,
+                )
+                db.executemany(
+                    "INSERT INTO adk_events (app_name, user_id, session_id, "
+                    "timestamp, event) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+        await self.db.run(replace)
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        await self.flush()
+        key = (app_name, user_id, session_id.strip())
+
+        def delete():
+            with self.db.transaction() as db:
+                db.execute(
+                    "DELETE FROM adk_events "
+                    "WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                    key,
+                )
+                db.execute(
+                    "DELETE FROM adk_sessions "
+                    "WHERE app_name = ? AND user_id = ? AND id = ?",
+                    key,
+                )
+
+        await self.db.run(delete)
+
+    # -- reads ------------------------------------------------------------
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        await self.flush()
+        key = (app_name, user_id, session_id.strip())
+
+        def load():
+            with self.db.connection() as db:
+                row = db.execute(
+                    "SELECT state, update_time FROM adk_sessions "
+                    "WHERE app_name = ? AND user_id = ? AND id = ?",
+                    key,
+                ).fetchone()
+                if row is None:
+                    return None
+                query = (
+                    "SELECT event FROM adk_events "
+                    "WHERE app_name = ? AND user_id = ? AND session_id = ?"
+                )
+                params: list = list(key)
+                if config and config.after_timestamp is not None:
+                    query += " AND timestamp >= ?"
+                    params.append(config.after_timestamp)
+                if config and config.num_recent_events is not None:
+                    query += " ORDER BY seq DESC LIMIT ?"
+                    params.append(config.num_recent_events)
+                    events = db.execute(query, params).fetchall()[::-1]
+                else:
+                    events = db.execute(query + " ORDER BY seq", params).fetchall()
+                return row, events, _scoped_state(db, app_name, user_id)
+
+        loaded = await self.db.run(load)
+        if loaded is None:
+            return None
+        (state, update_time), events, scoped = loaded
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=key[2],
+            state={**json.loads(state), **scoped},
+            events=[Event.model_validate_json(event) for (event,) in events],
+            last_update_time=update_time,
+        )
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        await self.flush()
+
+        def list_rows():
+            with self.db.connection() as db:
+                query = (
+                    "SELECT user_id, id, state, update_time FROM adk_sessions "
+                    "WHERE app_name = ?"
+                )
+                params: list = [app_name]
+                if user_id is not None:
+                    query += " AND user_id = ?"
+                    params.append(user_id)
+                rows = db.execute(
+                    query + " ORDER BY update_time, user_id, id", params
+                ).fetchall()
+                scoped = {
+                    user: _scoped_state(db, app_name, user)
+                    for user in {row[0] for row in rows}
+                }
+                return rows, scoped
+
+        rows, scoped = await self.db.run(list_rows)
+        return ListSessionsResponse(
+            sessions=[
+                Session(
+                    app_name=app_name,
+                    user_id=user,
+                    id=sid,
+                    state={**json.loads(state), **scoped[user]},
+                    last_update_time=update_time,
+                )
+                for user, sid, state, update_time in rows
+            ]
+        )
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> Dict[str, Any]:
+        await self.flush()
+
+        def load():
+            with self.db.connection() as db:
+                return db.execute(
+                    "SELECT state FROM adk_user_state "
+                    "WHERE app_name = ? AND user_id = ?",
+                    (app_name, user_id),
+                ).fetchone()
+
+        row = await self.db.run(load)
+        return json.loads(row[0]) if row else {}
+
+    async def close(self) -> None:
+        await self.flush()
+        self.db.close()
+
+
+class SQLiteArtifactService(BaseArtifactService):
+    """
+    ADK artifact service storing every artifact version in SQLite.
+
+    Filenames starting with ``user:`` are shared by all of a user's
+    sessions; others belong to one session.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.db = SQLiteDatabase(path, pool_size)
+
+    @staticmethod
+    def _scope(filename: str, session_id: Optional[str]) -> str:
+        if filename.startswith("user:"):
+            return ""
+        if not session_id:
+            raise InputValidationError(
+                "Session ID must be provided for session-scoped artifacts."
+            )
+        return session_id
+
+    def _uri(self, app_name, user_id, scope, filename, version) -> str:
+        session = f"/sessions/{scope}" if scope else ""
+        return (
+            f"{SCHEME}://{self.db.path}/apps/{app_name}/users/{user_id}"
+            f"{session}/artifacts/{filename}/versions/{version}"
+        )
+
+    async def save_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        artifact: Union[types.Part, Dict[str, Any]],
+        session_id: Optional[str] = None,
+        custom_metadata: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        scope = self._scope(filename, session_id)
+        if isinstance(artifact, dict):
+            artifact = types.Part.model_validate(artifact)
+        if artifact.inline_data is not None:
+            mime_type = artifact.inline_data.mime_type
+        elif artifact.text is not None:
+            mime_type = "text/plain"
+        elif artifact.file_data is not None:
+            mime_type = artifact.file_data.mime_type
+        else:
+            raise InputValidationError("Not supported artifact type.")
+        part = artifact.model_dump_json(exclude_none=True)
+        key = (app_name, user_id, scope, filename)
+
+        def save():
+            with self.db.transaction() as db:
+                version = db.execute(
+                    "SELECT COALESCE(MAX(version) + 1, 0) FROM adk_artifacts "
+                    "WHERE app_name = ? AND user_id = ? AND scope = ? "
+                    "AND filename = ?",
+                    key,
+                ).fetchone()[0]
+                db.execute(
+                    "INSERT INTO adk_artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    key
+                    + (
+                        version,
+                        part,
+                        mime_type,
+                        _dumps(custom_metadata or {}),
+                        time.time(),
+                    ),
+                )
+                return version
+
+        return await self.db.run(save)
+
+    def _select(self, columns: str, key: tuple, version: Optional[int]):
+        query = (
+            f"SELECT {columns} FROM adk_artifacts WHERE app_name = ? "
+            "AND user_id = ? AND scope = ? AND filename = ?"
+        )
+        if version is None:
+            return query + " ORDER BY version DESC LIMIT 1", key
+        return query + " AND version = ?", key + (version,)
+
+    async def load_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: Optional[str] = None,
+        version: Optional[int] = None,
+    ) -> Optional[types.Part]:
+        key = (app_name, user_id, self._scope(filename, session_id), filename)
+        query, params = self._select("part", key, version)
+
+        def load():
+            with self.db.connection() as db:
+                return db.execute(query, params).fetchone()
+
+        row = await self.db.run(load)
+        if row is None:
+            return None
+        part = types.Part.model_validate_json(row[0])
+        return None if part == types.Part() else part
+
+    async def list_artifact_keys(
+        self, *, app_name: str, user_id: str, session_id: Optional[str] = None
+    ) -> List[str]:
+        def load():
+            with self.db.connection() as db:
+                return db.execute(
+                    "SELECT DISTINCT filename FROM adk_artifacts "
+                    "WHERE app_name = ? AND user_id = ? AND scope IN ('', ?) "
+                    "ORDER BY filename",
+                    (app_name, user_id, session_id or ""),
+                ).fetchall()
+
+        return [filename for (filename,) in await self.db.run(load)]
+
+    async def delete_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: Optional[str] = None,
+    ) -> None:
+        key = (app_name, user_id, self._scope(filename, session_id), filename)
+
+        def delete():
+            with self.db.transaction() as db:
+                db.execute(
+                    "DELETE FROM adk_artifacts WHERE app_name = ? AND user_id = ? "
+                    "AND scope = ? AND filename = ?",
+                    key,
+                )
+
+        await self.db.run(delete)
+
+    async def _versions(
+        self, key: tuple, version: Optional[int] = None, one: bool = False
+    ) -> List[ArtifactVersion]:
+        if one:
+            query, params = self._select(
+                "version, mime_type, custom_metadata, create_time", key, version
+            )
+        else:
+            query = (
+                "SELECT version, mime_type, custom_metadata, create_time "
+                "FROM adk_artifacts WHERE app_name = ? AND user_id = ? "
+                "AND scope = ? AND filename = ? ORDER BY version"
+            )
+            params = key
+
+        def load():
+            with self.db.connection() as db:
+                return db.execute(query, params).fetchall()
+
+        return [
+            ArtifactVersion(
+                version=number,
+                canonical_uri=self._uri(*key, number),
+                mime_type=mime_type,
+                custom_metadata=json.loads(metadata),
+                create_time=create_time,
+            )
+            for number, mime_type, metadata, create_time in await self.db.run(load)
+        ]
+
+    async def list_versions(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: Optional[str] = None,
+    ) -> List[int]:
+        key = (app_name, user_id, self._scope(filename, session_id), filename)
+        return [entry.version for entry in await self._versions(key)]
+
+    async def list_artifact_versions(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: Optional[str] = None,
+    ) -> List[ArtifactVersion]:
+        key = (app_name, user_id, self._scope(filename, session_id), filename)
+        return await self._versions(key)
+
+    async def get_artifact_version(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: Optional[str] = None,
+        version: Optional[int] = None,
+    ) -> Optional[ArtifactVersion]:
+        key = (app_name, user_id, self._scope(filename, session_id), filename)
+        found = await self._versions(key, version, one=True)
+        return found[0] if found else None
+
+    async def close(self) -> None:
+        self.db.close()
+
+
+def parse_uri(uri: str) -> Tuple[str, Dict[str, str]]:
+    """
+    The database path and options of a ``localdb://`` URI.
+
+    Raises:
+        ValueError: If the URI names no path.
+    """
+    parsed = urlparse(uri)
+    path = parsed.netloc + parsed.path
+    if not path:
+        raise ValueError(f"{SCHEME}:// URIs need a database path, got {uri!r}")
+    options = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+    return path, options
+
+
+_services: List[Union[SQLiteSessionService, SQLiteArtifactService]] = []
+
+
+def _session_factory(uri: str, **_) -> SQLiteSessionService:
+    path, options = parse_uri(uri)
+    service = SQLiteSessionService(
+        path,
+        pool_size=int(options.get("pool_size", 4)),
+        batch_size=int(options.get("batch_size", 32)),
+        flush_ms=float(options.get("flush_ms", 50)),
+    )
+    _services.append(service)
+    print(f"🗄️  ADK sessions in SQLite at {path}")
+    return service
+
+
+def _artifact_factory(uri: str, **_) -> SQLiteArtifactService:
+    path, options = parse_uri(uri)
+    service = SQLiteArtifactService(path, pool_size=int(options.get("pool_size", 4)))
+    _services.append(service)
+    print(f"🗄️  ADK artifacts in SQLite at {path}")
+    return service
+
+
+def register_services() -> None:
+    """Make ``localdb://`` URIs available to ``get_fast_api_app``."""
+    from google.adk.cli.service_registry import get_service_registry
+
+    registry = get_service_registry()
+    registry.register_session_service(SCHEME, _session_factory)
+    registry.register_artifact_service(SCHEME, _artifact_factory)
+
+
+async def close_services() -> None:
+    """Write queued events and close the services created from URIs."""
+    while _services:
+        await _services.pop().close()
@@ -2,12 +2,16 @@
 """
 Production Server Entrypoint
 
-This script automatically chooses between authenticated and non-authenticated
-ADK server based on available OAuth2 credentials.
+This script starts the ADK server in this process, with Google OAuth2
+authentication when credentials are available. The app is built directly
+instead of through ``adk web``, so a cold start pays for one interpreter
+and one import of the agents; the agents and the Reddit, SMTP and Google
+clients are then warmed in the background and ``/ready`` answers 200 once
+they are (see ``warmup.py``).
 """
 
+import argparse
 import os
-import subprocess
 import sys
 from pathlib import Path
 
@@ -21,34 +25,70 @@ except ImportError:
     pass  # dotenv not available in production
 
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    """The ``adk web`` style arguments: ``[agents_dir] --host --port``."""
+    parser = argparse.ArgumentParser(description="Start the Trend Spotter server")
+    parser.add_argument(
+        "agents_dir",
+        nargs="?",
+        default=".",
+        help="Directory containing agent configurations",
+    )
+    parser.add_argument("--host", default="0.0.0.0", help="Host to bind the server to")
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=int(os.getenv("PORT", "8080")),
+        help="Port to bind the server to (default: $PORT or 8080)",
+    )
+    parser.add_argument(
+        "--workers",
+        default=None,
+        help="Worker processes, or 'auto' for one per CPU "
+        "(default: $WEB_CONCURRENCY or 1)",
+    )
+    return parser.parse_args(argv)
+
+
+def start_plain_server(agents_dir: str, host: str, port: int):
+    """Serve the stock ADK app, for installs without the server modules."""
+    import uvicorn
+    from google.adk.cli.fast_api import get_fast_api_app
+
+    app = get_fast_api_app(agents_dir=agents_dir, web=True)
+    uvicorn.run(app, host=host, port=port, log_level="info")
+
+
+def main(argv=None):
     """
-    Start ADK server with or without authentication based on available credentials.
+    Start the ADK server with or without authentication based on available
+    credentials.
     """
-    # Check if OAuth2 credentials are available
-    client_id = os.getenv("GOOGLE_OAUTH2_CLIENT_ID")
-    client_secret = os.getenv("GOOGLE_OAUTH2_CLIENT_SECRET")
+    args = parse_args(argv)
 
-    if client_id and client_secret:
+    # Check if OAuth2 credentials are available
+    if os.getenv("GOOGLE_OAUTH2_CLIENT_ID") and os.getenv(
+        "GOOGLE_OAUTH2_CLIENT_SECRET"
+    ):
         print("🔐 OAuth2 credentials detected - starting authenticated server...")
-        try:
-            # Try to use authenticated server
-            from authenticated_server import start_authenticated_server
-
-            # Pass any command line arguments
-            start_authenticated_server(*sys.argv[1:])
-        except ImportError:
-            print(
-                "⚠️  Authenticated server not available, "
-                "falling back to standard ADK..."
-            )
-            # Fall back to standard ADK
-            subprocess.run(["adk", "web"] + sys.argv[1:])
     else:
-        print("🌐 No OAuth2 credentials found - starting standard ADK server...")
-        # Use standard ADK web server
-        subprocess.run(["adk", "web"] + sys.argv[1:])
+        print("🌐 No OAuth2 credentials found - starting server without login...")
+
+    try:
+        from authenticated_server import start_authenticated_server
+        from prefork import worker_count
+    except ImportError:
+        print("⚠️  Authenticated server not available, serving the standard ADK app...")
+        start_plain_server(args.agents_dir, args.host, args.port)
+        return
+
+    start_authenticated_server(
+        agents_dir=args.agents_dir,
+        host=args.host,
+        port=args.port,
+        workers=worker_count(args.workers),
+    )
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Unit tests for record/replay cassettes and the offline pipeline benchmark."""
+
+import pytest
+
+from trend_spotter.cassette import Cassette, CassetteMissError, tool_request_key
+
+
+@pytest.mark.unit
+def test_cassette_lookup_by_key_then_step(tmp_path):
+    """Exact keys win, then the conversation step; lookups do not consume."""
+    path = str(tmp_path / "run.jsonl")
+    recorder = Cassette(path)
+    recorder.append("model", "agent", "k1", 0.5, "first", step=0)
+    recorder.append("model", "agent", "k2", 0.7, "second", step=1)
+    recorder.append("tool", "search", "k3", 0.2, "posts")
+
+    cassette = Cassette(path).load()
+    assert cassette.find("model", "agent", "k2")["response"] == "second"
+    assert cassette.find("model", "agent", "changed", step=1)["response"] == "second"
+    assert cassette.find("model", "agent", "k2")["response"] == "second"
+    assert cassette.find("tool", "search", "other args")["response"] == "posts"
+    with pytest.raises(CassetteMissError):
+        cassette.find("model", "agent", "changed", step=5)
+
+
+@pytest.mark.unit
+def test_tool_request_key_is_order_independent():
+    """Tool keys do not depend on argument order."""
+    assert tool_request_key("t", {"a": 1, "b": 2}) == tool_request_key(
+        "t", {"b": 2, "a": 1}
+    )
+
+
+@pytest.mark.unit
+async def test_pipeline_replays_bundled_cassette():
+    """The full orchestrator runs offline from the bundled cassette."""
+    from tests.benchmarks.bench_pipeline import DEFAULT_CASSETTE, run_pipeline
+
+    result = await run_pipeline(DEFAULT_CASSETTE, latency_scale=0)
+
+    stages = result["stages"]
+    assert stages["model:TrendSpotterOrchestrator"]["count"] == 4
+    assert stages["tool:search_hot_reddit_posts"]["count"] == 1
+    assert stages["tool:send_email_report"]["count"] == 1
+    assert "agent:reddit_agent" in stages
+    assert result["final_response_chars"] > 0
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Unit tests for session history compaction."""
+
+from types import SimpleNamespace
+
+import pytest
+from google.adk.events.event import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from sqlite_services import SQLiteSessionService
+from trend_spotter.compaction import (
+    CompactionPolicy,
+    HistoryCompactionPlugin,
+    compact_events,
+)
+
+LISTING = "Title: A new open model tops the leaderboard\nLink: https://x\n" * 300
+
+
+def _turn(n):
+    """One orchestrator turn: a request, a sub-agent call and a report."""
+    call_id = f"call-{n}"
+    return [
+        Event(
+            author="user",
+            invocation_id=f"inv-{n}",
+            content=types.Content(
+                role="user", parts=[types.Part(text=f"Trends for week {n}?")]
+            ),
+        ),
+        Event(
+            author="TrendSpotterOrchestrator",
+            invocation_id=f"inv-{n}",
+            content=types.Content(
+                role="model",
+                parts=[
+                    types.Part(text="Let me think about this.", thought=True),
+                    types.Part(
+                        function_call=types.FunctionCall(
+                            id=call_id, name="reddit_agent", args={"request": "ml"}
+                        )
+                    ),
+                ],
+            ),
+        ),
+        Event(
+            author="TrendSpotterOrchestrator",
+            invocation_id=f"inv-{n}",
+            content=types.Content(
+                role="user",
+                parts=[
+                    types.Part(
+                        function_response=types.FunctionResponse(
+                            id=call_id,
+                            name="reddit_agent",
+                            response={"result": LISTING},
+                        )
+                    )
+                ],
+            ),
+        ),
+        Event(
+            author="TrendSpotterOrchestrator",
+            invocation_id=f"inv-{n}",
+            content=types.Content(
+                role="model", parts=[types.Part(text=f"# Report {n}\n" + "x" * 3000)]
+            ),
+        ),
+    ]
+
+
+def _conversation(turns):
+    return [event for n in range(turns) for event in _turn(n)]
+
+
+@pytest.mark.unit
+def test_old_tool_outputs_fold_and_recent_turns_stay_verbatim():
+    """Only turns before the last keep_turns are compacted; IDs survive."""
+    events = _conversation(5)
+    original = list(events)
+    policy = CompactionPolicy(keep_turns=2, max_tokens=10**6, max_bytes=10**8)
+
+    result = compact_events(events, policy)
+    assert result.events_after == result.events_before == 20
+    assert result.bytes_after < result.bytes_before / 2
+    assert events[12:] == original[12:]  # the last two turns, untouched
+
+    response = events[2].content.parts[0].function_response
+    assert (response.id, response.name) == ("call-0", "reddit_agent")
+    assert "more characters compacted" in response.response["result"]
+    assert len(response.response["result"]) < 500
+    assert events[1].content.parts[0].text == "[earlier reasoning compacted]"
+    assert events[1].content.parts[1].function_call.id == "call-0"
+    assert original[2].content.parts[0].function_response.response == {
+        "result": LISTING
+    }  # compaction copies events instead of editing them
+
+    again = compact_events(events, policy)
+    assert not again.changed
+
+
+@pytest.mark.unit
+def test_oldest_turns_are_dropped_to_fit_the_caps():
+    """Whole turns go, oldest first, until tokens and bytes are under the caps."""
+    events = _conversation(10)
+    policy = CompactionPolicy(keep_turns=2, max_tokens=8000, max_bytes=10**8)
+
+    result = compact_events(events, policy)
+    assert result.tokens_after <= 8000 < result.tokens_before
+    assert result.dropped_turns == 10 - result.events_after // 4
+    assert events[0].author == "user" and len(events) % 4 == 0
+    assert events[-1].content.parts[0].text.startswith("# Report 9")
+
+    tight = _conversation(3)
+    latest = tight[-4:]
+    compact_events(tight, CompactionPolicy(keep_turns=2, max_tokens=1, max_bytes=1))
+    assert len(tight) == 8  # kept turns are folded, never dropped
+    assert "compacted" in tight[2].content.parts[0].function_response.response["result"]
+    assert tight[-4:] == latest  # the current turn stays verbatim
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("backend", ["memory", "localdb"])
+async def test_plugin_stores_the_compacted_history(backend, tmp_path):
+    """The session service keeps the compacted events for the next run."""
+    if backend == "memory":
+        service = InMemorySessionService()
+    else:
+        service = SQLiteSessionService(str(tmp_path / "adk.db"))
+    session = await service.create_session(app_name="trend_spotter", user_id="u")
+    for event in _conversation(6):
+        await service.append_event(session, event)
+    session = await service.get_session(
+        app_name="trend_spotter", user_id="u", session_id=session.id
+    )
+
+    plugin = HistoryCompactionPlugin(
+        policy=CompactionPolicy(keep_turns=2, max_tokens=6000, max_bytes=10**8)
+    )
+    context = SimpleNamespace(session=session, session_service=service)
+    assert await plugin.before_run_callback(invocation_context=context) is None
+
+    stored = await service.get_session(
+        app_name="trend_spotter", user_id="u", session_id=session.id
+    )
+    assert [e.id for e in stored.events] == [e.id for e in session.events]
+    assert len(stored.events) < 24
+    assert stored.events[-1].content.parts[0].text.startswith("# Report 5")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Unit tests for the sub-agent / tool call policies."""
+
+import time
+
+import pytest
+
+from trend_spotter.resilience import (
+    CallGuard,
+    CallPolicy,
+    CallTimeoutError,
+    CircuitBreaker,
+    CircuitOpenError,
+    GuardedAgentTool,
+    guarded_tool,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+def test_circuit_breaker_opens_and_half_opens():
+    """The breaker opens after N failures and allows one trial after reset."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.now = 11
+    assert breaker.allow()  # single trial call
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.unit
+def test_guard_enforces_deadline():
+    """A slow synchronous call raises CallTimeoutError at its deadline."""
+    guard = CallGuard("slow", CallPolicy(timeout=0.05, hedge=False))
+
+    started = time.monotonic()
+    with pytest.raises(CallTimeoutError):
+        guard.call(time.sleep, 1)
+    assert time.monotonic() - started < 0.5
+
+
+@pytest.mark.unit
+def test_guard_hedges_slow_calls():
+    """Once p95 is known, a call slower than p95 gets a duplicate request."""
+    guard = CallGuard("hedged", CallPolicy(timeout=2, hedge_min_samples=3))
+    for _ in range(3):
+        guard.latencies.record(0.01)
+
+    calls = []
+
+    def flaky_latency():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            time.sleep(1)
+            return "slow"
+        return "fast"
+
+    assert guard.call(flaky_latency) == "fast"
+    assert len(calls) == 2
+
+
+@pytest.mark.unit
+def test_guarded_tool_degrades_after_failures(monkeypatch):
+    """Failures become readable tool results and eventually open the circuit."""
+    monkeypatch.setenv("TREND_SPOTTER_POLICY_TEST_SOURCE_FAILURE_THRESHOLD", "2")
+    attempts = []
+
+    @guarded_tool("test_source", error_message="Error searching: {error}")
+    def search(query: str) -> str:
+        """Search something."""
+        attempts.append(query)
+        raise RuntimeError("401 Unauthorized")
+
+    assert search("a") == "Error searching: 401 Unauthorized"
+    assert search("b") == "Error searching: 401 Unauthorized"
+    assert "temporarily disabled" in search("c")
+    assert attempts == ["a", "b"]
+    assert search.__doc__ == "Search something."
+
+
+@pytest.mark.unit
+async def test_guarded_agent_tool_returns_notice_when_open(monkeypatch):
+    """An open circuit short-circuits the sub-agent with a notice."""
+    from google.adk.agents import Agent
+
+    from trend_spotter import resilience
+
+    tool = GuardedAgentTool(agent=Agent(name="flaky_agent", model="gemini"))
+    guard = resilience.get_guard("flaky_agent")
+    monkeypatch.setattr(
+        guard, "breaker", CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    )
+    guard.breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        await guard.call_async(lambda: None)
+
+    result = await tool.run_async(args={"request": "hi"}, tool_context=None)
+    assert "flaky_agent is unavailable" in result
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Unit tests for the SQLite-backed ADK session and artifact services."""
+
+import asyncio
+
+import pytest
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.errors.input_validation_error import InputValidationError
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+
+from sqlite_services import (
+    SQLiteArtifactService,
+    SQLiteSessionService,
+    parse_uri,
+    register_services,
+)
+
+
+def _event(text, timestamp, state_delta=None):
+    return Event(
+        author="trend_spotter",
+        invocation_id="inv-1",
+        timestamp=timestamp,
+        content=types.Content(role="model", parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state_delta or {}),
+    )
+
+
+@pytest.mark.unit
+async def test_sessions_persist_with_batched_events(tmp_path):
+    """Events are written in one batch and survive a new service instance."""
+    path = str(tmp_path / "adk.db")
+    service = SQLiteSessionService(path, batch_size=100, flush_ms=10_000)
+    session = await service.create_session(
+        app_name="trend_spotter",
+        user_id="alice",
+        state={"topic": "ai", "user:lang": "en", "app:version": 2, "temp:x": 1},
+        session_id="s1",
+    )
+    assert session.state == {"topic": "ai", "user:lang": "en", "app:version": 2}
+    with pytest.raises(AlreadyExistsError):
+        await service.create_session(
+            app_name="trend_spotter", user_id="alice", session_id="s1"
+        )
+
+    for n in range(5):
+        delta = {"turns": n + 1, "temp:scratch": n}
+        if n == 4:
+            delta["user:lang"] = "de"
+        await service.append_event(session, _event(f"turn {n}", 1000.0 + n, delta))
+    assert session.state["temp:scratch"] == 4  # visible during the invocation
+    assert service.flushes == 0
+
+    reopened = SQLiteSessionService(path)
+    assert (
+        await reopened.get_session(
+            app_name="trend_spotter", user_id="alice", session_id="s1"
+        )
+        is not None
+    )
+    loaded = await service.get_session(
+        app_name="trend_spotter", user_id="alice", session_id="s1"
+    )
+    assert service.flushes == 1
+    assert [e.content.parts[0].text for e in loaded.events] == [
+        f"turn {n}" for n in range(5)
+    ]
+    assert loaded.state == {
+        "topic": "ai",
+        "turns": 5,
+        "user:lang": "de",
+        "app:version": 2,
+    }
+    assert loaded.last_update_time == 1004.0
+
+    recent = await reopened.get_session(
+        app_name="trend_spotter",
+        user_id="alice",
+        session_id="s1",
+        config=GetSessionConfig(num_recent_events=2, after_timestamp=1001.0),
+    )
+    assert [e.timestamp for e in recent.events] == [1003.0, 1004.0]
+
+    await service.create_session(app_name="trend_spotter", user_id="bob")
+    listed = await reopened.list_sessions(app_name="trend_spotter", user_id="alice")
+    assert [s.id for s in listed.sessions] == ["s1"]
+    assert listed.sessions[0].events == []
+    everyone = await reopened.list_sessions(app_name="trend_spotter")
+    assert [s.user_id for s in everyone.sessions] == ["alice", "bob"]
+    assert await reopened.get_user_state(app_name="trend_spotter", user_id="alice") == {
+        "lang": "de"
+    }
+
+    await reopened.delete_session(
+        app_name="trend_spotter", user_id="alice", session_id="s1"
+    )
+    assert (
+        await service.get_session(
+            app_name="trend_spotter", user_id="alice", session_id="s1"
+        )
+        is None
+    )
+    await service.close()
+    await reopened.close()
+
+
+@pytest.mark.unit
+async def test_events_are_flushed_by_size_and_by_timer(tmp_path):
+    """A full batch is written at once; a partial one after flush_ms."""
+    service = SQLiteSessionService(str(tmp_path / "adk.db"), batch_size=3, flush_ms=20)
+    session = await service.create_session(app_name="a", user_id="u")
+    for n in range(4):
+        await service.append_event(session, _event(str(n), 100.0 + n))
+    assert service.flushes == 1 and len(service._pending) == 1
+
+    await asyncio.sleep(0.1)
+    assert service.flushes == 2 and not service._pending
+    await service.close()
+
+
+@pytest.mark.unit
+async def test_artifact_versions_and_scopes(tmp_path):
+    """Versions count from 0; user: artifacts are shared across sessions."""
+    service = SQLiteArtifactService(str(tmp_path / "adk.db"))
+    report = types.Part.from_bytes(data=b"<h1>v0</h1>", mime_type="text/html")
+    keys = dict(app_name="trend_spotter", user_id="alice")
+
+    assert (
+        await service.save_artifact(
+            **keys, session_id="s1", filename="report.html", artifact=report
+        )
+        == 0
+    )
+    assert (
+        await service.save_artifact(
+            **keys,
+            session_id="s1",
+            filename="report.html",
+            artifact=types.Part(text="v1"),
+            custom_metadata={"week": 42},
+        )
+        == 1
+    )
+    await service.save_artifact(
+        **keys, filename="user:prefs", artifact=types.Part(text="weekly")
+    )
+    with pytest.raises(InputValidationError):
+        await service.save_artifact(**keys, filename="x", artifact=report)
+
+    first = await service.load_artifact(
+        **keys, session_id="s1", filename="report.html", version=0
+    )
+    assert first.inline_data.data == b"<h1>v0</h1>"
+    latest = await service.load_artifact(
+        **keys, session_id="s1", filename="report.html"
+    )
+    assert latest.text == "v1"
+    assert await service.list_artifact_keys(**keys, session_id="s1") == [
+        "report.html",
+        "user:prefs",
+    ]
+    assert await service.list_artifact_keys(**keys, session_id="s2") == ["user:prefs"]
+    assert await service.list_versions(
+        **keys, session_id="s1", filename="report.html"
+    ) == [0, 1]
+    version = await service.get_artifact_version(
+        **keys, session_id="s1", filename="report.html"
+    )
+    assert (version.version, version.mime_type) == (1, "text/plain")
+    assert version.custom_metadata == {"week": 42}
+
+    await service.delete_artifact(**keys, session_id="s1", filename="report.html")
+    assert (
+        await service.load_artifact(**keys, session_id="s1", filename="report.html")
+        is None
+    )
+    await service.close()
+
+
+@pytest.mark.unit
+def test_localdb_uris_resolve_through_the_adk_registry(tmp_path):
+    """get_fast_api_app builds the services from localdb:// URIs."""
+    from google.adk.cli.service_registry import get_service_registry
+
+    assert parse_uri("localdb://.adk/adk.db?batch_size=1") == (
+        ".adk/adk.db",
+        {"batch_size": "1"},
+    )
+    assert parse_uri("localdb:///var/adk.db")[0] == "/var/adk.db"
+    with pytest.raises(ValueError):
+        parse_uri("localdb://")
+
+    register_services()
+    uri = f"localdb://{tmp_path}/adk.db?batch_size=1"
+    sessions = get_service_registry().create_session_service(uri, agents_dir=".")
+    artifacts = get_service_registry().create_artifact_service(uri)
+    assert isinstance(sessions, SQLiteSessionService) and sessions.batch_size == 1
+    assert isinstance(artifacts, SQLiteArtifactService)
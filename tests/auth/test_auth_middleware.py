@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Unit tests for the pure-ASGI Google OAuth2 middleware."""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from auth_middleware import (
+    SESSION_COOKIE_NAME,
+    GoogleOAuth2Middleware,
+    compile_path_prefixes,
+    encode_session_cookie,
+)
+from trend_spotter.request_context import current_user_email
+
+USER = {"email": "alice@example.com", "sub": "1234"}
+
+
+@pytest.fixture(autouse=True)
+def session_secret(monkeypatch):
+    import session_tokens
+
+    monkeypatch.setenv("SESSION_SECRET_KEY", "middleware-test-secret")
+    monkeypatch.setattr(session_tokens, "_signer", None)
+
+
+def _app(release=None):
+    app = FastAPI()
+
+    @app.get("/whoami")
+    async def whoami(request: Request):
+        return {"state": request.state.user["email"], "context": current_user_email()}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            yield "data: first\n\n"
+            await release.wait()
+            yield f"data: {current_user_email()}\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    app.add_middleware(
+        GoogleOAuth2Middleware,
+        client_id="client",
+        client_secret="secret",
+        redirect_uri="http://t/auth/callback",
+    )
+    return app
+
+
+def _client(app, user=USER):
+    cookies = {SESSION_COOKIE_NAME: encode_session_cookie(user)} if user else None
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://t", cookies=cookies
+    )
+
+
+@pytest.mark.unit
+def test_public_prefixes_compile_to_one_match():
+    public = compile_path_prefixes({"/docs", "/doc", "/health"})
+    assert public.match("/docs/oauth2-redirect")
+    assert public.match("/healthz")
+    assert not public.match("/apps/trend_spotter")
+
+
+@pytest.mark.unit
+async def test_authenticated_request_sees_user_in_state_and_context():
+    async with _client(_app()) as client:
+        response = await client.get("/whoami")
+    assert response.json() == {"state": USER["email"], "context": USER["email"]}
+
+
+@pytest.mark.unit
+async def test_anonymous_and_tampered_requests_are_redirected():
+    async with _client(_app(), user=None) as client:
+        assert (await client.get("/health")).json() == {"status": "ok"}
+        response = await client.get("/apps/trend spotter")
+        assert response.status_code == 302
+        assert response.headers["location"] == "/auth/login?next=/apps/trend%20spotter"
+
+        client.cookies.set(SESSION_COOKIE_NAME, encode_session_cookie(USER) + "x")
+        assert (await client.get("/whoami")).status_code == 302
+
+
+@pytest.mark.unit
+async def test_non_ascii_cookie_is_redirected_not_an_error():
+    """A forged Latin-1 cookie gets the sign-in redirect, not a 500."""
+    forged = encode_session_cookie(USER)[:-1] + "é"
+    async with _client(_app(), user=None) as client:
+        response = await client.get(
+            "/whoami",
+            headers={"cookie": f"{SESSION_COOKIE_NAME}={forged}".encode("latin-1")},
+        )
+    assert response.status_code == 302
+    assert response.headers["location"] == "/auth/login?next=/whoami"
+
+
+@pytest.mark.unit
+async def test_auth_routes_are_handled_by_the_middleware():
+    async with _client(_app()) as client:
+        logout = await client.get("/auth/logout")
+        assert logout.status_code == 302
+        assert f'{SESSION_COOKIE_NAME}=""' in logout.headers["set-cookie"]
+
+        callback = await client.get("/auth/callback")
+        assert callback.status_code == 401
+
+
+@pytest.mark.unit
+async def test_sse_chunks_stream_through_unbuffered():
+    """The first event reaches the server before the stream finishes."""
+    release = asyncio.Event()
+    cookie = f"{SESSION_COOKIE_NAME}={encode_session_cookie(USER)}"
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/events",
+        "raw_path": b"/events",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"t"), (b"cookie", cookie.encode())],
+        "server": ("t", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+    bodies = []
+
+    async def receive():
+        await asyncio.Event().wait()  # no request body, never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            bodies.append(message["body"])
+            release.set()  # only reached if the first chunk was not held back
+
+    await asyncio.wait_for(_app(release)(scope, receive, send), timeout=5)
+
+    assert bodies == [b"data: first\n\n", f"data: {USER['email']}\n\n".encode()]
+
+
+@pytest.mark.unit
+async def test_server_wiring_sets_the_user_context_inside_the_app(monkeypatch):
+    """Through create_app's middleware stack, endpoints see the signed-in user."""
+    from pathlib import Path
+
+    from authenticated_server import create_app
+
+    monkeypatch.setenv("GOOGLE_OAUTH2_CLIENT_ID", "client")
+    monkeypatch.setenv("GOOGLE_OAUTH2_CLIENT_SECRET", "secret")
+    monkeypatch.setenv("WARMUP_ENABLED", "false")
+    app = create_app(str(Path(__file__).parent.parent.parent), web=False)
+
+    @app.get("/context")
+    async def context(request: Request):
+        return {"state": request.state.user["email"], "context": current_user_email()}
+
+    @app.get("/context-sync")
+    def context_sync():
+        return {"context": current_user_email()}
+
+    async with _client(app) as client:
+        assert (await client.get("/context")).json() == {
+            "state": USER["email"],
+            "context": USER["email"],
+        }
+        assert (await client.get("/context-sync")).json() == {"context": USER["email"]}
+    assert current_user_email() is None
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Unit tests for the cached, non-blocking Google ID token verifier."""
+
+import datetime
+import json
+import time
+
+import httpx
+import pytest
+
+pytest.importorskip("cryptography")
+
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+from google.auth import crypt, jwt  # noqa: E402
+
+from google_token_verifier import (  # noqa: E402
+    GOOGLE_CERTS_URL,
+    GOOGLE_DISCOVERY_URL,
+    GoogleIDTokenVerifier,
+    OIDCDiscovery,
+    cache_lifetime,
+)
+
+CLIENT_ID = "client-123.apps.googleusercontent.com"
+
+
+def _key_pair(kid):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(1)
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    signer = crypt.RSASigner.from_string(private_pem, key_id=kid)
+    return signer, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return {kid: _key_pair(kid) for kid in ("k1", "k2")}
+
+
+def _token(signer, **overrides):
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "1234",
+        "email": "alice@example.com",
+        "email_verified": True,
+        "iat": now,
+        "exp": now + 600,
+    }
+    claims.update(overrides)
+    return jwt.encode(signer, claims).decode()
+
+
+class CertServer:
+    """httpx transport serving the cert and discovery endpoints."""
+
+    def __init__(self, certs):
+        self.certs = certs
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(str(request.url))
+        if str(request.url) == GOOGLE_CERTS_URL:
+            return httpx.Response(
+                200,
+                json=self.certs,
+                headers={"Cache-Control": "public, max-age=100", "Age": "10"},
+            )
+        return httpx.Response(
+            200,
+            json={"token_endpoint": "https://oauth2.example/token"},
+            headers={"Cache-Control": "public, max-age=3600"},
+        )
+
+
+@pytest.mark.unit
+def test_cache_lifetime_honours_cache_control():
+    assert cache_lifetime({"cache-control": "public, max-age=300", "age": "20"}) == 280
+    assert cache_lifetime({"cache-control": "no-store"}) == 0
+    assert cache_lifetime({}, default=42) == 42
+
+
+@pytest.mark.unit
+async def test_certs_are_fetched_once_and_reused_until_expiry(keys):
+    server = CertServer({"k1": keys["k1"][1]})
+    now = [1000.0]
+    verifier = GoogleIDTokenVerifier(
+        CLIENT_ID,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(server)),
+        clock=lambda: now[0],
+    )
+    token = _token(keys["k1"][0])
+
+    for _ in range(5):
+        claims = await verifier.verify(token)
+    assert claims["email"] == "alice@example.com"
+    assert verifier.fetches == 1
+
+    now[0] += 90  # max-age 100 minus Age 10
+    await verifier.verify(token)
+    assert verifier.fetches == 2
+
+
+@pytest.mark.unit
+async def test_unknown_key_id_refreshes_certs(keys):
+    """A rotated key triggers an early refresh, at most every 30 seconds."""
+    server = CertServer({"k1": keys["k1"][1]})
+    now = [1000.0]
+    verifier = GoogleIDTokenVerifier(
+        CLIENT_ID,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(server)),
+        clock=lambda: now[0],
+    )
+    await verifier.verify(_token(keys["k1"][0]))
+
+    rotated = _token(keys["k2"][0])
+    now[0] += 30
+    with pytest.raises(ValueError):
+        await verifier.verify(rotated)  # not published yet; one refresh
+    server.certs = {"k1": keys["k1"][1], "k2": keys["k2"][1]}
+    with pytest.raises(ValueError):
+        await verifier.verify(rotated)  # refresh is rate limited
+    assert verifier.fetches == 2
+
+    now[0] += 30
+    claims = await verifier.verify(rotated)
+    assert claims["sub"] == "1234"
+    assert verifier.fetches == 3
+
+
+@pytest.mark.unit
+async def test_invalid_tokens_are_rejected(keys):
+    server = CertServer({"k1": keys["k1"][1]})
+    verifier = GoogleIDTokenVerifier(
+        CLIENT_ID, http_client=httpx.AsyncClient(transport=httpx.MockTransport(server))
+    )
+    signer = keys["k1"][0]
+
+    with pytest.raises(ValueError):
+        await verifier.verify(_token(signer, aud="someone-else"))
+    with pytest.raises(ValueError):
+        await verifier.verify(_token(signer, iss="https://evil.example"))
+    with pytest.raises(ValueError):
+        await verifier.verify(_token(signer, exp=int(time.time()) - 3600))
+
+
+@pytest.mark.unit
+async def test_discovery_is_cached_on_disk(tmp_path):
+    server = CertServer({})
+    cache_path = str(tmp_path / "oidc.json")
+
+    def discovery():
+        return OIDCDiscovery(
+            cache_path=cache_path,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(server)),
+        )
+
+    first = discovery()
+    assert await first.endpoint("token_endpoint", "x") == "https://oauth2.example/token"
+    # A restarted server reads the document from disk instead of fetching it.
+    second = discovery()
+    assert (
+        await second.endpoint("token_endpoint", "x") == "https://oauth2.example/token"
+    )
+    assert await second.endpoint("missing_endpoint", "fallback") == "fallback"
+
+    assert server.requests == [GOOGLE_DISCOVERY_URL]
+    assert json.load(open(cache_path))["url"] == GOOGLE_DISCOVERY_URL
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""Unit tests for the app-lifetime shared HTTP client."""
+
+import pytest
+
+import http_pool
+
+
+@pytest.mark.unit
+async def test_lifespan_opens_one_client_and_closes_it(monkeypatch):
+    """Every caller gets the same pooled client until shutdown closes it."""
+    monkeypatch.setenv("HTTP_POOL_MAX_KEEPALIVE", "7")
+    monkeypatch.setenv("HTTP_CONNECT_TIMEOUT", "2.5")
+
+    async with http_pool.http_client_lifespan():
+        client = http_pool.get_http_client()
+        assert http_pool.get_http_client() is client
+        assert client.timeout.connect == 2.5
+        assert client._transport._pool._max_keepalive_connections == 7
+
+    assert client.is_closed
+    replacement = http_pool.get_http_client()
+    assert replacement is not client
+    await http_pool.close_http_client()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Unit tests for per-request user context propagation."""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from trend_spotter.request_context import current_user_email, request_scope
+from trend_spotter.resilience import CallGuard, CallPolicy
+from user_context_middleware import add_user_context_middleware
+
+
+@pytest.mark.unit
+async def test_concurrent_tasks_keep_their_own_user():
+    """Interleaved requests on one event loop never see each other's user."""
+
+    async def handle(email):
+        with request_scope(user_email=email):
+            await asyncio.sleep(0.01)
+            return current_user_email()
+
+    emails = [f"user{n}@example.com" for n in range(20)]
+    assert await asyncio.gather(*(handle(email) for email in emails)) == emails
+    assert current_user_email() is None
+
+
+@pytest.mark.unit
+def test_context_follows_tools_onto_guard_threads():
+    """Guarded tools run on worker threads but see the caller's user."""
+    guard = CallGuard("context-test", CallPolicy(timeout=5, hedge=False))
+
+    with request_scope(user_email="alice@example.com"):
+        assert guard.call(current_user_email) == "alice@example.com"
+    assert guard.call(current_user_email) is None
+
+
+class _FakeAuth(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        user = request.headers.get("x-test-user")
+        if user:
+            request.state.user = {"email": user}
+        return await call_next(request)
+
+
+@pytest.mark.unit
+async def test_middleware_scopes_user_per_request():
+    """Each concurrent request sees its own user; anonymous ones see none."""
+    app = FastAPI()
+
+    @app.get("/whoami")
+    async def whoami():
+        await asyncio.sleep(0.01)
+        # Sync tools reach the user from a worker thread as well.
+        from_thread = await asyncio.to_thread(current_user_email)
+        return {"email": current_user_email(), "thread": from_thread}
+
+    add_user_context_middleware(app)
+    app.add_middleware(_FakeAuth)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        users = [f"user{n}@example.com" for n in range(10)] + [None] * 5
+        responses = await asyncio.gather(
+            *(
+                client.get("/whoami", headers={"x-test-user": user} if user else {})
+                for user in users
+            )
+        )
+
+    assert [r.json() for r in responses] == [
+        {"email": user, "thread": user} for user in users
+    ]
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Unit tests for the server-side session store backends."""
+
+import threading
+
+import httpx
+import pytest
+
+from session_store import (
+    MemorySessionStore,
+    SessionStore,
+    SQLiteSessionStore,
+    get_session_store,
+    reset_session_store,
+)
+
+ALICE = {"sub": "1", "email": "alice@example.com", "name": "Alice"}
+BOB = {"sub": "2", "email": "bob@example.com"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, clock):
+    if request.param == "memory":
+        return MemorySessionStore(max_sessions=100, ttl=600, clock=clock)
+    return SQLiteSessionStore(
+        str(tmp_path / "sessions.db"),
+        max_sessions=100,
+        ttl=600,
+        touch_interval=60,
+        clock=clock,
+    )
+
+
+@pytest.mark.unit
+def test_cookie_is_opaque_and_user_stays_server_side(store):
+    session_id = store.issue(ALICE)
+
+    assert "alice" not in session_id and len(session_id) == 43
+    assert store.verify(session_id) == {"sub": "1", "email": "alice@example.com"}
+    assert store.verify("forged-" + session_id) is None
+
+
+@pytest.mark.unit
+def test_revoke_one_session_or_all_of_a_user(store):
+    first, second, bob = store.issue(ALICE), store.issue(ALICE), store.issue(BOB)
+
+    store.revoke(first)
+    assert store.verify(first) is None
+    assert store.count() == 2
+
+    assert store.revoke_user("alice@example.com") == 1
+    assert store.verify(second) is None
+    assert store.verify(bob) is not None
+
+
+@pytest.mark.unit
+def test_sliding_expiry_and_sweep(store, clock):
+    active, idle = store.issue(ALICE), store.issue(BOB)
+
+    clock.now += 500
+    assert store.verify(active) is not None  # pushes its expiry forward
+    clock.now += 200
+    assert store.verify(idle) is None
+    assert store.verify(active) is not None
+
+    clock.now += 600
+    assert store.sweep() >= 1
+    assert store.count() == 0
+
+
+@pytest.mark.unit
+def test_per_session_data(store):
+    session_id = store.issue(ALICE)
+
+    assert store.update_data(session_id, theme="dark")
+    assert store.update_data(session_id, reports=3)
+    assert store.get_data(session_id) == {"theme": "dark", "reports": 3}
+    store.revoke(session_id)
+    assert not store.update_data(session_id, theme="light")
+    assert store.get_data(session_id) is None
+
+
+@pytest.mark.unit
+def test_memory_store_evicts_least_recently_used(clock):
+    store = MemorySessionStore(max_sessions=3, ttl=600, clock=clock)
+    sessions = [store.issue(dict(ALICE, sub=str(n))) for n in range(3)]
+    store.verify(sessions[0])
+
+    store.issue(BOB)
+
+    assert store.verify(sessions[1]) is None
+    assert store.verify(sessions[0]) is not None
+    assert store.count() == 3
+
+
+@pytest.mark.unit
+def test_sqlite_sweep_trims_to_max_sessions(tmp_path, clock):
+    store = SQLiteSessionStore(
+        str(tmp_path / "sessions.db"), max_sessions=2, ttl=600, clock=clock
+    )
+    oldest = store.issue(ALICE)
+    clock.now += 1
+    store.issue(BOB)
+    store.issue(BOB)
+
+    assert store.sweep() == 1
+    assert store.verify(oldest) is None
+
+
+@pytest.mark.unit
+async def test_middleware_uses_store_and_logout_revokes(monkeypatch, tmp_path):
+    from fastapi import FastAPI, Request
+
+    from auth_middleware import (
+        SESSION_COOKIE_NAME,
+        GoogleOAuth2Middleware,
+        encode_session_cookie,
+    )
+
+    monkeypatch.setenv("SESSION_STORE", "sqlite")
+    monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "sessions.db"))
+    reset_session_store()
+    app = FastAPI()
+
+    @app.get("/whoami")
+    async def whoami(request: Request):
+        return request.state.user
+
+    app.add_middleware(
+        GoogleOAuth2Middleware,
+        client_id="client",
+        client_secret="secret",
+        redirect_uri="http://t/auth/callback",
+    )
+    try:
+        session_id = encode_session_cookie(ALICE)
+        store = get_session_store()
+        threads = []
+        for name in ("verify", "revoke"):
+            method = getattr(store, name)
+
+            def record(*args, method=method):
+                threads.append(threading.current_thread())
+                return method(*args)
+
+            monkeypatch.setattr(store, name, record)
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://t",
+            cookies={SESSION_COOKIE_NAME: session_id},
+        ) as client:
+            assert (await client.get("/whoami")).json()["email"] == ALICE["email"]
+            await client.get("/auth/logout")
+            client.cookies.set(SESSION_COOKIE_NAME, session_id)
+            assert (await client.get("/whoami")).status_code == 302
+        assert get_session_store().count() == 0
+        # SQLite calls may wait on a lock; they never run on the event loop
+        assert len(threads) == 3  # verify, revoke, verify
+        assert threading.main_thread() not in threads
+    finally:
+        reset_session_store()
+
+
+@pytest.mark.unit
+def test_session_store_is_abstract():
+    """A backend must implement the whole interface to be instantiated."""
+
+    class Partial(SessionStore):
+        def verify(self, session_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+    assert SQLiteSessionStore.blocking and not MemorySessionStore.blocking
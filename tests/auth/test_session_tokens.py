@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Unit tests for signed session tokens and the verified-token cache."""
+
+import json
+
+import pytest
+
+from session_tokens import SessionTokenSigner, _b64decode, _b64encode
+
+USER = {
+    "email": "alice@example.com",
+    "name": "Alice Example",
+    "picture": "https://lh3.googleusercontent.com/a/" + "x" * 80,
+    "sub": "108234567890123456789",
+    "verified_email": True,
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_750_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def signer(clock):
+    return SessionTokenSigner("test-secret", max_age=3600, cache_size=2, clock=clock)
+
+
+@pytest.mark.unit
+def test_round_trip_keeps_minimal_claims(signer):
+    """Tokens carry only sub and email and are smaller than the old cookie."""
+    token = signer.issue(USER)
+
+    assert signer.verify(token) == {"sub": USER["sub"], "email": USER["email"]}
+    assert len(token) < len(json.dumps(USER))
+
+
+@pytest.mark.unit
+def test_tampered_tokens_are_rejected(signer, clock):
+    version, payload, signature = signer.issue(USER).split(".")
+    claims = json.loads(_b64decode(payload))
+    claims["e"] = "mallory@example.com"
+    forged = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+
+    assert signer.verify(f"{version}.{forged}.{signature}") is None
+    assert signer.verify(f"{version}.{payload}.{signature[:-2]}AA") is None
+    assert signer.verify(f"{version}.{payload}") is None
+    assert signer.verify("not a token") is None
+    other = SessionTokenSigner("other-secret", clock=clock)
+    assert signer.verify(other.issue(USER)) is None
+
+
+@pytest.mark.unit
+def test_non_ascii_tokens_are_rejected(signer):
+    """Forged cookies with non-ASCII characters are invalid, not errors."""
+    version, payload, signature = signer.issue(USER).split(".")
+
+    assert signer.verify(f"{version}.{payload}.{signature[:-1]}é") is None
+    assert signer.verify(f"{version}.{payload}é.{signature}") is None
+    assert signer.verify("v1.☃.☃") is None
+
+
+@pytest.mark.unit
+def test_expired_tokens_are_rejected_even_when_cached(signer, clock):
+    token = signer.issue(USER)
+    assert signer.verify(token) is not None
+
+    clock.now += 3600
+    assert signer.verify(token) is None
+    assert signer.verify(token) is None
+
+
+@pytest.mark.unit
+def test_cached_tokens_skip_verification(signer, monkeypatch):
+    """Hot tokens are answered from the LRU; the cache stays bounded."""
+    tokens = [signer.issue(dict(USER, sub=str(n))) for n in range(3)]
+    for token in tokens[:2]:
+        signer.verify(token)
+
+    calls = []
+    original = signer._sign
+    monkeypatch.setattr(signer, "_sign", lambda m: calls.append(m) or original(m))
+    assert signer.verify(tokens[0])["sub"] == "0"
+    assert calls == []
+
+    signer.verify(tokens[2])  # evicts tokens[1], the least recently used
+    assert len(calls) == 1
+    signer.verify(tokens[0])
+    signer.verify(tokens[1])
+    assert len(calls) == 2
+
+
+@pytest.mark.unit
+def test_session_secret_is_shared_without_configuration(monkeypatch):
+    """Workers agree on a key derived from the OAuth client secret."""
+    import session_tokens
+
+    monkeypatch.delenv("SESSION_SECRET_KEY", raising=False)
+    monkeypatch.setenv("GOOGLE_OAUTH2_CLIENT_SECRET", "client-secret")
+    derived = session_tokens.session_secret()
+    assert derived == session_tokens.session_secret()
+    assert derived != "client-secret"
+    assert session_tokens.derive_key(derived, "a") != session_tokens.derive_key(
+        derived, "b"
+    )
+
+    monkeypatch.setenv("SESSION_SECRET_KEY", "explicit")
+    assert session_tokens.session_secret() == "explicit"
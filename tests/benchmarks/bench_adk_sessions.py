@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the ADK session services: in memory vs SQLite.
+
+Simulates ``--users`` users with ``--sessions`` sessions each. Every
+session receives ``--events`` events of about 2 KB (an agent turn with a
+state delta), appended the way a run appends them. It then measures
+session loads and per-user listings. Backends:
+
+- ``memory``: the ADK's ``InMemorySessionService`` (no persistence);
+- ``adk-sqlite``: the ADK's ``SqliteSessionService`` (a connection and a
+  commit per call);
+- ``localdb``: ``sqlite_services.SQLiteSessionService`` with batched appends;
+- ``localdb-sync``: the same with ``batch_size=1`` (a commit per event).
+
+Usage:
+    python -m tests.benchmarks.bench_adk_sessions
+    python -m tests.benchmarks.bench_adk_sessions --users 20 --events 50 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from google.adk.events.event import Event  # noqa: E402
+from google.adk.events.event_actions import EventActions  # noqa: E402
+from google.adk.sessions import InMemorySessionService  # noqa: E402
+from google.adk.sessions.base_session_service import GetSessionConfig  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from sqlite_services import SQLiteSessionService  # noqa: E402
+
+BACKENDS = ("memory", "adk-sqlite", "localdb", "localdb-sync")
+TURN_TEXT = "## r/MachineLearning\n- Title: New open model tops leaderboard\n" * 30
+
+
+def make_service(name: str, directory: str):
+    path = os.path.join(directory, f"{name}.db")
+    if name == "memory":
+        return InMemorySessionService()
+    if name == "adk-sqlite":
+        from google.adk.sessions.sqlite_session_service import SqliteSessionService
+
+        return SqliteSessionService(db_path=path)
+    return SQLiteSessionService(path, batch_size=1 if name == "localdb-sync" else 32)
+
+
+def make_event(n: int) -> Event:
+    return Event(
+        author="trend_spotter",
+        invocation_id=f"inv-{n // 4}",
+        content=types.Content(role="model", parts=[types.Part(text=TURN_TEXT)]),
+        actions=EventActions(state_delta={"turns": n, "last_subreddit": "ml"}),
+    )
+
+
+async def bench_backend(name: str, args, directory: str) -> dict:
+    service = make_service(name, directory)
+    sessions = []
+    started = time.perf_counter()
+    for user in range(args.users):
+        for _ in range(args.sessions):
+            sessions.append(
+                await service.create_session(
+                    app_name="trend_spotter", user_id=f"user{user}", state={"n": 0}
+                )
+            )
+    create_ms = (time.perf_counter() - started) / len(sessions) * 1000
+
+    appended = 0
+    started = time.perf_counter()
+    # Sessions run concurrently, as they do on a busy server
+    for n in range(args.events):
+        for session in sessions:
+            await service.append_event(session, make_event(n))
+            appended += 1
+    await service.flush()
+    append_us = (time.perf_counter() - started) / appended * 1e6
+
+    sample = random.Random(7).choices(sessions, k=args.lookups)
+    started = time.perf_counter()
+    for session in sample:
+        loaded = await service.get_session(
+            app_name="trend_spotter", user_id=session.user_id, session_id=session.id
+        )
+        assert len(loaded.events) == args.events
+    get_ms = (time.perf_counter() - started) / len(sample) * 1000
+
+    started = time.perf_counter()
+    for session in sample:
+        await service.get_session(
+            app_name="trend_spotter",
+            user_id=session.user_id,
+            session_id=session.id,
+            config=GetSessionConfig(num_recent_events=5),
+        )
+    recent_ms = (time.perf_counter() - started) / len(sample) * 1000
+
+    started = time.perf_counter()
+    for user in range(args.users):
+        listed = await service.list_sessions(
+            app_name="trend_spotter", user_id=f"user{user}"
+        )
+        assert len(listed.sessions) == args.sessions
+    list_ms = (time.perf_counter() - started) / args.users * 1000
+
+    if hasattr(service, "close"):
+        await service.close()
+    path = os.path.join(directory, f"{name}.db")
+    return {
+        "backend": name,
+        "sessions": len(sessions),
+        "events": appended,
+        "create_ms": create_ms,
+        "append_us": append_us,
+        "get_ms": get_ms,
+        "get_recent_ms": recent_ms,
+        "list_ms": list_ms,
+        "db_mb": os.path.getsize(path) / 1e6 if os.path.exists(path) else 0.0,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--sessions", type=int, default=5, help="Per user")
+    parser.add_argument("--events", type=int, default=20, help="Per session")
+    parser.add_argument("--lookups", type=int, default=100)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = [
+            asyncio.run(bench_backend(name, args, directory))
+            for name in args.backends.split(",")
+        ]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print(
+        f"\n🗄️  ADK sessions ({rows[0]['sessions']} sessions, "
+        f"{rows[0]['events']} events)"
+    )
+    print(
+        f"   {'backend':14}{'create ms':>10}{'append µs':>11}{'get ms':>8}"
+        f"{'recent ms':>11}{'list ms':>9}{'db MB':>8}"
+    )
+    for row in rows:
+        print(
+            f"   {row['backend']:14}{row['create_ms']:>10.2f}"
+            f"{row['append_us']:>11.0f}{row['get_ms']:>8.2f}"
+            f"{row['get_recent_ms']:>11.2f}{row['list_ms']:>9.2f}"
+            f"{row['db_mb']:>8.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark for session history compaction.
+
+Grows a conversation of ``--turns`` orchestrator turns (a request, a
+sub-agent call, a ``--tool-kb`` tool output and a report). Before each turn
+it records what the model request would carry (estimated tokens) and what
+the session stores (bytes), with and without ``HistoryCompactionPlugin``'s
+compaction, plus how long compaction takes. It also times a
+``get_session`` of the final history from the ``localdb://`` service,
+which is what the next run loads.
+
+Usage:
+    python -m tests.benchmarks.bench_compaction
+    python -m tests.benchmarks.bench_compaction --turns 40 --tool-kb 32 --json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from google.adk.events.event import Event  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from sqlite_services import SQLiteSessionService  # noqa: E402
+from trend_spotter.compaction import (  # noqa: E402
+    CompactionPolicy,
+    compact_events,
+    store_events,
+)
+
+LINE = "- Title: A new open model tops the leaderboard (512 upvotes)\n"
+# Measures a history without changing it
+UNBOUNDED = CompactionPolicy(keep_turns=sys.maxsize)
+
+
+def make_turn(n: int, tool_kb: int) -> list:
+    listing = LINE * (tool_kb * 1024 // len(LINE))
+    call = types.FunctionCall(id=f"call-{n}", name="reddit_agent", args={"q": "ml"})
+    response = types.FunctionResponse(
+        id=f"call-{n}", name="reddit_agent", response={"result": listing}
+    )
+    contents = [
+        types.Content(role="user", parts=[types.Part(text=f"Trends for week {n}?")]),
+        types.Content(role="model", parts=[types.Part(function_call=call)]),
+        types.Content(role="user", parts=[types.Part(function_response=response)]),
+        types.Content(role="model", parts=[types.Part(text="# Report\n" + "x" * 4000)]),
+    ]
+    return [
+        Event(
+            author="user" if index == 0 else "TrendSpotterOrchestrator",
+            invocation_id=f"inv-{n}",
+            content=content,
+        )
+        for index, content in enumerate(contents)
+    ]
+
+
+async def run(args, policy) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        service = SQLiteSessionService(f"{directory}/adk.db")
+        session = await service.create_session(app_name="trend_spotter", user_id="u")
+        compact_ms, tokens, sizes = [], [], []
+        for turn in range(args.turns):
+            request, *reply = make_turn(turn, args.tool_kb)
+            await service.append_event(session, request)
+            if policy is not None:
+                started = time.perf_counter()
+                result = compact_events(session.events, policy)
+                if result.changed:
+                    await store_events(service, session)
+                compact_ms.append((time.perf_counter() - started) * 1000)
+            else:
+                result = compact_events(session.events, UNBOUNDED)
+            tokens.append(result.tokens_after)
+            sizes.append(result.bytes_after)
+            for event in reply:
+                await service.append_event(session, event)
+
+        started = time.perf_counter()
+        await service.get_session(
+            app_name="trend_spotter", user_id="u", session_id=session.id
+        )
+        get_ms = (time.perf_counter() - started) * 1000
+        await service.close()
+    return {
+        "mode": "compacted" if policy is not None else "full",
+        "turns": args.turns,
+        "last_tokens": tokens[-1],
+        "mean_tokens": statistics.mean(tokens),
+        "last_kb": sizes[-1] / 1024,
+        "compact_ms": statistics.mean(compact_ms) if compact_ms else 0.0,
+        "compact_max_ms": max(compact_ms) if compact_ms else 0.0,
+        "get_session_ms": get_ms,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--tool-kb", type=int, default=16, help="Tool output size")
+    parser.add_argument("--keep-turns", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=32_000)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    policy = CompactionPolicy(keep_turns=args.keep_turns, max_tokens=args.max_tokens)
+    rows = [asyncio.run(run(args, None)), asyncio.run(run(args, policy))]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print(
+        f"\n🗜️  History compaction ({args.turns} turns, {args.tool_kb} KB tool "
+        f"outputs, keep {args.keep_turns})"
+    )
+    print(
+        f"   {'mode':11}{'last tokens':>12}{'mean tokens':>12}{'last KB':>9}"
+        f"{'compact ms':>11}{'max ms':>8}{'get ms':>8}"
+    )
+    for row in rows:
+        print(
+            f"   {row['mode']:11}{row['last_tokens']:>12,}"
+            f"{row['mean_tokens']:>12,.0f}{row['last_kb']:>9.1f}"
+            f"{row['compact_ms']:>11.2f}{row['compact_max_ms']:>8.2f}"
+            f"{row['get_session_ms']:>8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for rendering report emails.
+
+Compares building the MIME message per recipient (one ``MIMEMultipart``
+and ``as_string()`` each, as before) against rendering once with
+``PreparedMessage``, for different report sizes and recipient counts. The
+HTML template render is timed separately. No network I/O is involved.
+
+Usage:
+    python -m tests.benchmarks.bench_email_render
+    python -m tests.benchmarks.bench_email_render --sizes 10,200 \\
+        --recipients 1,100,500 --json
+"""
+
+import argparse
+import json
+import sys
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from trend_spotter.delivery import PreparedMessage  # noqa: E402
+from trend_spotter.sub_agents.email_agent import _format_report_as_html  # noqa: E402
+
+SENDER = "reports@example.com"
+SUBJECT = "AI Agent Trends Report - June 10, 2025 - June 17, 2025"
+
+_TREND = """{n}. **Trend {n} for agent developers**: Multi-agent orchestration \
+keeps gaining traction across frameworks. **(Source: https://example.com/t{n})**
+   * **Developer Impact**: Simplifies building agents that coordinate tools.
+   * **Prioritization Rationale**: Discussed widely on Reddit this week.
+
+"""
+
+
+def sample_report(size_kb: int) -> str:
+    """A report in the orchestrator's format of roughly ``size_kb`` KiB."""
+    parts = ["**🔥 Top 5 Trends for Agent Developers**\n\n"]
+    length = len(parts[0])
+    n = 1
+    while length < size_kb * 1024:
+        parts.append(_TREND.format(n=n))
+        length += len(parts[-1])
+        n += 1
+    return "".join(parts)
+
+
+def per_recipient(html_body: str, recipients: List[str]) -> int:
+    total = 0
+    for recipient in recipients:
+        msg = MIMEMultipart()
+        msg["From"] = SENDER
+        msg["To"] = recipient
+        msg["Subject"] = SUBJECT
+        msg.attach(MIMEText(html_body, "html"))
+        total += len(msg.as_string())
+    return total
+
+
+def render_once(html_body: str, recipients: List[str]) -> int:
+    msg = MIMEMultipart()
+    msg["From"] = SENDER
+    msg["Subject"] = SUBJECT
+    msg.attach(MIMEText(html_body, "html"))
+    message = PreparedMessage(msg)
+    return sum(len(message.for_recipient(recipient)) for recipient in recipients)
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run_benchmark(sizes: List[int], recipient_counts: List[int], repeat: int):
+    rows = []
+    for size_kb in sizes:
+        report = sample_report(size_kb)
+        template_s = best_of(
+            lambda: _format_report_as_html(report, "June 10 - 17, 2025"), repeat
+        )
+        html_body = _format_report_as_html(report, "June 10 - 17, 2025")
+        for count in recipient_counts:
+            recipients = [f"listener{n}@example.com" for n in range(count)]
+            before = best_of(lambda: per_recipient(html_body, recipients), repeat)
+            after = best_of(lambda: render_once(html_body, recipients), repeat)
+            rows.append(
+                {
+                    "report_kb": size_kb,
+                    "recipients": count,
+                    "template_ms": template_s * 1000,
+                    "per_recipient_ms": before * 1000,
+                    "render_once_ms": after * 1000,
+                    "speedup": before / after if after else None,
+                }
+            )
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=[10, 100, 500],
+        help="Report sizes in KiB",
+    )
+    parser.add_argument(
+        "--recipients",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=[1, 50, 500],
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    rows = run_benchmark(args.sizes, args.recipients, args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print("\n⏱️  Email rendering (best of %d)" % args.repeat)
+    print(
+        f"   {'report':>8}{'rcpts':>7}{'template ms':>13}"
+        f"{'per-rcpt ms':>13}{'once ms':>10}{'speedup':>9}"
+    )
+    for row in rows:
+        print(
+            f"   {row['report_kb']:>6}KB{row['recipients']:>7}"
+            f"{row['template_ms']:>13.2f}{row['per_recipient_ms']:>13.1f}"
+            f"{row['render_once_ms']:>10.1f}{row['speedup']:>8.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
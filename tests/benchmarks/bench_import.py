@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Cold import-time benchmark for the trend_spotter package.
+
+Each module is imported in a fresh interpreter, so the numbers match a
+Cloud Run cold start or a new test worker. Interpreter startup is not
+counted. A module fails its budget when it is too slow or when it loads a
+module it must defer (for example ``praw`` or ``smtplib`` before the first
+tool call).
+
+Usage:
+    python -m tests.benchmarks.bench_import
+    python -m tests.benchmarks.bench_import --runs 10 --json
+
+Budgets scale with ``TREND_SPOTTER_IMPORT_BUDGET_SCALE`` (default 1.0) for
+slow machines.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).parent.parent.parent
+
+# module -> (budget in ms, modules that must not be loaded by the import)
+IMPORT_BUDGETS: Dict[str, tuple] = {
+    "trend_spotter": (50.0, ["google.adk", "praw", "smtplib"]),
+    "trend_spotter.agent": (2500.0, ["praw", "smtplib"]),
+}
+
+_PROBE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module({module!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{"elapsed": elapsed, "loaded": sorted(
+    name for name in {forbidden!r} if name in sys.modules)}}))
+"""
+
+
+def measure_import(module: str, forbidden: List[str], runs: int = 3) -> dict:
+    """Import ``module`` in ``runs`` fresh interpreters; return the median."""
+    samples = []
+    loaded = set()
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, forbidden=forbidden)],
+            cwd=str(ROOT),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        probe = json.loads(completed.stdout.strip().splitlines()[-1])
+        samples.append(probe["elapsed"] * 1000)
+        loaded.update(probe["loaded"])
+    return {
+        "module": module,
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "loaded_forbidden": sorted(loaded),
+    }
+
+
+def check_budgets(runs: int = 3, modules: Optional[List[str]] = None) -> List[dict]:
+    """Measure every budgeted module and flag the ones over budget."""
+    scale = float(os.getenv("TREND_SPOTTER_IMPORT_BUDGET_SCALE", "1.0"))
+    results = []
+    for module in modules or IMPORT_BUDGETS:
+        budget, forbidden = IMPORT_BUDGETS[module]
+        result = measure_import(module, forbidden, runs)
+        result["budget_ms"] = budget * scale
+        result["ok"] = (
+            result["median_ms"] <= result["budget_ms"]
+            and not result["loaded_forbidden"]
+        )
+        results.append(result)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    results = check_budgets(args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"\n⏱️  Cold import times (median of {args.runs})")
+        print(f"   {'module':<28}{'median ms':>11}{'budget ms':>11}")
+        for result in results:
+            status = "✅" if result["ok"] else "❌"
+            print(
+                f"{status} {result['module']:<28}{result['median_ms']:>11.1f}"
+                f"{result['budget_ms']:>11.1f}"
+            )
+            if result["loaded_forbidden"]:
+                print(f"   ⚠️  Loaded eagerly: {', '.join(result['loaded_forbidden'])}")
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the report markdown-to-HTML converter.
+
+Renders synthetic reports in the ``prompt.py`` format, several megabytes
+in size, with the single-pass renderer (``trend_spotter.report_html``). It
+reports throughput and how the time scales with input size, which should
+stay close to linear. The previous replace/regex converter is timed
+alongside for comparison.
+
+Usage:
+    python -m tests.benchmarks.bench_markdown
+    python -m tests.benchmarks.bench_markdown --sizes 1,4,16 --json
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from tests.benchmarks.bench_email_render import sample_report  # noqa: E402
+from trend_spotter.report_html import render_report_html  # noqa: E402
+
+
+def legacy_convert(markdown_content: str) -> str:
+    """The converter used before the single-pass renderer (for reference)."""
+    html_content = markdown_content.replace("\n", "<br>\n")
+    for section in (
+        "🔥 Top 5 Trends for Agent Developers",
+        "🚀 Top 5 Releases for Agent Developers",
+        "🤔 Top 5 Questions from Agent Developers",
+    ):
+        html_content = html_content.replace(
+            f"**{section}**", f'<h2 class="emoji">{section}</h2>'
+        )
+    return re.sub(r"\*\*(.*?)\*\*", r"<strong>\1</strong>", html_content)
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run_benchmark(sizes_mb: List[int], repeat: int) -> List[dict]:
+    rows = []
+    for size_mb in sizes_mb:
+        report = sample_report(size_mb * 1024)
+        size = len(report.encode("utf-8"))
+        seconds = best_of(lambda: render_report_html(report), repeat)
+        legacy = best_of(lambda: legacy_convert(report), repeat)
+        rows.append(
+            {
+                "input_mb": size / 1024 / 1024,
+                "render_ms": seconds * 1000,
+                "mb_per_s": size / 1024 / 1024 / seconds,
+                "output_ratio": len(render_report_html(report)) / len(report),
+                "legacy_ms": legacy * 1000,
+                "legacy_output_ratio": len(legacy_convert(report)) / len(report),
+            }
+        )
+    base = rows[0]
+    for row in rows:
+        # Time per MB relative to the smallest input; ~1.0 means linear.
+        row["scaling"] = (row["render_ms"] / row["input_mb"]) / (
+            base["render_ms"] / base["input_mb"]
+        )
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=[1, 4, 16],
+        help="Report sizes in MiB",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    rows = run_benchmark(args.sizes, args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print(f"\n⏱️  Markdown to HTML (best of {args.repeat})")
+    print(
+        f"   {'input MB':>9}{'render ms':>11}{'MB/s':>8}{'scaling':>9}"
+        f"{'out/in':>8}{'legacy ms':>11}{'out/in':>8}"
+    )
+    for row in rows:
+        print(
+            f"   {row['input_mb']:>9.1f}{row['render_ms']:>11.1f}"
+            f"{row['mb_per_s']:>8.1f}{row['scaling']:>9.2f}"
+            f"{row['output_ratio']:>8.2f}{row['legacy_ms']:>11.1f}"
+            f"{row['legacy_output_ratio']:>8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
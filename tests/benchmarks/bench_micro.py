@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark suite for the project's hot paths, with stored baselines.
+
+The other ``bench_*.py`` scripts compare designs for one subsystem. This
+suite times the hot paths as they are today, so a change that slows one of
+them down is caught by ``compare``:
+
+- ``reddit.search*``: ``search_hot_reddit_posts`` (with its guard) against
+  a fake praw client, for 3 subreddits x 5 posts and 10 x 100;
+- ``email.markdown*`` and ``email.format_html*``: ``_convert_markdown_to_html``
+  and ``_format_report_as_html`` on a 10 KB report and a 2 MB one;
+- ``email.mime_build``: the MIME message ``_deliver_report`` encodes;
+- ``email.send*``: ``_deliver_report`` to a local SMTP sink on warm pooled
+  sessions, for 1 and 50 recipients;
+- ``middleware.*``: one request through ``GoogleOAuth2Middleware`` (signed
+  in, public path, redirect to login) and ``UserContextMiddleware``, over
+  ASGI with a bare inner app.
+
+Each benchmark is timed like ``timeit``: the loop count is calibrated to
+samples of at least 0.2 s, and the best of ``--repeat`` samples is reported
+per operation. ``save`` stores the results as the baseline; ``compare``
+runs the suite again and exits with 1 if a benchmark is slower than its
+baseline by more than ``--threshold`` on two measurements in a row. The
+baseline also records a fixed pure-Python calibration loop, and
+``compare`` scales the baseline times by how fast that loop runs now, so a
+baseline saved on one machine still applies on a CI runner
+(``--no-normalize`` compares raw times).
+
+Usage:
+    python -m tests.benchmarks.bench_micro run
+    python -m tests.benchmarks.bench_micro run --filter email. --json
+    python -m tests.benchmarks.bench_micro save
+    python -m tests.benchmarks.bench_micro compare --threshold 0.25
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import timeit
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+os.environ.setdefault("SESSION_SECRET_KEY", "bench-secret")
+# A hedged duplicate would need a real praw client
+os.environ.setdefault("TREND_SPOTTER_POLICY_REDDIT_HEDGE", "false")
+
+from tests.benchmarks.bench_email_render import (  # noqa: E402
+    SENDER,
+    SUBJECT,
+    sample_report,
+)
+from tests.benchmarks.bench_middleware import scope_for  # noqa: E402
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "bench_micro.json"
+DATE_RANGE = "June 10 - 17, 2025"
+
+
+@dataclass
+class Benchmark:
+    """A named hot path; ``setup`` yields the function to time."""
+
+    name: str
+    setup: Callable[[], ContextManager[Callable[[], object]]]
+    batch: int = 1  # operations per call of the timed function
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, batch: int = 1):
+    """Register a generator that sets up, yields the timed function, cleans up."""
+
+    def decorator(func):
+        BENCHMARKS[name] = Benchmark(name, contextmanager(func), batch)
+        return func
+
+    return decorator
+
+
+# Reddit
+
+
+class FakeSubmission:
+    def __init__(self, subreddit: str, n: int):
+        self.title = f"r/{subreddit}: open model #{n} tops the agent leaderboard"
+        self.url = f"https://www.reddit.com/r/{subreddit}/comments/{n:06x}/"
+        self.score = 3 + n * 7 % 400
+
+
+class FakeReddit:
+    """The slice of ``praw.Reddit`` the search tool uses."""
+
+    def __init__(self, posts_per_subreddit: int):
+        self.posts = posts_per_subreddit
+        self._listings: Dict[str, List[FakeSubmission]] = {}
+
+    def subreddit(self, name: str) -> "FakeReddit":
+        self._current = self._listings.setdefault(
+            name, [FakeSubmission(name, n) for n in range(self.posts)]
+        )
+        return self
+
+    def hot(self, limit: int) -> Iterator[FakeSubmission]:
+        return iter(self._current[:limit])
+
+
+def _search(subreddits: int, posts: int):
+    from trend_spotter import tools
+
+    names = [f"Subreddit{n}" for n in range(subreddits)]
+    saved = list(tools._idle_reddit_clients)
+    tools._idle_reddit_clients[:] = [FakeReddit(posts) for _ in range(4)]
+    try:
+        yield lambda: tools.search_hot_reddit_posts(names, posts)
+    finally:
+        tools._idle_reddit_clients[:] = saved
+
+
+@benchmark("reddit.search")
+def bench_reddit_search():
+    yield from _search(3, 5)
+
+
+@benchmark("reddit.search_large")
+def bench_reddit_search_large():
+    yield from _search(10, 100)
+
+
+# Email rendering
+
+HUGE_REPORT_KB = 2048
+# One line of unclosed link syntax, as a report quoting user text may hold;
+# it is quadratic for a renderer that rescans the line from every ``[``
+PATHOLOGICAL_LINE = "[" * 100_000 + "[x](https://" * 10_000 + "\n"
+
+
+@benchmark("email.markdown")
+def bench_markdown():
+    from trend_spotter.sub_agents.email_agent import _convert_markdown_to_html
+
+    report = sample_report(10)
+    yield lambda: _convert_markdown_to_html(report)
+
+
+@benchmark("email.markdown_huge")
+def bench_markdown_huge():
+    from trend_spotter.sub_agents.email_agent import _convert_markdown_to_html
+
+    report = sample_report(HUGE_REPORT_KB) + PATHOLOGICAL_LINE
+    yield lambda: _convert_markdown_to_html(report)
+
+
+@benchmark("email.format_html")
+def bench_format_html():
+    from trend_spotter.sub_agents.email_agent import _format_report_as_html
+
+    report = sample_report(10)
+    yield lambda: _format_report_as_html(report, DATE_RANGE)
+
+
+@benchmark("email.format_html_huge")
+def bench_format_html_huge():
+    from trend_spotter.sub_agents.email_agent import _format_report_as_html
+
+    report = sample_report(HUGE_REPORT_KB)
+    yield lambda: _format_report_as_html(report, DATE_RANGE)
+
+
+@benchmark("email.mime_build")
+def bench_mime_build():
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    from trend_spotter.delivery import PreparedMessage
+    from trend_spotter.sub_agents.email_agent import _format_report_as_html
+
+    html_body = _format_report_as_html(sample_report(10), DATE_RANGE)
+
+    def build() -> bytes:
+        msg = MIMEMultipart()
+        msg["From"] = SENDER
+        msg["Subject"] = SUBJECT
+        msg.attach(MIMEText(html_body, "html"))
+        return PreparedMessage(msg).for_recipient("listener@example.com")
+
+    yield build
+
+
+def _send(recipient_count: int):
+    from tests.email.smtp_sink import SMTPSink
+    from trend_spotter.smtp_pool import close_pools
+    from trend_spotter.sub_agents.email_agent import (
+        _deliver_report,
+        _format_report_as_html,
+    )
+
+    html_body = _format_report_as_html(sample_report(10), DATE_RANGE)
+    recipients = [f"listener{n}@example.com" for n in range(recipient_count)]
+    with SMTPSink() as sink, _patched_env(SMTP_STARTTLS="false"):
+        args = ("127.0.0.1", sink.port, SENDER, "app-password", SUBJECT, html_body)
+        try:
+            yield lambda: _deliver_report(*args, recipients)
+        finally:
+            close_pools()
+
+
+@benchmark("email.send")
+def bench_send():
+    yield from _send(1)
+
+
+@benchmark("email.send_50")
+def bench_send_50():
+    yield from _send(50)
+
+
+# Middleware dispatch
+
+MIDDLEWARE_BATCH = 200
+
+
+async def _bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def _dispatch(app, path: str, cookie: str = ""):
+    loop = asyncio.new_event_loop()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def batch():
+        for _ in range(MIDDLEWARE_BATCH):
+            await app(scope_for(path, cookie), receive, send)
+
+    try:
+        yield lambda: loop.run_until_complete(batch())
+    finally:
+        loop.close()
+
+
+def _auth_app():
+    from auth_middleware import GoogleOAuth2Middleware
+
+    return GoogleOAuth2Middleware(
+        _bare_app,
+        client_id="bench",
+        client_secret="bench",
+        redirect_uri="http://localhost/auth/callback",
+    )
+
+
+def _session_cookie() -> str:
+    from auth_middleware import SESSION_COOKIE_NAME, encode_session_cookie
+
+    user = {"sub": "1", "email": "listener@example.com", "name": "Listener"}
+    return f"{SESSION_COOKIE_NAME}={encode_session_cookie(user)}"
+
+
+@benchmark("middleware.auth_signed_in", batch=MIDDLEWARE_BATCH)
+def bench_auth_signed_in():
+    yield from _dispatch(_auth_app(), "/list-apps", _session_cookie())
+
+
+@benchmark("middleware.auth_public", batch=MIDDLEWARE_BATCH)
+def bench_auth_public():
+    yield from _dispatch(_auth_app(), "/health")
+
+
+@benchmark("middleware.auth_redirect", batch=MIDDLEWARE_BATCH)
+def bench_auth_redirect():
+    yield from _dispatch(_auth_app(), "/list-apps")
+
+
+@benchmark("middleware.user_context", batch=MIDDLEWARE_BATCH)
+def bench_user_context():
+    from user_context_middleware import UserContextMiddleware
+
+    app = UserContextMiddleware(_bare_app)
+
+    async def with_user(scope, receive, send):
+        scope["state"] = {"user": {"email": "listener@example.com"}}
+        await app(scope, receive, send)
+
+    yield from _dispatch(with_user, "/list-apps")
+
+
+# Harness
+
+
+@contextmanager
+def _patched_env(**values: str):
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def calibrate(repeat: int = 5) -> float:
+    """Microseconds for a fixed pure-Python loop; a proxy for machine speed."""
+
+    def work():
+        table = {}
+        for n in range(2_000):
+            table[str(n)] = n * n
+        return "".join(sorted(table)[:100])
+
+    return min(timeit.repeat(work, number=20, repeat=repeat)) / 20 * 1e6
+
+
+def measure(bench: Benchmark, repeat: int) -> dict:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with bench.setup() as func:
+            func()  # warm up caches, pools and connections
+            timer = timeit.Timer(func)
+            loops, _ = timer.autorange()
+            samples = timer.repeat(repeat=repeat, number=loops)
+    per_op = sorted(sample / loops / bench.batch * 1e6 for sample in samples)
+    return {
+        "name": bench.name,
+        "best_us": per_op[0],
+        "median_us": per_op[len(per_op) // 2],
+        "operations": loops * bench.batch,
+    }
+
+
+def run_suite(repeat: int = 5, pattern: str = "") -> dict:
+    results = [
+        measure(bench, repeat) for name, bench in BENCHMARKS.items() if pattern in name
+    ]
+    return {
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "calibration_us": calibrate(),
+        "results": {result["name"]: result for result in results},
+    }
+
+
+def compare(
+    current: dict, baseline: dict, threshold: float, normalize: bool = True
+) -> List[dict]:
+    """
+    Compare a run with a baseline.
+
+    Returns:
+        One row per benchmark in the current run, with ``ratio`` (current
+        over baseline, after scaling) and ``regressed``.
+    """
+    scale = 1.0
+    if normalize and baseline.get("calibration_us"):
+        scale = current["calibration_us"] / baseline["calibration_us"]
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        expected = before["best_us"] * scale if before else None
+        ratio = result["best_us"] / expected if expected else None
+        rows.append(
+            {
+                "name": name,
+                "baseline_us": expected,
+                "current_us": result["best_us"],
+                "ratio": ratio,
+                "regressed": ratio is not None and ratio > 1 + threshold,
+            }
+        )
+    return rows
+
+
+def _format_us(value: Optional[float]) -> str:
+    if value is None:
+        return "new"
+    if value >= 1000:
+        return f"{value / 1000:.2f} ms"
+    return f"{value:.1f} µs"
+
+
+def print_results(run: dict) -> None:
+    print(f"\n⏱️  Microbenchmarks (Python {run['python']}, {run['machine']})")
+    print(f"   {'benchmark':28}{'best':>12}{'median':>12}{'ops':>9}")
+    for result in run["results"].values():
+        print(
+            f"   {result['name']:28}{_format_us(result['best_us']):>12}"
+            f"{_format_us(result['median_us']):>12}{result['operations']:>9}"
+        )
+
+
+def print_comparison(rows: List[dict], threshold: float, scale: float) -> None:
+    print(
+        f"\n📊 Against the baseline (machine speed factor {scale:.2f}, "
+        f"regression threshold +{threshold:.0%})"
+    )
+    print(f"   {'benchmark':28}{'baseline':>12}{'current':>12}{'change':>9}")
+    for row in rows:
+        change = f"{row['ratio'] - 1:+.0%}" if row["ratio"] is not None else ""
+        flag = "  ❌ regression" if row["regressed"] else ""
+        print(
+            f"   {row['name']:28}{_format_us(row['baseline_us']):>12}"
+            f"{_format_us(row['current_us']):>12}{change:>9}{flag}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=("run", "save", "compare"))
+    parser.add_argument("--filter", default="", help="Only names containing this")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown before compare fails (0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--no-normalize",
+        action="store_true",
+        help="Compare raw times, without the calibration loop's speed factor",
+    )
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.repeat, args.filter)
+
+    if args.command == "save":
+        saved = {"results": {}}
+        if args.filter and args.baseline.exists():
+            saved = json.loads(args.baseline.read_text())
+        saved.update({k: v for k, v in current.items() if k != "results"})
+        saved["results"].update(current["results"])
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(saved, indent=2) + "\n")
+
+    if args.command != "compare":
+        if args.json:
+            print(json.dumps(current, indent=2))
+        else:
+            print_results(current)
+            if args.command == "save":
+                print(f"\n💾 Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    rows = compare(current, baseline, args.threshold, not args.no_normalize)
+    # Timing noise rarely repeats: measure a flagged benchmark once more and
+    # keep its better time before calling it a regression
+    for row in rows:
+        if row["regressed"]:
+            retry = measure(BENCHMARKS[row["name"]], args.repeat)
+            best = current["results"][row["name"]]
+            best["best_us"] = min(best["best_us"], retry["best_us"])
+    rows = compare(current, baseline, args.threshold, not args.no_normalize)
+    regressed = [row["name"] for row in rows if row["regressed"]]
+    if args.json:
+        print(json.dumps({"rows": rows, "regressed": regressed}, indent=2))
+    else:
+        scale = 1.0
+        if not args.no_normalize and baseline.get("calibration_us"):
+            scale = current["calibration_us"] / baseline["calibration_us"]
+        print_comparison(rows, args.threshold, scale)
+        if regressed:
+            print(f"\n❌ {len(regressed)} regression(s): {', '.join(regressed)}")
+        else:
+            print("\n✅ No regressions")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the authentication middleware stack.
+
+Drives an app directly over ASGI, with no server or sockets involved, and
+compares three setups:
+
+- ``none``: the bare app.
+- ``legacy``: the previous stack. ``BaseHTTPMiddleware`` auth, which tests
+  ``any(startswith)`` over the public paths, followed by a separate
+  ``BaseHTTPMiddleware`` for the user context.
+- ``asgi``: the current single pure-ASGI ``GoogleOAuth2Middleware``.
+
+Both a small JSON response and a 200-event SSE stream are timed. The
+overhead column is each stack's time minus the bare app's.
+
+Usage:
+    python -m tests.benchmarks.bench_middleware
+    python -m tests.benchmarks.bench_middleware --requests 20000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+os.environ.setdefault("SESSION_SECRET_KEY", "bench-secret")
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import (  # noqa: E402
+    JSONResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
+from starlette.routing import Route  # noqa: E402
+
+from auth_middleware import (  # noqa: E402
+    SESSION_COOKIE_NAME,
+    GoogleOAuth2Middleware,
+    encode_session_cookie,
+)
+from session_tokens import get_signer  # noqa: E402
+from trend_spotter.request_context import request_scope  # noqa: E402
+
+PUBLIC_PATHS = {
+    "/auth/login",
+    "/auth/callback",
+    "/auth/logout",
+    "/health",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+}
+SSE_EVENTS = 200
+
+
+class LegacyAuth(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        path = request.url.path
+        if any(path.startswith(public) for public in PUBLIC_PATHS):
+            return await call_next(request)
+        cookie = request.cookies.get(SESSION_COOKIE_NAME)
+        user = get_signer().verify(cookie) if cookie else None
+        if not user:
+            return RedirectResponse(f"/auth/login?next={path}", status_code=302)
+        request.state.user = user
+        return await call_next(request)
+
+
+class LegacyUserContext(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        user = getattr(request.state, "user", None) or {}
+        with request_scope(user_email=user.get("email")):
+            return await call_next(request)
+
+
+async def apps_endpoint(request: Request):
+    return JSONResponse({"app": "trend_spotter"})
+
+
+async def sse_endpoint(request: Request):
+    async def events():
+        for n in range(SSE_EVENTS):
+            yield f"data: {n}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def build(stack: str):
+    app = Starlette(
+        routes=[Route("/list-apps", apps_endpoint), Route("/run_sse", sse_endpoint)]
+    )
+    if stack == "legacy":
+        # Added last runs first: auth, then user context, as before.
+        app.add_middleware(LegacyUserContext)
+        app.add_middleware(LegacyAuth)
+    elif stack == "asgi":
+        app.add_middleware(
+            GoogleOAuth2Middleware,
+            client_id="bench",
+            client_secret="bench",
+            redirect_uri="http://localhost/auth/callback",
+        )
+    return app
+
+
+def scope_for(path: str, cookie: str):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"cookie", cookie.encode())],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 5000),
+    }
+
+
+async def time_requests(app, path: str, cookie: str, count: int) -> float:
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(count):
+        received = False
+        await app(scope_for(path, cookie), receive, send)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+async def run(count: int):
+    cookie = (
+        f"{SESSION_COOKIE_NAME}={encode_session_cookie({'sub': '1', 'email': 'a@b.c'})}"
+    )
+    results = {}
+    for stack in ("none", "legacy", "asgi"):
+        app = build(stack)
+        await time_requests(app, "/list-apps", cookie, 200)  # warm up
+        results[stack] = (
+            await time_requests(app, "/list-apps", cookie, count),
+            await time_requests(app, "/run_sse", cookie, max(1, count // 20)),
+        )
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args.requests))
+    base_json, base_sse = results["none"]
+    print(f"\n🛡️  Auth middleware overhead ({args.requests} requests)")
+    print(
+        f"   {'stack':8}{'JSON µs':>10}{'overhead':>10}"
+        f"{'SSE µs':>10}{'overhead':>10}"
+    )
+    for stack, (json_us, sse_us) in results.items():
+        print(
+            f"   {stack:8}{json_us:>10.1f}{json_us - base_json:>10.1f}"
+            f"{sse_us:>10.1f}{sse_us - base_sse:>10.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
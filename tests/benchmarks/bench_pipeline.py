@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark for ``root_agent``.
+
+Runs the full orchestrator (sub-agents, tools and all) against a cassette
+and reports per-stage timings, so pipeline changes can be measured offline
+and in CI without touching Gemini, Google Search, Reddit or SMTP.
+
+Usage:
+    # Replay the bundled cassette as fast as possible
+    python -m tests.benchmarks.bench_pipeline --latency-scale 0
+
+    # Replay with the recorded latencies, three runs, JSON output
+    python -m tests.benchmarks.bench_pipeline --runs 3 --json
+
+    # Record a new cassette against the real services (needs credentials)
+    python -m tests.benchmarks.bench_pipeline --record \\
+        --cassette tests/benchmarks/cassettes/my_run.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from google.adk.runners import Runner  # noqa: E402
+from google.adk.sessions import InMemorySessionService  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from trend_spotter.cassette import RECORD, REPLAY, CassettePlugin  # noqa: E402
+from trend_spotter.stage_timing import StageTimingPlugin  # noqa: E402
+
+DEFAULT_CASSETTE = str(Path(__file__).parent / "cassettes" / "trend_report.jsonl")
+DEFAULT_PROMPT = "Generate this week's AI agent trends report and email it to me."
+APP_NAME = "trend_spotter"
+
+
+async def run_pipeline(
+    cassette_path: str,
+    mode: str = REPLAY,
+    latency_scale: float = 0.0,
+    runs: int = 1,
+    prompt: str = DEFAULT_PROMPT,
+) -> dict:
+    """Run ``root_agent`` ``runs`` times and return wall and per-stage timings."""
+    from trend_spotter.agent import root_agent
+
+    timer = StageTimingPlugin()
+    wall_times = []
+    final_text = ""
+    for _ in range(runs):
+        # A fresh cassette per run so replay starts from the first entry.
+        cassette = CassettePlugin(
+            path=cassette_path, mode=mode, latency_scale=latency_scale
+        )
+        runner = Runner(
+            app_name=APP_NAME,
+            agent=root_agent,
+            session_service=InMemorySessionService(),
+            plugins=[timer, cassette],
+        )
+        session = await runner.session_service.create_session(
+            app_name=APP_NAME, user_id="benchmark"
+        )
+        message = types.Content(role="user", parts=[types.Part.from_text(text=prompt)])
+
+        started = time.perf_counter()
+        async for event in runner.run_async(
+            user_id="benchmark", session_id=session.id, new_message=message
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                final_text = "".join(part.text or "" for part in event.content.parts)
+        wall_times.append(time.perf_counter() - started)
+        await runner.close()
+
+    return {
+        "runs": runs,
+        "mode": mode,
+        "latency_scale": latency_scale,
+        "wall": {
+            "mean": sum(wall_times) / len(wall_times),
+            "min": min(wall_times),
+            "max": max(wall_times),
+        },
+        "stages": timer.summary(),
+        "final_response_chars": len(final_text),
+    }
+
+
+def print_report(result: dict) -> None:
+    print(
+        f"\n⏱️  Pipeline benchmark ({result['runs']} run(s), {result['mode']}, "
+        f"latency x{result['latency_scale']})"
+    )
+    wall = result["wall"]
+    print(
+        f"   Wall time: mean {wall['mean'] * 1000:.1f} ms, "
+        f"min {wall['min'] * 1000:.1f} ms, max {wall['max'] * 1000:.1f} ms"
+    )
+    print(
+        f"\n   {'stage':<42}{'count':>6}{'mean ms':>10}{'p95 ms':>10}{'total ms':>11}"
+    )
+    for stage, stats in result["stages"].items():
+        print(
+            f"   {stage:<42}{stats['count']:>6}{stats['mean'] * 1000:>10.1f}"
+            f"{stats['p95'] * 1000:>10.1f}{stats['total'] * 1000:>11.1f}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE)
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Call the real services and record a new cassette",
+    )
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=1.0,
+        help="Multiplier for recorded latencies in replay (0 = no delay)",
+    )
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    mode = RECORD if args.record else REPLAY
+    if mode == RECORD and os.path.exists(args.cassette):
+        print(f"❌ Refusing to overwrite existing cassette {args.cassette}")
+        return 1
+
+    result = asyncio.run(
+        run_pipeline(
+            args.cassette,
+            mode=mode,
+            latency_scale=args.latency_scale,
+            runs=1 if mode == RECORD else args.runs,
+            prompt=args.prompt,
+        )
+    )
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the server-side session store backends.
+
+Fills each backend with ``--sessions`` sessions (100k by default), then
+measures:
+
+- issue and verify latency, with verifies on random live sessions;
+- sweeping after half of the sessions have expired;
+- memory per session for the in-memory LRU (via ``tracemalloc``), and the
+  file size for SQLite.
+
+Usage:
+    python -m tests.benchmarks.bench_session_store
+    python -m tests.benchmarks.bench_session_store --sessions 20000 --json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from session_store import MemorySessionStore, SQLiteSessionStore  # noqa: E402
+
+
+class SteppingClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def bench_backend(name: str, sessions: int, lookups: int, directory: str):
+    clock = SteppingClock()
+    ttl = 3600.0
+    if name == "memory":
+        store = MemorySessionStore(max_sessions=sessions, ttl=ttl, clock=clock)
+        tracemalloc.start()
+    else:
+        store = SQLiteSessionStore(
+            os.path.join(directory, "sessions.db"),
+            max_sessions=sessions,
+            ttl=ttl,
+            clock=clock,
+        )
+
+    started = time.perf_counter()
+    ids = []
+    for n in range(sessions):
+        if n == sessions // 2:
+            clock.now += ttl / 2  # the first half will expire first
+        ids.append(store.issue({"sub": str(n), "email": f"user{n}@example.com"}))
+    issue_us = (time.perf_counter() - started) / sessions * 1e6
+
+    footprint = None
+    if name == "memory":
+        footprint = tracemalloc.get_traced_memory()[0] / sessions
+        tracemalloc.stop()
+
+    sample = random.Random(7).choices(ids[sessions // 2 :], k=lookups)
+    started = time.perf_counter()
+    for session_id in sample:
+        assert store.verify(session_id) is not None
+    verify_us = (time.perf_counter() - started) / lookups * 1e6
+
+    clock.now += ttl / 2 + 1  # first half expired, second half still live
+    started = time.perf_counter()
+    swept = store.sweep()
+    sweep_ms = (time.perf_counter() - started) * 1000
+
+    if name == "sqlite":
+        footprint = os.path.getsize(store.path) / sessions
+    return {
+        "backend": name,
+        "sessions": sessions,
+        "issue_us": issue_us,
+        "verify_us": verify_us,
+        "sweep_ms": sweep_ms,
+        "swept": swept,
+        "bytes_per_session": footprint,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=50_000)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = [
+            bench_backend(name, args.sessions, args.lookups, directory)
+            for name in ("memory", "sqlite")
+        ]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print(f"\n🗄️  Session store ({args.sessions} sessions)")
+    print(
+        f"   {'backend':8}{'issue µs':>10}{'verify µs':>11}"
+        f"{'sweep ms':>10}{'swept':>8}{'bytes/session':>15}"
+    )
+    for row in rows:
+        print(
+            f"   {row['backend']:8}{row['issue_us']:>10.1f}{row['verify_us']:>11.1f}"
+            f"{row['sweep_ms']:>10.1f}{row['swept']:>8}"
+            f"{row['bytes_per_session']:>15.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
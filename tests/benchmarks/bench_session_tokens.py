@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for reading the authentication cookie.
+
+Compares the old unsigned JSON cookie (``json.loads`` per request) with
+signed tokens from ``session_tokens.py``, both on first sight (HMAC and
+JSON parsing) and for a token already in the verified-token cache.
+
+Usage:
+    python -m tests.benchmarks.bench_session_tokens
+    python -m tests.benchmarks.bench_session_tokens --iterations 200000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from session_tokens import SessionTokenSigner  # noqa: E402
+
+USER = {
+    "email": "alice@example.com",
+    "name": "Alice Example",
+    "picture": "https://lh3.googleusercontent.com/a/ACg8ocJ" + "x" * 80,
+    "sub": "108234567890123456789",
+    "verified_email": True,
+}
+
+
+def per_call_us(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    legacy_cookie = json.dumps(USER)
+    signer = SessionTokenSigner("bench-secret", cache_size=1)
+    token = signer.issue(USER)
+    uncached = SessionTokenSigner("bench-secret", cache_size=0)
+
+    rows = [
+        ("unsigned JSON cookie", len(legacy_cookie), lambda: json.loads(legacy_cookie)),
+        ("signed token, first use", len(token), lambda: uncached.verify(token)),
+        ("signed token, cached", len(token), lambda: signer.verify(token)),
+    ]
+    print(f"\n🍪 Session cookie read ({args.iterations} iterations)")
+    print(f"   {'':26}{'bytes':>7}{'µs/request':>12}")
+    for name, size, func in rows:
+        print(f"   {name:26}{size:>7}{per_call_us(func, args.iterations):>12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Unit tests for the microbenchmark suite and its baseline comparison."""
+
+import json
+
+import pytest
+
+from tests.benchmarks import bench_micro
+
+
+def _run(calibration_us, **best_us):
+    return {
+        "calibration_us": calibration_us,
+        "results": {name: {"best_us": value} for name, value in best_us.items()},
+    }
+
+
+@pytest.mark.unit
+def test_benchmarks_time_the_success_paths(capsys):
+    """Each benchmark runs its hot path for real, not an error branch."""
+    with bench_micro.BENCHMARKS["reddit.search_large"].setup() as search:
+        result = search()
+    assert result.count("Title: r/Subreddit") > 900
+
+    with bench_micro.BENCHMARKS["email.send_50"].setup() as send:
+        report = send()
+    assert len(report.sent) == 50 and not report.failed
+
+    html = bench_micro.BENCHMARKS["email.format_html"].setup
+    with html() as render:
+        assert "<li" in render() and "Trend 1 for agent developers" in render()
+
+    for name in ("middleware.auth_signed_in", "middleware.user_context"):
+        with bench_micro.BENCHMARKS[name].setup() as dispatch:
+            dispatch()
+
+
+@pytest.mark.unit
+def test_compare_scales_by_machine_speed_and_flags_regressions():
+    """A run on a 2x slower machine is only flagged beyond the threshold."""
+    baseline = _run(100.0, render=10.0, send=1000.0, gone=5.0)
+    current = _run(200.0, render=21.0, send=3000.0, added=1.0)
+
+    rows = {row["name"]: row for row in bench_micro.compare(current, baseline, 0.25)}
+    assert rows["render"]["baseline_us"] == 20.0
+    assert rows["render"]["ratio"] == pytest.approx(1.05)
+    assert not rows["render"]["regressed"]
+    assert rows["send"]["regressed"]
+    assert rows["added"]["ratio"] is None and not rows["added"]["regressed"]
+    assert "gone" not in rows
+
+    raw = bench_micro.compare(current, baseline, 0.25, normalize=False)
+    assert all(row["regressed"] for row in raw if row["name"] != "added")
+
+
+@pytest.mark.unit
+def test_save_then_compare(tmp_path, capsys):
+    """save merges into the baseline file; compare exits 1 on a regression."""
+    path = tmp_path / "baseline.json"
+    args = ["--filter", "middleware.auth_public", "--repeat", "1", "--baseline"]
+    assert bench_micro.main(["save", *args, str(path)]) == 0
+    saved = json.loads(path.read_text())
+    assert list(saved["results"]) == ["middleware.auth_public"]
+    assert saved["calibration_us"] > 0
+
+    assert bench_micro.main(["compare", *args, str(path), "--threshold", "4"]) == 0
+    saved["results"]["middleware.auth_public"]["best_us"] /= 100
+    path.write_text(json.dumps(saved))
+    capsys.readouterr()
+    assert bench_micro.main(["compare", *args, str(path), "--json"]) == 1
+    output = json.loads(capsys.readouterr().out)
+    assert output["regressed"] == ["middleware.auth_public"]
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Unit tests enforcing the cold import-time budget."""
+
+import pytest
+
+from tests.benchmarks.bench_import import check_budgets
+
+
+@pytest.mark.unit
+def test_package_import_is_lazy():
+    """Importing the package loads neither ADK nor the tool dependencies."""
+    (result,) = check_budgets(runs=3, modules=["trend_spotter"])
+    assert result["loaded_forbidden"] == []
+    assert result["ok"], result
+
+
+@pytest.mark.unit
+def test_agent_import_defers_tool_dependencies():
+    """Building root_agent defers praw and smtplib until first tool use."""
+    (result,) = check_budgets(runs=1, modules=["trend_spotter.agent"])
+    assert result["loaded_forbidden"] == []
+    assert result["ok"], result
+
+
+@pytest.mark.unit
+def test_root_agent_resolves_lazily():
+    """ADK discovery still finds root_agent on the package."""
+    import trend_spotter
+
+    assert "root_agent" in dir(trend_spotter)
+    assert trend_spotter.root_agent.name == "TrendSpotterOrchestrator"
+    with pytest.raises(AttributeError):
+        trend_spotter.not_an_attribute
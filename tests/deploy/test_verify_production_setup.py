@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Unit tests for the concurrent deploy preflight."""
+
+import json
+import os
+import stat
+import time
+
+import pytest
+
+import verify_production_setup as preflight
+from verify_production_setup import Check, CheckCache, run_checks
+
+FAKE_GCLOUD = """#!/bin/sh
+sleep 0.3
+case "$*" in
+  --version) echo "Google Cloud SDK 480.0.0" ;;
+  "auth list"*) echo "deployer@example.iam.gserviceaccount.com" ;;
+  "projects describe"*) echo "projectId: trend-spotter" ;;
+  "services list"*) printf "aiplatform.googleapis.com\\nrun.googleapis.com\\n" ;;
+esac
+"""
+
+
+def _sleeper(seconds, passed=True, calls=None):
+    def run(report):
+        if calls is not None:
+            calls.append(report.name)
+        time.sleep(seconds)
+        report.successes.append(f"   ✅ {report.name}")
+        return passed
+
+    return run
+
+
+@pytest.mark.unit
+def test_independent_checks_run_concurrently_and_failures_skip_dependents():
+    """Wall time follows the slowest chain; a failed requirement skips."""
+    checks = [
+        Check("a", _sleeper(0.3)),
+        Check("b", _sleeper(0.3, passed=False)),
+        Check("c", _sleeper(0.3), requires=("a",)),
+        Check("d", _sleeper(0.3), requires=("b",)),
+        Check("slow", _sleeper(5), timeout=0.2),
+    ]
+    started = time.perf_counter()
+    reports = run_checks(checks)
+    elapsed = time.perf_counter() - started
+
+    assert [r.status for r in reports] == [
+        "passed",
+        "failed",
+        "passed",
+        "skipped",
+        "timeout",
+    ]
+    assert 0.6 <= elapsed < 1.0  # a then c; the rest overlap
+    assert reports[4].seconds < 0.5 and "timed out" in reports[4].errors[0]
+
+    with pytest.raises(ValueError):
+        run_checks([Check("x", _sleeper(0), requires=("missing",))])
+    with pytest.raises(ValueError):
+        run_checks(
+            [
+                Check("x", _sleeper(0), requires=("y",)),
+                Check("y", _sleeper(0), requires=("x",)),
+            ]
+        )
+
+
+@pytest.mark.unit
+def test_passing_results_are_cached_for_the_ttl(tmp_path, monkeypatch):
+    """Only passing cacheable checks are reused, per project, until expiry."""
+    now = [1000.0]
+    path = tmp_path / "cache.json"
+    calls = []
+    checks = [
+        Check("gcloud", _sleeper(0, calls=calls), cacheable=True),
+        Check("broken", _sleeper(0, passed=False, calls=calls), cacheable=True),
+        Check("env", _sleeper(0, calls=calls)),
+    ]
+    monkeypatch.setenv("GOOGLE_CLOUD_PROJECT", "trend-spotter")
+
+    cache = CheckCache(path, ttl=300, clock=lambda: now[0])
+    run_checks(checks, cache=cache)
+    cache.save()
+    assert sorted(calls) == ["broken", "env", "gcloud"]
+
+    calls.clear()
+    now[0] += 200
+    reports = run_checks(checks, cache=CheckCache(path, ttl=300, clock=lambda: now[0]))
+    assert sorted(calls) == ["broken", "env"]
+    assert reports[0].cached and reports[0].passed
+    assert reports[0].successes == ["   ✅ gcloud"]
+
+    calls.clear()
+    monkeypatch.setenv("GOOGLE_CLOUD_PROJECT", "another-project")
+    run_checks(checks, cache=CheckCache(path, ttl=300, clock=lambda: now[0]))
+    assert "gcloud" in calls
+
+    calls.clear()
+    monkeypatch.setenv("GOOGLE_CLOUD_PROJECT", "trend-spotter")
+    now[0] += 200
+    run_checks(checks, cache=CheckCache(path, ttl=300, clock=lambda: now[0]))
+    assert "gcloud" in calls
+
+
+@pytest.mark.unit
+def test_json_report_for_the_deploy_workflow(tmp_path, monkeypatch, capsys):
+    """--json reports every check with its timing against fake CLIs."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, script in (
+        ("gcloud", FAKE_GCLOUD),
+        ("adk", "#!/bin/sh\nsleep 0.3\necho 'adk, version 1.0.0'\n"),
+    ):
+        path = bin_dir / name
+        path.write_text(script)
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    for path in (".github/workflows/ci.yml", ".github/workflows/deploy-adk.yml"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("")
+    (tmp_path / "deploy.sh").write_text("")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("GOOGLE_CLOUD_PROJECT", "trend-spotter")
+    monkeypatch.setenv("GOOGLE_CLOUD_LOCATION", "us-central1")
+    monkeypatch.setenv("GOOGLE_GENAI_USE_VERTEXAI", "true")
+    for var in ("REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET", "REDDIT_USER_AGENT"):
+        monkeypatch.setenv(var, "x")
+    monkeypatch.setattr(
+        preflight.ProductionVerifier,
+        "verify_agent_importable",
+        lambda self, report: True,
+    )
+
+    assert preflight.main(["--json", "--no-cache"]) == 1
+    result = json.loads(capsys.readouterr().out)
+    statuses = {check["name"]: check["status"] for check in result["checks"]}
+    assert statuses == {
+        "environment": "passed",
+        "gcloud": "passed",
+        "gcloud_auth": "passed",
+        "project_access": "passed",
+        "required_apis": "failed",
+        "adk": "passed",
+        "agent_import": "passed",
+        "pipelines": "passed",
+        "secrets_docs": "failed",
+    }
+    apis = next(c for c in result["checks"] if c["name"] == "required_apis")
+    assert apis["warnings"] == [
+        "⚠️  API not enabled: cloudbuild.googleapis.com",
+        "⚠️  API not enabled: containerregistry.googleapis.com",
+    ]
+    # gcloud, then auth, then project and APIs together: three fake calls
+    assert result["seconds"] < 1.5
+    assert not result["ok"]
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Local SMTP stand-in for delivery tests and benchmarks.
+
+A small threaded SMTP server built on ``socketserver``, so no extra
+dependency is needed. It speaks enough ESMTP for ``smtplib`` (EHLO, AUTH
+PLAIN/LOGIN, MAIL, RCPT, DATA, NOOP, RSET, QUIT) and keeps every accepted
+message in memory. STARTTLS is not offered; connect the pool with
+``starttls=False``.
+
+Usage:
+    with SMTPSink(latency=0.01, reject={"bounce@example.com"}) as sink:
+        pool = SMTPConnectionPool("127.0.0.1", sink.port, "u", "p",
+                                  starttls=False)
+        ...
+        assert len(sink.messages) == 3
+"""
+
+import socketserver
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+
+@dataclass
+class ReceivedMessage:
+    mail_from: str
+    rcpt_to: List[str]
+    data: bytes
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self) -> None:
+        sink: "SMTPSink" = self.server.sink  # type: ignore[attr-defined]
+        sink._connected()
+        self.reply("220 smtp-sink ESMTP ready")
+        mail_from, rcpt_to = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-smtp-sink\r\n250-8BITMIME\r\n")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == "AUTH":
+                if line.upper().startswith("AUTH LOGIN"):
+                    parts = line.split()
+                    if len(parts) == 2:
+                        self.reply("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = line[10:].strip("<> "), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = line[8:].strip("<> ")
+                if address in sink.reject:
+                    self.reply("550 5.1.1 No such user")
+                else:
+                    rcpt_to.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b".\r\n", b".\n", b""):
+                        break
+                    lines.append(data_line[1:] if data_line[:1] == b"." else data_line)
+                if sink.latency:
+                    time.sleep(sink.latency)
+                sink._received(
+                    ReceivedMessage(mail_from or "", rcpt_to, b"".join(lines))
+                )
+                mail_from, rcpt_to = None, []
+                self.reply("250 OK queued")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "RSET":
+                mail_from, rcpt_to = None, []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """Threaded in-memory SMTP server on an ephemeral localhost port."""
+
+    def __init__(self, latency: float = 0.0, reject: Optional[Iterable[str]] = None):
+        self.latency = latency
+        self.reject = set(reject or ())
+        self.messages: List[ReceivedMessage] = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), _SMTPHandler)
+        self._server.sink = self  # type: ignore[attr-defined]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="smtp-sink", daemon=True
+        )
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def _connected(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def _received(self, message: ReceivedMessage) -> None:
+        with self._lock:
+            self.messages.append(message)
+
+    def start(self) -> "SMTPSink":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "SMTPSink":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Unit tests for concurrent report delivery against a local SMTP sink."""
+
+import socket
+
+import pytest
+
+from tests.email.smtp_sink import SMTPSink
+from trend_spotter.delivery import deliver
+from trend_spotter.smtp_pool import SMTPConnectionPool, close_pools
+
+
+def _message(recipient):
+    return f"To: {recipient}\r\nSubject: Trends\r\n\r\nHello\r\n"
+
+
+@pytest.fixture
+def sink():
+    with SMTPSink(latency=0.002, reject={"bounce@example.com"}) as server:
+        yield server
+
+
+def _pool(port, max_size=4):
+    return SMTPConnectionPool(
+        "127.0.0.1", port, "sender@test", "secret", max_size=max_size, starttls=False
+    )
+
+
+@pytest.mark.unit
+def test_large_list_is_spread_over_pooled_connections(sink):
+    """Hundreds of recipients go out over a bounded set of sessions."""
+    pool = _pool(sink.port)
+    recipients = [f"listener{n}@example.com" for n in range(200)]
+
+    report = deliver(pool, "sender@test", recipients, _message, concurrency=4)
+    pool.close()
+
+    assert len(report.sent) == 200
+    assert [status.recipient for status in report.statuses] == recipients
+    assert len(sink.messages) == 200
+    assert sink.connections == 4
+    metrics = report.summary()
+    assert metrics["connections_opened"] == 4
+    assert metrics["messages_per_s"] > 0
+
+
+@pytest.mark.unit
+def test_rejected_recipient_gets_its_own_status(sink):
+    """A bounce fails one recipient without affecting the others."""
+    pool = _pool(sink.port, max_size=2)
+    recipients = ["a@example.com", "bounce@example.com", "b@example.com"]
+
+    report = deliver(pool, "sender@test", recipients, _message)
+    pool.close()
+
+    assert report.sent == ["a@example.com", "b@example.com"]
+    (failed,) = report.failed
+    assert failed.recipient == "bounce@example.com"
+    assert "No such user" in failed.error
+
+
+@pytest.mark.unit
+def test_unreachable_server_raises_for_the_circuit_breaker():
+    """With nothing delivered, a connection failure propagates."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    pool = _pool(port)
+
+    with pytest.raises(OSError):
+        deliver(pool, "sender@test", ["a@example.com"], _message)
+
+
+@pytest.mark.unit
+def test_send_email_report_uses_concurrent_delivery(sink, monkeypatch):
+    """The email tool delivers to every configured recipient via the sink."""
+    from trend_spotter.sub_agents.email_agent import send_email_report
+
+    recipients = [f"listener{n}@example.com" for n in range(20)]
+    monkeypatch.setenv("SMTP_SERVER", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(sink.port))
+    monkeypatch.setenv("SMTP_STARTTLS", "false")
+    monkeypatch.setenv("SENDER_EMAIL", "sender@test")
+    monkeypatch.setenv("SENDER_APP_PASSWORD", "secret")
+    monkeypatch.setenv("EMAIL_RECIPIENTS", ",".join(recipients))
+
+    try:
+        result = send_email_report("Weekly trends", "# Report\n\n**Hello**")
+    finally:
+        close_pools()
+
+    assert result.startswith("✅ Email successfully sent to 20 recipient(s)")
+    assert sorted(rcpt for m in sink.messages for rcpt in m.rcpt_to) == sorted(
+        recipients
+    )
+
+
+@pytest.mark.unit
+def test_prepared_message_is_addressed_per_recipient():
+    """The body is encoded once; each copy carries its own To header."""
+    from email import message_from_bytes
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    from trend_spotter.delivery import PreparedMessage
+
+    msg = MIMEMultipart()
+    msg["From"] = "sender@test"
+    msg["To"] = "placeholder@example.com"
+    msg["Subject"] = "Weekly trends"
+    msg.attach(MIMEText("<h2>🔥 Trends</h2>", "html"))
+    prepared = PreparedMessage(msg)
+
+    first = message_from_bytes(prepared.for_recipient("a@example.com"))
+    second = message_from_bytes(prepared.for_recipient("b@example.com"))
+
+    assert first.get_all("To") == ["a@example.com"]
+    assert second.get_all("To") == ["b@example.com"]
+    assert first["Subject"] == "Weekly trends"
+    (html,) = first.get_payload()
+    assert html.get_payload(decode=True).decode("utf-8") == "<h2>🔥 Trends</h2>"
+    assert msg.get_all("To") == ["placeholder@example.com"]  # not mutated
+
+
+@pytest.mark.unit
+def test_slow_send_reports_in_progress_not_failure(monkeypatch):
+    """Past the deadline the tool says the send continues, and it does."""
+    import time
+
+    from trend_spotter import resilience
+    from trend_spotter.sub_agents.email_agent import send_email_report
+
+    recipients = [f"listener{n}@example.com" for n in range(4)]
+    monkeypatch.setattr(resilience, "_guards", {})
+    with SMTPSink(latency=0.1) as sink:
+        monkeypatch.setenv("SMTP_SERVER", "127.0.0.1")
+        monkeypatch.setenv("SMTP_PORT", str(sink.port))
+        monkeypatch.setenv("SMTP_STARTTLS", "false")
+        monkeypatch.setenv("SMTP_DELIVERY_CONCURRENCY", "1")
+        monkeypatch.setenv("SENDER_EMAIL", "sender@test")
+        monkeypatch.setenv("SENDER_APP_PASSWORD", "secret")
+        monkeypatch.setenv("EMAIL_RECIPIENTS", ",".join(recipients))
+        monkeypatch.setenv("TREND_SPOTTER_POLICY_EMAIL_TIMEOUT", "0.05")
+        try:
+            result = send_email_report("Weekly trends", "**Hello**")
+            deadline = time.monotonic() + 10
+            while len(sink.messages) < len(recipients):
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+        finally:
+            close_pools()
+
+    assert result.startswith("⏳ Email to 4 recipient(s) is still being sent")
+    assert "Do not send it again" in result
+    assert [m.rcpt_to for m in sink.messages] == [[r] for r in recipients]
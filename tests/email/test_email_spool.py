@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Unit tests for the durable email spool and its retry worker."""
+
+import time
+
+import pytest
+
+from trend_spotter.email_spool import DEAD, PARTIAL, QUEUED, SENT, EmailSpool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def spool(tmp_path, clock):
+    return EmailSpool(
+        str(tmp_path / "spool.db"), max_attempts=3, base_delay=10, clock=clock
+    )
+
+
+def _unreachable(subject, html_body, recipients):
+    raise ConnectionRefusedError("SMTP unreachable")
+
+
+@pytest.mark.unit
+def test_enqueue_returns_id_and_worker_delivers(spool):
+    """Enqueueing is instant; the worker records the delivery."""
+    delivery_id = spool.enqueue("Trends", "<p>hi</p>", ["a@example.com"])
+    assert spool.status(delivery_id)["status"] == QUEUED
+
+    assert spool.process_one(lambda s, b, r: (r, []))
+    assert not spool.process_one(lambda s, b, r: (r, []))
+
+    status = spool.status(delivery_id)
+    assert status["status"] == SENT
+    assert status["sent"] == ["a@example.com"]
+
+
+@pytest.mark.unit
+def test_failures_back_off_then_dead_letter(spool, clock):
+    """Transient failures are retried with backoff, then dead-lettered."""
+    delivery_id = spool.enqueue("Trends", "<p>hi</p>", ["a@example.com"])
+
+    assert spool.process_one(_unreachable)
+    status = spool.status(delivery_id)
+    assert status["status"] == QUEUED
+    assert 5 <= status["next_attempt"] - clock.now <= 10
+    assert not spool.process_one(_unreachable)  # not due yet
+
+    clock.now += 10
+    assert spool.process_one(_unreachable)
+    assert 10 <= spool.status(delivery_id)["next_attempt"] - clock.now <= 20
+
+    clock.now += 20
+    assert spool.process_one(_unreachable)
+    status = spool.status(delivery_id)
+    assert status["status"] == DEAD
+    assert status["last_error"] == "ConnectionRefusedError: SMTP unreachable"
+    assert [dead["id"] for dead in spool.dead_letters()] == [delivery_id]
+
+
+@pytest.mark.unit
+def test_partial_send_retries_only_unreached_recipients(spool):
+    """Reached and bounced recipients are final; the rest are retried."""
+    recipients = ["a@example.com", "bounce@example.com", "c@example.com"]
+    delivery_id = spool.enqueue("Trends", "<p>hi</p>", recipients)
+    calls = []
+
+    def send(subject, html_body, pending):
+        calls.append(list(pending))
+        if len(calls) == 1:
+            return ["a@example.com"], ["bounce@example.com (550 No such user)"]
+        return pending, []
+
+    assert spool.process_one(send)
+    assert spool.status(delivery_id)["pending"] == ["c@example.com"]
+    assert spool.process_one(send)
+
+    assert calls == [recipients, ["c@example.com"]]
+    status = spool.status(delivery_id)
+    assert status["status"] == PARTIAL
+    assert status["sent"] == ["a@example.com", "c@example.com"]
+    assert status["failed"] == ["bounce@example.com (550 No such user)"]
+
+
+@pytest.mark.unit
+def test_expired_lease_is_claimed_again(spool, clock):
+    """A delivery whose worker died mid-send is picked up after the lease."""
+    spool.enqueue("Trends", "<p>hi</p>", ["a@example.com"])
+    assert spool.claim() is not None
+    assert spool.claim() is None
+
+    clock.now += spool.lease
+    assert spool.claim() is not None
+
+
+@pytest.mark.unit
+def test_send_email_report_queues_and_worker_delivers(tmp_path, monkeypatch):
+    """With the spool enabled the tool returns a delivery ID immediately."""
+    from tests.email.smtp_sink import SMTPSink
+    from trend_spotter.email_spool import shutdown_spool
+    from trend_spotter.smtp_pool import close_pools
+    from trend_spotter.sub_agents.email_agent import (
+        get_email_delivery_status,
+        send_email_report,
+    )
+
+    with SMTPSink() as sink:
+        monkeypatch.setenv("EMAIL_SPOOL_PATH", str(tmp_path / "spool.db"))
+        monkeypatch.setenv("SMTP_SERVER", "127.0.0.1")
+        monkeypatch.setenv("SMTP_PORT", str(sink.port))
+        monkeypatch.setenv("SMTP_STARTTLS", "false")
+        monkeypatch.setenv("SENDER_EMAIL", "sender@test")
+        monkeypatch.setenv("SENDER_APP_PASSWORD", "secret")
+        monkeypatch.setenv("EMAIL_RECIPIENTS", "a@example.com,b@example.com")
+        try:
+            result = send_email_report("Weekly trends", "**Hello**")
+            assert result.startswith("📬 Email to 2 recipient(s) queued")
+            delivery_id = result.rsplit(" ", 1)[-1]
+
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                status = get_email_delivery_status(delivery_id)
+                if status.startswith("✅"):
+                    break
+                time.sleep(0.05)
+        finally:
+            shutdown_spool()
+            close_pools()
+
+    assert status == "✅ Delivered to a@example.com, b@example.com"
+    assert len(sink.messages) == 2
+
+
+@pytest.mark.unit
+def test_slow_spooled_delivery_is_not_abandoned(monkeypatch):
+    """A send slower than the email deadline finishes once per recipient."""
+    from tests.email.smtp_sink import SMTPSink
+    from trend_spotter import resilience
+    from trend_spotter.smtp_pool import close_pools
+    from trend_spotter.sub_agents.email_agent import _send_spooled_report
+
+    recipients = [f"listener{n}@example.com" for n in range(4)]
+    monkeypatch.setattr(resilience, "_guards", {})
+    with SMTPSink(latency=0.1) as sink:
+        monkeypatch.setenv("SMTP_SERVER", "127.0.0.1")
+        monkeypatch.setenv("SMTP_PORT", str(sink.port))
+        monkeypatch.setenv("SMTP_STARTTLS", "false")
+        monkeypatch.setenv("SMTP_DELIVERY_CONCURRENCY", "1")
+        monkeypatch.setenv("SENDER_EMAIL", "sender@test")
+        monkeypatch.setenv("SENDER_APP_PASSWORD", "secret")
+        monkeypatch.setenv("TREND_SPOTTER_POLICY_EMAIL_TIMEOUT", "0.05")
+        try:
+            sent, bounced = _send_spooled_report("Trends", "<p>hi</p>", recipients)
+        finally:
+            close_pools()
+
+    assert sent == recipients and bounced == []
+    assert [m.rcpt_to for m in sink.messages] == [[r] for r in recipients]
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Unit tests for the content-addressed report archive and its route."""
+
+import gzip
+import os
+import sys
+
+import pytest
+
+from trend_spotter.report_archive import (
+    CACHE_CONTROL,
+    ReportArchive,
+    add_report_routes,
+)
+
+PAGE = "<html><body><h2>🔥 Trends</h2></body></html>"
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return ReportArchive(str(tmp_path / "reports"))
+
+
+@pytest.mark.unit
+def test_identical_reports_are_stored_once(archive):
+    """The digest addresses the content; storing it again is a no-op."""
+    digest = archive.store(PAGE)
+    path = archive.path_for(digest)
+    first_bytes = open(path, "rb").read()
+
+    assert archive.store(PAGE) == digest
+    assert archive.store(PAGE + " ") != digest
+    assert open(path, "rb").read() == first_bytes
+    assert gzip.decompress(first_bytes).decode("utf-8") == PAGE
+    assert archive.load(digest) == PAGE
+    assert sum(len(files) for _, _, files in os.walk(archive.root)) == 2
+
+
+@pytest.mark.unit
+def test_unknown_or_malformed_digests_are_not_found(archive):
+    assert archive.load("0" * 64) is None
+    assert archive.load_compressed("../../etc/passwd") is None
+
+
+@pytest.mark.unit
+def test_route_serves_precompressed_report_with_cache_headers(archive):
+    """Gzip clients get the stored bytes; revalidation answers 304."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    add_report_routes(app, archive)
+    digest = archive.store(PAGE)
+    client = TestClient(app)
+
+    response = client.get(f"/reports/{digest}")
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == f'"{digest}-gzip"'
+    assert response.headers["cache-control"] == CACHE_CONTROL
+    assert response.text == PAGE
+
+    plain = client.get(f"/reports/{digest}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] == f'"{digest}"'
+    assert plain.text == PAGE
+
+    cached = client.get(
+        f"/reports/{digest}", headers={"If-None-Match": f'W/"{digest}-gzip"'}
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    assert client.get(f"/reports/{'f' * 64}").status_code == 404
+
+
+@pytest.mark.unit
+def test_link_mode_emails_a_summary_and_archives_the_report(tmp_path, monkeypatch):
+    """EMAIL_REPORT_MODE=link sends headlines plus a link to the archive."""
+    from tests.email.smtp_sink import SMTPSink
+    from trend_spotter.smtp_pool import close_pools
+    from trend_spotter.sub_agents.email_agent import send_email_report
+
+    # The package re-exports the agent under the module's name
+    module = sys.modules["trend_spotter.sub_agents.email_agent"]
+    renders = []
+    render = module.render_report_html
+    monkeypatch.setattr(
+        module,
+        "render_report_html",
+        lambda markdown: renders.append(markdown) or render(markdown),
+    )
+    report = "**🔥 Top Trends**\n1.  **Agent Memory**: " + "Details. " * 2000
+    with SMTPSink() as sink:
+        monkeypatch.setenv("REPORT_ARCHIVE_DIR", str(tmp_path / "reports"))
+        monkeypatch.setenv("EMAIL_REPORT_MODE", "link")
+        monkeypatch.setenv("REPORT_BASE_URL", "https://trends.example.com/")
+        monkeypatch.setenv("SMTP_SERVER", "127.0.0.1")
+        monkeypatch.setenv("SMTP_PORT", str(sink.port))
+        monkeypatch.setenv("SMTP_STARTTLS", "false")
+        monkeypatch.setenv("SENDER_EMAIL", "sender@test")
+        monkeypatch.setenv("SENDER_APP_PASSWORD", "secret")
+        monkeypatch.setenv("EMAIL_RECIPIENTS", "a@example.com")
+        try:
+            result = send_email_report("Weekly trends", report, "June 2025")
+        finally:
+            close_pools()
+
+    assert result.startswith("✅")
+    (message,) = sink.messages
+    from email import message_from_bytes
+
+    (html_part,) = message_from_bytes(message.data).get_payload()
+    html = html_part.get_payload(decode=True).decode("utf-8")
+    archive = ReportArchive(str(tmp_path / "reports"))
+    (digest,) = [name[:64] for _, _, files in os.walk(archive.root) for name in files]
+    assert "Agent Memory" in html
+    assert "Details." not in html
+    assert f'href="https://trends.example.com/reports/{digest}"' in html
+    assert "Details." in archive.load(digest)
+    assert len(message.data) < len(archive.load(digest))
+    assert renders == [report]  # converted once, for the archive only
+
+
+@pytest.mark.unit
+async def test_revalidation_through_the_server_middleware_stack(archive, monkeypatch):
+    """The 304 names the same ETag as the 200 behind compression and auth."""
+    from pathlib import Path
+
+    import httpx
+
+    import session_tokens
+    from auth_middleware import SESSION_COOKIE_NAME, encode_session_cookie
+    from authenticated_server import create_app
+
+    monkeypatch.setenv("GOOGLE_OAUTH2_CLIENT_ID", "client")
+    monkeypatch.setenv("GOOGLE_OAUTH2_CLIENT_SECRET", "secret")
+    monkeypatch.setenv("SESSION_SECRET_KEY", "archive-test-secret")
+    monkeypatch.setattr(session_tokens, "_signer", None)
+    monkeypatch.setenv("WARMUP_ENABLED", "false")
+    monkeypatch.setenv("REPORT_ARCHIVE_DIR", archive.root)
+    app = create_app(str(Path(__file__).parent.parent.parent), web=False)
+    digest = archive.store(PAGE * 100)
+    cookie = encode_session_cookie({"sub": "1", "email": "alice@example.com"})
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://t",
+        cookies={SESSION_COOKIE_NAME: cookie},
+    ) as client:
+        for encoding in ("gzip", "identity"):
+            headers = {"Accept-Encoding": encoding}
+            page = await client.get(f"/reports/{digest}", headers=headers)
+            assert page.status_code == 200
+            assert page.text == PAGE * 100
+            cached = await client.get(
+                f"/reports/{digest}",
+                headers={**headers, "If-None-Match": page.headers["etag"]},
+            )
+            assert cached.status_code == 304
+            assert cached.headers["etag"] == page.headers["etag"]
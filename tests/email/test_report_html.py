@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Unit tests for the single-pass report markdown renderer."""
+
+import pytest
+
+from trend_spotter.report_html import render_inline, render_report_html
+
+REPORT = """**Report Date Range:** June 10, 2025 - June 17, 2025
+
+**🔥 Top 5 Trends for Agent Developers**
+1.  **Multi-Agent Systems**: Growing focus on orchestration
+    for complex tasks. **(Source: https://example.com/multi-agent)**
+    * **Developer Impact**: Enables building more
+      sophisticated apps.
+    * **Prioritization Rationale**: See [thread](https://reddit.com/r/x?a=1&b=2).
+
+2.  **Agent Standards**: Shared protocols.
+    * **Developer Impact**: Less glue code.
+
+**🚀 Top 5 Releases for Agent Developers**
+1.  **AgentSDK v2.0**: New release.
+"""
+
+
+@pytest.mark.unit
+def test_report_structure():
+    """Sections, numbered items and nested bullets map to HTML blocks."""
+    html = render_report_html(REPORT)
+
+    assert html.startswith(
+        "<p><strong>Report Date Range:</strong> June 10, 2025 - June 17, 2025</p>"
+    )
+    assert '<h2 class="emoji">🔥 Top 5 Trends for Agent Developers</h2>' in html
+    assert '<h2 class="emoji">🚀 Top 5 Releases for Agent Developers</h2>' in html
+    assert html.count("<ol>") == 2 and html.count("</ol>") == 2
+    assert html.count('<li class="trend-item">') == 3
+    assert html.count('<li class="impact">') == 2
+    assert html.count('<li class="rationale">') == 1
+    # Wrapped lines are joined instead of being broken with <br>.
+    assert "orchestration for complex tasks." in html
+    assert "Enables building more sophisticated apps." in html
+    assert "<br>" not in html
+
+
+@pytest.mark.unit
+def test_source_urls_become_anchors():
+    """Bare URLs and markdown links become escaped source links."""
+    html = render_report_html(REPORT)
+
+    assert (
+        '<strong>(Source: <a class="source-link" '
+        'href="https://example.com/multi-agent">'
+        "https://example.com/multi-agent</a>)</strong>"
+    ) in html
+    assert (
+        '<a class="source-link" href="https://reddit.com/r/x?a=1&amp;b=2">'
+        "thread</a>."
+    ) in html
+
+
+@pytest.mark.unit
+def test_untrusted_markup_is_escaped():
+    """Model output cannot inject tags, attributes or script URLs."""
+    html = render_inline(
+        '<script>alert(1)</script> [x](javascript:alert(1)) "https://a.b/" **open'
+    )
+
+    assert "<script>" not in html
+    assert "&lt;script&gt;" in html
+    assert 'href="javascript' not in html
+    assert html.endswith("**open")
+
+
+@pytest.mark.unit
+def test_large_input_renders_quickly():
+    """Multi-megabyte reports render in well under a second per MB."""
+    import time
+
+    from tests.benchmarks.bench_email_render import sample_report
+
+    # A single line of unclosed link syntax must not be rescanned per ``[``
+    pathological = "[" * 500_000 + "[x](https://" * 50_000
+    report = sample_report(2048) + pathological
+    started = time.perf_counter()
+    html = render_report_html(report)
+    elapsed = time.perf_counter() - started
+
+    assert html.count("<ol>") == 1
+    assert html.endswith("[x](https://</p>")
+    assert elapsed < 2.0
+
+
+@pytest.mark.unit
+def test_report_headlines():
+    """Numbered items yield their bold names for the summary email."""
+    from trend_spotter.report_html import report_headlines
+
+    assert report_headlines(REPORT) == [
+        "Multi-Agent Systems",
+        "Agent Standards",
+        "AgentSDK v2.0",
+    ]
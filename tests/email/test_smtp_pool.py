@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Unit tests for the pooled SMTP connection manager."""
+
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from trend_spotter.smtp_pool import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """In-memory SMTP session that records the commands it receives."""
+
+    instances = []
+
+    def __init__(self, host, port, timeout=None):
+        self.commands = []
+        self.sent = []
+        self.alive = True
+        self.drop_next_send = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        self.commands.append("STARTTLS")
+
+    def login(self, username, password):
+        self.commands.append("AUTH")
+
+    def noop(self):
+        self.commands.append("NOOP")
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("gone")
+        return (250, b"OK")
+
+    def sendmail(self, from_addr, to_addrs, message):
+        if self.drop_next_send or not self.alive:
+            self.alive = False
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        if to_addrs == "bad@example.com":
+            raise smtplib.SMTPRecipientsRefused({to_addrs: (550, b"No such user")})
+        self.commands.append("DATA")
+        self.sent.append(to_addrs)
+        return {}
+
+    def quit(self):
+        self.commands.append("QUIT")
+
+    def close(self):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def make_pool():
+    FakeSMTP.instances = []
+    pools = []
+
+    def factory(**kwargs):
+        kwargs.setdefault("keepalive_interval", 0)
+        pool = SMTPConnectionPool(
+            "smtp.test", 587, "sender@test", "secret", smtp_factory=FakeSMTP, **kwargs
+        )
+        pools.append(pool)
+        return pool
+
+    yield factory
+    for pool in pools:
+        pool.close()
+
+
+@pytest.mark.unit
+def test_warm_connection_is_reused_across_reports(make_pool):
+    """Only the first send pays for connect, STARTTLS and AUTH."""
+    pool = make_pool()
+    for recipient in ("a@example.com", "b@example.com", "c@example.com"):
+        pool.send("sender@test", recipient, "message")
+
+    (session,) = FakeSMTP.instances
+    assert session.commands == ["STARTTLS", "AUTH", "DATA", "DATA", "DATA"]
+    assert pool.stats["connects"] == 1
+    assert pool.size == 1
+
+
+@pytest.mark.unit
+def test_stale_connection_is_checked_and_replaced(make_pool):
+    """An idle connection gets a NOOP before use and is replaced if dead."""
+    clock = FakeClock()
+    pool = make_pool(keepalive_interval=30, clock=clock)
+    pool.send("sender@test", "a@example.com", "message")
+
+    clock.now = 10
+    pool.send("sender@test", "a@example.com", "message")
+    assert "NOOP" not in FakeSMTP.instances[0].commands
+
+    clock.now = 100
+    FakeSMTP.instances[0].alive = False
+    pool.send("sender@test", "a@example.com", "message")
+    assert len(FakeSMTP.instances) == 2
+    assert FakeSMTP.instances[1].sent == ["a@example.com"]
+    assert pool.size == 1
+
+
+@pytest.mark.unit
+def test_dropped_connection_is_retried_once(make_pool):
+    """A server that drops a warm session mid-send costs one reconnect."""
+    pool = make_pool()
+    pool.send("sender@test", "a@example.com", "message")
+    FakeSMTP.instances[0].drop_next_send = True
+
+    pool.send("sender@test", "b@example.com", "message")
+
+    assert FakeSMTP.instances[1].sent == ["b@example.com"]
+    assert pool.stats["reconnects"] == 1
+    assert pool.size == 1
+
+
+@pytest.mark.unit
+def test_rejected_recipient_keeps_connection(make_pool):
+    """A refused recipient raises but does not cost the session."""
+    pool = make_pool()
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.send("sender@test", "bad@example.com", "message")
+    pool.send("sender@test", "a@example.com", "message")
+
+    assert len(FakeSMTP.instances) == 1
+    assert pool.size == 1
+
+
+@pytest.mark.unit
+def test_keepalive_noops_idle_and_closes_expired(make_pool):
+    """Keepalive pings idle sessions and closes those past max_idle."""
+    clock = FakeClock()
+    pool = make_pool(max_idle=300, clock=clock)
+    pool.send("sender@test", "a@example.com", "message")
+
+    clock.now = 60
+    pool.keepalive()
+    assert FakeSMTP.instances[0].commands[-1] == "NOOP"
+    assert pool.size == 1
+
+    clock.now = 400
+    pool.keepalive()
+    assert FakeSMTP.instances[0].commands[-1] == "QUIT"
+    assert pool.size == 0
+
+
+@pytest.mark.unit
+def test_pool_is_bounded_under_concurrency(make_pool):
+    """Concurrent reports share at most max_size sessions."""
+    pool = make_pool(max_size=2)
+    barrier = threading.Barrier(8)
+
+    def send(n):
+        barrier.wait()
+        pool.send("sender@test", f"user{n}@example.com", "message")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(send, range(8)))
+
+    assert len(FakeSMTP.instances) <= 2
+    assert sum(len(session.sent) for session in FakeSMTP.instances) == 8
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Concurrent-user load test for the authenticated server.
+
+Drives N virtual users through the login-cookie path and the ADK run
+endpoints of ``authenticated_server.create_app``. By default the server runs
+in a subprocess with the model and tools stubbed by the bundled cassette
+(``tests/benchmarks/cassettes/trend_report.jsonl``), so no Gemini, Google
+Search, Reddit or SMTP traffic is generated. The subprocess samples its own
+event-loop lag and memory, so the load generator's work is not counted.
+
+Each virtual user repeatedly:
+1. Requests ``/`` without a cookie and expects the redirect to login.
+2. Creates an ADK session with its signed-in session cookie.
+3. Starts a report run on ``/run`` (or ``/run_sse``) and waits for the end.
+
+For every concurrency level it reports throughput, p50/p95/p99 run latency,
+event-loop lag and memory per in-flight run. With ``--slo-p95`` it
+recommends the Cloud Run ``--concurrency`` setting.
+
+Usage:
+    # Sweep 1..32 users with recorded latencies scaled to 10%
+    python -m tests.load.run_load --users 1,4,8,16,32 --slo-p95 5
+
+    # Stream events over SSE and print JSON
+    python -m tests.load.run_load --endpoint run_sse --users 8 --json
+
+    # Drive an already running server (event-loop lag is then measured for
+    # the load generator only, and memory is not measured)
+    python -m tests.load.run_load --url http://localhost:8080 --users 8
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import sys
+import time
+from http.cookies import SimpleCookie
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT))
+
+DEFAULT_CASSETTE = ROOT / "tests" / "benchmarks" / "cassettes" / "trend_report.jsonl"
+APP_NAME = "trend_spotter"
+PROMPT = "Generate this week's AI agent trends report and email it to me."
+
+
+def configure_stub_environment(cassette: str, latency_scale: float) -> None:
+    """Enable auth with dummy credentials and replay the cassette."""
+    os.environ.setdefault("GOOGLE_OAUTH2_CLIENT_ID", "load-test-client-id")
+    os.environ.setdefault("GOOGLE_OAUTH2_CLIENT_SECRET", "load-test-client-secret")
+    os.environ.setdefault("SESSION_SECRET_KEY", "load-test-session-secret")
+    # Measure the server itself, not the admission limits in front of it
+    os.environ.setdefault("ADMISSION_MAX_IN_FLIGHT", "0")
+    os.environ["TREND_SPOTTER_CASSETTE"] = cassette
+    os.environ["TREND_SPOTTER_CASSETTE_MODE"] = "replay"
+    os.environ["TREND_SPOTTER_CASSETTE_LATENCY_SCALE"] = str(latency_scale)
+
+
+def session_cookie_header(email: str) -> str:
+    """Cookie header for a signed-in user, as set by /auth/callback."""
+    from auth_middleware import SESSION_COOKIE_NAME, encode_session_cookie
+
+    user_info = {
+        "email": email,
+        "name": email.split("@")[0],
+        "picture": None,
+        "sub": email,
+        "verified_email": True,
+    }
+    cookie = SimpleCookie()
+    cookie[SESSION_COOKIE_NAME] = encode_session_cookie(user_info)
+    return cookie.output(header="", attrs=[]).strip()
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[rank - 1]
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak RSS is the best portable approximation (KiB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LevelStats:
+    """Measurements for one concurrency level."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {
+            "redirect": [],
+            "session": [],
+            "run": [],
+            "first_byte": [],
+        }
+        self.errors: List[str] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.loop_lag: List[float] = []
+        self.rss_samples: List[int] = []
+        self.completed_runs = 0
+
+    def run_started(self) -> None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def run_finished(self) -> None:
+        self.in_flight -= 1
+
+
+async def sample_loop(emit, stop: asyncio.Event, interval: float = 0.05) -> None:
+    """Call ``emit(lag, rss)`` for this process every ``interval`` until stopped."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        emit(max(0.0, loop.time() - expected), rss_bytes())
+
+
+async def monitor(stats: LevelStats, stop: asyncio.Event) -> None:
+    """Sample the load generator's own event-loop lag until ``stop`` is set."""
+
+    def record(lag: float, rss: int) -> None:
+        stats.loop_lag.append(lag)
+
+    await sample_loop(record, stop)
+
+
+async def virtual_user(
+    client, user_number: int, iterations: int, endpoint: str, stats: LevelStats
+) -> None:
+    email = f"load-user-{user_number}@example.com"
+    user_id = f"load-user-{user_number}"
+    cookie = {"Cookie": session_cookie_header(email)}
+
+    for _ in range(iterations):
+        try:
+            started = time.perf_counter()
+            response = await client.get("/", follow_redirects=False)
+            stats.latencies["redirect"].append(time.perf_counter() - started)
+            if response.status_code != 302:
+                stats.errors.append(f"login redirect: HTTP {response.status_code}")
+
+            started = time.perf_counter()
+            response = await client.post(
+                f"/apps/{APP_NAME}/users/{user_id}/sessions", headers=cookie, json={}
+            )
+            stats.latencies["session"].append(time.perf_counter() - started)
+            response.raise_for_status()
+            session_id = response.json()["id"]
+
+            body = {
+                "app_name": APP_NAME,
+                "user_id": user_id,
+                "session_id": session_id,
+                "new_message": {"role": "user", "parts": [{"text": PROMPT}]},
+                "streaming": False,
+            }
+            stats.run_started()
+            started = time.perf_counter()
+            try:
+                async with client.stream(
+                    "POST", f"/{endpoint}", headers=cookie, json=body
+                ) as response:
+                    first_byte = None
+                    async for _chunk in response.aiter_bytes():
+                        if first_byte is None:
+                            first_byte = time.perf_counter() - started
+                    response.raise_for_status()
+            finally:
+                stats.run_finished()
+            stats.latencies["run"].append(time.perf_counter() - started)
+            if first_byte is not None:
+                stats.latencies["first_byte"].append(first_byte)
+            stats.completed_runs += 1
+        except Exception as e:
+            stats.errors.append(f"{type(e).__name__}: {e}")
+
+
+async def run_level(
+    base_url: str,
+    users: int,
+    iterations: int,
+    endpoint: str,
+    server: Optional["ServerProcess"],
+) -> dict:
+    import httpx
+
+    stats = LevelStats()
+    stop = asyncio.Event()
+    if server is None:
+        baseline_rss = 0
+        monitor_task = asyncio.create_task(monitor(stats, stop))
+    else:
+        baseline_rss = server.rss
+        server.stats = stats
+
+    limits = httpx.Limits(max_connections=users * 2)
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=300.0, limits=limits
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                virtual_user(client, n, iterations, endpoint, stats)
+                for n in range(users)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    if server is None:
+        stop.set()
+        await monitor_task
+    else:
+        server.stats = None
+
+    run_latencies = stats.latencies["run"]
+    memory_per_run = None
+    if stats.peak_in_flight and stats.rss_samples:
+        growth = max(stats.rss_samples) - baseline_rss
+        memory_per_run = max(0, growth) / stats.peak_in_flight
+
+    return {
+        "users": users,
+        "completed_runs": stats.completed_runs,
+        "errors": len(stats.errors),
+        "error_samples": stats.errors[:5],
+        "duration_s": elapsed,
+        "throughput_runs_per_s": stats.completed_runs / elapsed if elapsed else 0.0,
+        "run_latency_s": {
+            "p50": percentile(run_latencies, 0.50),
+            "p95": percentile(run_latencies, 0.95),
+            "p99": percentile(run_latencies, 0.99),
+        },
+        "first_byte_p95_s": percentile(stats.latencies["first_byte"], 0.95),
+        "session_p95_s": percentile(stats.latencies["session"], 0.95),
+        "redirect_p95_s": percentile(stats.latencies["redirect"], 0.95),
+        "loop_lag_s": {
+            "p50": percentile(stats.loop_lag, 0.50),
+            "p99": percentile(stats.loop_lag, 0.99),
+            "max": max(stats.loop_lag) if stats.loop_lag else None,
+        },
+        "peak_in_flight": stats.peak_in_flight,
+        "memory_per_in_flight_run_mb": (
+            memory_per_run / 1024 / 1024 if memory_per_run is not None else None
+        ),
+    }
+
+
+async def serve(port: int, cassette: str, latency_scale: float) -> None:
+    """
+    Run ``authenticated_server.create_app`` on uvicorn (``--serve``).
+
+    This is the server side of the load test. Once it is listening, it
+    writes one JSON line ``{"lag": ..., "rss": ...}`` per sample of its own
+    event loop to stdout; everything else the app prints goes to stderr.
+    """
+    samples = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+    configure_stub_environment(cassette, latency_scale)
+
+    import uvicorn
+
+    from authenticated_server import create_app
+
+    app = create_app(str(ROOT), web=False)
+    config = uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="warning", access_log=False
+    )
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+            return
+        await asyncio.sleep(0.05)
+
+    def emit(lag: float, rss: int) -> None:
+        samples.write(json.dumps({"lag": lag, "rss": rss}) + "\n")
+
+    emit(0.0, rss_bytes())  # ready
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_loop(emit, stop))
+    await task
+    stop.set()
+    await sampler
+
+
+class ServerProcess:
+    """
+    The server under test in a subprocess, so the load generator's own
+    requests and parsing are not measured as server lag and memory.
+    """
+
+    def __init__(self, process):
+        self.process = process
+        self.stats: Optional[LevelStats] = None  # level being measured
+        self.rss = 0  # latest sample
+        self._reader: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def start(
+        cls, port: int, cassette: str, latency_scale: float
+    ) -> "ServerProcess":
+        """Start ``serve`` in a new interpreter and wait until it listens."""
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "tests.load.run_load",
+            "--serve",
+            "--port",
+            str(port),
+            "--cassette",
+            cassette,
+            "--latency-scale",
+            str(latency_scale),
+            cwd=str(ROOT),
+            stdout=asyncio.subprocess.PIPE,
+        )
+        server = cls(process)
+        ready = await process.stdout.readline()
+        if not ready:
+            await process.wait()
+            raise RuntimeError(
+                f"Load test server exited with code {process.returncode}"
+            )
+        server._record(ready)
+        server._reader = asyncio.create_task(server._read_samples())
+        return server
+
+    def _record(self, line: bytes) -> None:
+        sample = json.loads(line)
+        self.rss = sample["rss"]
+        if self.stats is not None:
+            self.stats.loop_lag.append(sample["lag"])
+            self.stats.rss_samples.append(sample["rss"])
+
+    async def _read_samples(self) -> None:
+        async for line in self.process.stdout:
+            self._record(line)
+
+    async def stop(self) -> None:
+        """Stop the server (uvicorn shuts down gracefully on SIGTERM)."""
+        if self.process.returncode is None:
+            self.process.terminate()
+        await self.process.wait()
+        if self._reader is not None:
+            await self._reader
+
+
+def recommend_concurrency(levels: List[dict], slo_p95: float) -> Optional[int]:
+    """Highest user count that met the p95 SLO without errors."""
+    passing = [
+        level["users"]
+        for level in levels
+        if not level["errors"]
+        and level["run_latency_s"]["p95"] is not None
+        and level["run_latency_s"]["p95"] <= slo_p95
+    ]
+    return max(passing) if passing else None
+
+
+def _ms(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def print_report(levels: List[dict]) -> None:
+    print(
+        f"\n{'users':>6}{'runs':>7}{'err':>5}{'runs/s':>8}{'p50 ms':>9}"
+        f"{'p95 ms':>9}{'p99 ms':>9}{'lag p99':>9}{'lag max':>9}{'MB/run':>8}"
+    )
+    for level in levels:
+        latency = level["run_latency_s"]
+        lag = level["loop_lag_s"]
+        memory = level["memory_per_in_flight_run_mb"]
+        print(
+            f"{level['users']:>6}{level['completed_runs']:>7}{level['errors']:>5}"
+            f"{level['throughput_runs_per_s']:>8.2f}{_ms(latency['p50']):>9}"
+            f"{_ms(latency['p95']):>9}{_ms(latency['p99']):>9}"
+            f"{_ms(lag['p99']):>9}{_ms(lag['max']):>9}"
+            f"{'-' if memory is None else f'{memory:.1f}':>8}"
+        )
+        for sample in level["error_samples"]:
+            print(f"       ❌ {sample}")
+
+
+async def run_load_test(args) -> dict:
+    local_server = not args.url
+    server = None
+    base_url = args.url
+    if local_server:
+        # The cookies are signed here, with the secret the server inherits
+        configure_stub_environment(args.cassette, args.latency_scale)
+        server = await ServerProcess.start(args.port, args.cassette, args.latency_scale)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    levels = []
+    try:
+        for users in args.users:
+            if not args.json:
+                print(f"🚦 {users} virtual user(s) x {args.iterations} run(s)...")
+            levels.append(
+                await run_level(base_url, users, args.iterations, args.endpoint, server)
+            )
+    finally:
+        if server is not None:
+            await server.stop()
+
+    result = {
+        "endpoint": args.endpoint,
+        "local_server": local_server,
+        "levels": levels,
+    }
+    if args.slo_p95:
+        result["slo_p95_s"] = args.slo_p95
+        result["recommended_concurrency"] = recommend_concurrency(levels, args.slo_p95)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--users",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=[1, 4, 8, 16],
+        help="Comma-separated concurrency levels (virtual users)",
+    )
+    parser.add_argument("--iterations", type=int, default=3, help="Runs per user")
+    parser.add_argument("--endpoint", choices=["run", "run_sse"], default="run")
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=0.1,
+        help="Multiplier for the stubbed model/tool latencies",
+    )
+    parser.add_argument("--cassette", default=str(DEFAULT_CASSETTE))
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="Target an already running server instead")
+    parser.add_argument(
+        "--slo-p95",
+        type=float,
+        help="Run latency SLO (seconds) used to recommend instance concurrency",
+    )
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        asyncio.run(serve(args.port, args.cassette, args.latency_scale))
+        return 0
+
+    result = asyncio.run(run_load_test(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print_report(result["levels"])
+    if args.slo_p95:
+        concurrency = result["recommended_concurrency"]
+        if concurrency:
+            print(
+                f"\n✅ Highest level within p95 <= {args.slo_p95}s: {concurrency} "
+                f"users. Suggested Cloud Run setting: --concurrency={concurrency}"
+            )
+        else:
+            print(f"\n⚠️  No level met p95 <= {args.slo_p95}s without errors")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Unit tests for run admission control."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from admission_control import (
+    AdmissionController,
+    AdmissionControlMiddleware,
+    AdmissionRejected,
+)
+
+
+@pytest.mark.unit
+async def test_per_user_limit_refuses_without_blocking_others():
+    """A user at their limit is refused at once; other users still run."""
+    controller = AdmissionController(max_in_flight=4, max_per_user=2)
+    await controller.acquire("alice@example.com")
+    await controller.acquire("alice@example.com")
+
+    with pytest.raises(AdmissionRejected) as refused:
+        await controller.acquire("alice@example.com")
+    assert refused.value.reason == "user_limit"
+    assert refused.value.retry_after >= 1
+
+    assert await controller.acquire("bob@example.com") == 0.0
+    controller.release("alice@example.com", run_time=5.0)
+    await controller.acquire("alice@example.com")
+    assert controller.stats()["rejected"]["user_limit"] == 1
+    assert controller.retry_after() == 5
+
+
+@pytest.mark.unit
+async def test_queue_is_fifo_and_bounded():
+    """Runs over the global limit wait in order; a full queue refuses."""
+    controller = AdmissionController(max_in_flight=1, max_per_user=5, max_queue=2)
+    await controller.acquire("a")
+    order = []
+
+    async def run(user):
+        async with controller.admit(user):
+            order.append(user)
+
+    waiting = [asyncio.ensure_future(run(user)) for user in ("b", "c")]
+    await asyncio.sleep(0)
+    assert controller.queued == 2
+
+    with pytest.raises(AdmissionRejected) as refused:
+        await controller.acquire("d")
+    assert refused.value.reason == "queue_full"
+
+    controller.release("a")
+    await asyncio.gather(*waiting)
+    assert order == ["b", "c"]
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["queued"], stats["users"]) == (0, 0, 0)
+    assert stats["admitted"] == 3 and stats["queued_total"] == 2
+
+
+@pytest.mark.unit
+async def test_queue_deadline_frees_the_users_place():
+    """A run that waits too long is refused and no longer counts."""
+    controller = AdmissionController(
+        max_in_flight=1, max_per_user=1, queue_timeout=0.01
+    )
+    await controller.acquire("a")
+    with pytest.raises(AdmissionRejected) as refused:
+        await controller.acquire("b")
+    assert refused.value.reason == "timeout"
+    assert controller.queued == 0
+
+    controller.release("a")
+    assert await controller.acquire("b") == 0.0
+
+
+@pytest.mark.unit
+async def test_middleware_returns_429_with_retry_after():
+    """Refused run requests get 429 and Retry-After; other paths pass."""
+    gate = asyncio.Event()
+
+    async def app(scope, receive, send):
+        if scope["path"] == "/run":
+            await gate.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    def signed_in(email):
+        async def wrapper(scope, receive, send):
+            scope.setdefault("state", {})["user"] = {"email": email}
+            await limited(scope, receive, send)
+
+        return wrapper
+
+    controller = AdmissionController(max_in_flight=1, max_queue=0)
+    limited = AdmissionControlMiddleware(app, controller)
+
+    transport = httpx.ASGITransport(app=signed_in("alice@example.com"))
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        first = asyncio.ensure_future(client.post("/run"))
+        await asyncio.sleep(0.01)
+        assert controller.in_flight == 1
+
+        refused = await client.post("/run_sse")
+        assert refused.status_code == 429
+        assert refused.headers["retry-after"] == "1"
+        assert refused.json()["reason"] == "queue_full"
+        assert (await client.get("/list-apps")).status_code == 200
+
+        gate.set()
+        assert (await first).status_code == 200
+    assert controller.in_flight == 0
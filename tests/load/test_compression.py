@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Unit tests for response compression and web UI cache headers."""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from starlette.responses import JSONResponse, StreamingResponse
+
+from compression_middleware import (
+    IMMUTABLE,
+    CompressionMiddleware,
+    is_fingerprinted,
+    negotiate,
+)
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+@pytest.fixture
+def app(tmp_path):
+    ui = tmp_path / "ui"
+    ui.mkdir()
+    (ui / "main-KCUV4MHY.js").write_text(
+        "console.log('bundle');\n" * 5000
+    )  # several chunks
+    (ui / "index.html").write_text("<script src=main-KCUV4MHY.js></script>" * 50)
+
+    app = FastAPI()
+
+    @app.get("/api/big")
+    async def big():
+        return JSONResponse({"events": ["x" * 40] * 100})
+
+    @app.get("/api/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/api/stream")
+    async def stream():
+        async def chunks():
+            yield b"a" * 4096
+            yield b"b" * 4096
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.mount("/dev-ui/", StaticFiles(directory=ui, html=True))
+    return CompressionMiddleware(app)
+
+
+@pytest.fixture
+async def client(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        yield client
+
+
+@pytest.mark.unit
+def test_negotiation_and_fingerprints():
+    """q-values are honoured; only hashed file names count as immutable."""
+    assert negotiate("gzip;q=0.5, br", ("br", "gzip")) == "br"
+    assert negotiate("br;q=0, gzip", ("br", "gzip")) == "gzip"
+    assert negotiate("identity", ("gzip",)) is None
+    assert is_fingerprinted("/dev-ui/chunk-ARAETZM4.js")
+    assert is_fingerprinted("/static/main.3f2a9c1b.css")
+    assert not is_fingerprinted("/dev-ui/assets/audio-processor.js")
+    assert not is_fingerprinted("/dev-ui/index.html")
+
+
+@pytest.mark.unit
+async def test_json_is_compressed_above_threshold(client):
+    """Large bodies are gzipped for clients that accept it; small ones aren't."""
+    response = await client.get("/api/big", headers=GZIP)
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert len(response.json()["events"]) == 100
+
+    raw = await client.get("/api/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers
+    small = await client.get("/api/small", headers=GZIP)
+    assert "content-encoding" not in small.headers
+
+
+@pytest.mark.unit
+async def test_streaming_responses_pass_through(client):
+    """Chunked responses are never buffered or compressed."""
+    response = await client.get("/api/stream", headers=GZIP)
+    assert "content-encoding" not in response.headers
+    assert response.content == b"a" * 4096 + b"b" * 4096
+
+
+@pytest.mark.unit
+async def test_fingerprinted_assets_are_immutable_and_revalidate(app, client):
+    """Hashed assets cache for a year; the rest revalidate via tagged ETags."""
+    asset = await client.get("/dev-ui/main-KCUV4MHY.js", headers=GZIP)
+    assert asset.headers["cache-control"] == IMMUTABLE
+    assert asset.headers["content-encoding"] == "gzip"
+    etag = asset.headers["etag"]
+    assert etag.endswith('-gzip"')
+    assert int(asset.headers["content-length"]) < len(asset.content) / 10
+
+    # Compressed once, then served from the cache
+    cached = app.cache.size
+    assert cached > 0
+    again = await client.get("/dev-ui/main-KCUV4MHY.js", headers=GZIP)
+    assert again.content == asset.content
+    assert app.cache.size == cached
+
+    page = await client.get("/dev-ui/index.html", headers=GZIP)
+    assert page.headers["cache-control"] == "no-cache"
+    not_modified = await client.get(
+        "/dev-ui/index.html",
+        headers={**GZIP, "If-None-Match": page.headers["etag"]},
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == page.headers["etag"]
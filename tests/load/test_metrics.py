@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Unit tests for the Prometheus metrics and the /metrics endpoint."""
+
+import threading
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from server_metrics import MetricsMiddleware
+from trend_spotter.metrics import Counter, Gauge, Histogram, Registry
+
+
+@pytest.mark.unit
+def test_render_uses_prometheus_text_format():
+    """Counters, callback gauges and cumulative histogram buckets render."""
+    registry = Registry()
+    requests = Counter("app_requests_total", "Requests.", ("route",), registry=registry)
+    requests.labels('/say "hi"').inc(2)
+    Gauge("app_queue", "Queue.", function=lambda: 3, registry=registry)
+    latency = Histogram(
+        "app_seconds", "Latency.", buckets=(0.1, 1.0), registry=registry
+    )
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert "# TYPE app_requests_total counter" in text
+    assert 'app_requests_total{route="/say \\"hi\\""} 2' in text
+    assert "app_queue 3" in text
+    assert 'app_seconds_bucket{le="0.1"} 1' in text
+    assert 'app_seconds_bucket{le="1"} 2' in text
+    assert 'app_seconds_bucket{le="+Inf"} 3' in text
+    assert "app_seconds_count 3" in text
+    assert "app_seconds_sum 5.55" in text
+
+
+@pytest.mark.unit
+def test_concurrent_increments_are_not_lost():
+    """Per-thread shards add up exactly without locks."""
+    counter = Counter("app_hits_total", "Hits.", registry=Registry())
+    child = counter.labels()
+
+    def work():
+        for _ in range(20_000):
+            child.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert child.get() == 160_000
+
+
+@pytest.mark.unit
+async def test_middleware_labels_route_templates_and_guards_metrics():
+    """Requests are labelled by route template; /metrics can need a token."""
+    app = FastAPI()
+
+    @app.get("/apps/{app_name}/users/{user_id}")
+    async def user(app_name: str, user_id: str):
+        return {"ok": True}
+
+    app.add_middleware(MetricsMiddleware, token="scrape-token")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        assert (await client.get("/apps/trend_spotter/users/u1")).status_code == 200
+        assert (await client.get("/nowhere")).status_code == 404
+        assert (await client.get("/metrics")).status_code == 401
+
+        scrape = await client.get(
+            "/metrics", headers={"Authorization": "Bearer scrape-token"}
+        )
+    assert scrape.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = scrape.text
+    assert (
+        'trend_spotter_http_requests_total{method="GET",'
+        'route="/apps/{app_name}/users/{user_id}",status="200"}'
+    ) in text
+    assert 'route="unrouted",status="404"' in text
+    assert "u1" not in text
+    assert "trend_spotter_http_requests_in_flight 0" in text
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Unit tests for the pre-fork multi-worker server."""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+import prefork
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# A tiny app that reports which worker served it
+SERVER = """
+import os, sys
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from prefork import PreforkServer
+
+app = Starlette(routes=[Route("/", lambda r: PlainTextResponse(str(os.getpid())))])
+server = PreforkServer(
+    app, host="127.0.0.1", port=0, workers=1, log_level="warning",
+    graceful_timeout=5, min_uptime=0,
+)
+server.bind()
+print(server.port, flush=True)
+sys.exit(server.run())
+"""
+
+
+def _get_pid(port, deadline=15.0):
+    end = time.monotonic() + deadline
+    while True:
+        try:
+            return int(httpx.get(f"http://127.0.0.1:{port}/", timeout=2).text)
+        except httpx.HTTPError:
+            if time.monotonic() > end:
+                raise
+            time.sleep(0.1)
+
+
+@pytest.mark.unit
+def test_worker_count_parsing(monkeypatch):
+    """Counts come from the argument, then WEB_CONCURRENCY; 'auto' is per CPU."""
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert prefork.worker_count() == 1
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert prefork.worker_count() == 3
+    assert prefork.worker_count("2") == 2
+    monkeypatch.setattr(prefork, "cpu_count", lambda: 6)
+    assert prefork.worker_count("auto") == 6
+    with pytest.raises(ValueError):
+        prefork.worker_count("0")
+
+
+@pytest.mark.unit
+def test_cgroup_quota_limits_cpu_count(tmp_path):
+    """A container's CFS quota caps the CPUs, rounded up."""
+    cpu_max = tmp_path / "cpu.max"
+    missing = str(tmp_path / "missing")
+
+    cpu_max.write_text("150000 100000\n")
+    assert prefork.cgroup_cpu_limit(str(cpu_max), missing, missing) == 2
+    cpu_max.write_text("max 100000\n")
+    assert prefork.cgroup_cpu_limit(str(cpu_max), missing, missing) is None
+
+    quota, period = tmp_path / "quota", tmp_path / "period"
+    quota.write_text("400000")
+    period.write_text("100000")
+    assert prefork.cgroup_cpu_limit(missing, str(quota), str(period)) == 4
+    quota.write_text("-1")
+    assert prefork.cgroup_cpu_limit(missing, str(quota), str(period)) is None
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork needs os.fork")
+def test_workers_are_replaced_and_shut_down_gracefully():
+    """A dead worker is replaced; SIGTERM stops all workers and the parent."""
+    parent = subprocess.Popen(
+        [sys.executable, "-c", SERVER],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        port = int(parent.stdout.readline())
+        worker = _get_pid(port)
+        assert worker != parent.pid
+
+        os.kill(worker, signal.SIGKILL)
+        # The only worker is gone, so an answer proves a replacement
+        assert _get_pid(port) not in (worker, parent.pid)
+        assert parent.poll() is None
+
+        parent.send_signal(signal.SIGTERM)
+        assert parent.wait(timeout=15) == 0
+    finally:
+        if parent.poll() is None:
+            parent.kill()
+            parent.wait()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Unit tests for the load test report helpers."""
+
+import pytest
+
+from tests.load.run_load import (
+    LevelStats,
+    ServerProcess,
+    percentile,
+    recommend_concurrency,
+)
+
+
+def _level(users, p95, errors=0):
+    return {"users": users, "errors": errors, "run_latency_s": {"p95": p95}}
+
+
+@pytest.mark.unit
+def test_percentile_nearest_rank():
+    """Percentiles use nearest rank and tolerate empty samples."""
+    values = [float(n) for n in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile([], 0.95) is None
+
+
+@pytest.mark.unit
+def test_recommend_concurrency_skips_errors_and_slow_levels():
+    """The recommendation is the highest error-free level within the SLO."""
+    levels = [
+        _level(1, 1.0),
+        _level(4, 2.0),
+        _level(8, 2.5, errors=1),
+        _level(16, 7.0),
+    ]
+    assert recommend_concurrency(levels, slo_p95=5.0) == 4
+    assert recommend_concurrency(levels, slo_p95=0.5) is None
+
+
+@pytest.mark.unit
+def test_server_samples_go_to_the_level_being_measured():
+    """Lag and RSS come from the server process, only while a level runs."""
+    server = ServerProcess(process=None)
+    server._record(b'{"lag": 0.5, "rss": 100}')
+    stats = server.stats = LevelStats()
+    server._record(b'{"lag": 0.01, "rss": 300}')
+    server.stats = None
+    server._record(b'{"lag": 0.9, "rss": 200}')
+
+    assert stats.loop_lag == [0.01] and stats.rss_samples == [300]
+    assert server.rss == 200
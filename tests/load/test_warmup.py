@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Unit tests for the startup warmup and the readiness probe."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from warmup import Warmup, WarmupStep, add_readiness_routes
+
+
+@pytest.mark.unit
+async def test_steps_run_concurrently_and_failures_are_recorded():
+    """Sync and async steps overlap; only a required failure blocks readiness."""
+
+    async def slow_async():
+        await asyncio.sleep(0.2)
+
+    def slow_sync():
+        time.sleep(0.2)
+
+    def broken():
+        raise ConnectionError("smtp down")
+
+    warmup = Warmup(
+        [
+            WarmupStep("agents", slow_async, required=True),
+            WarmupStep("reddit", slow_sync),
+            WarmupStep("smtp", broken),
+        ]
+    )
+    started = time.perf_counter()
+    assert await warmup.run() is True
+    assert time.perf_counter() - started < 0.35
+
+    status = warmup.status()
+    assert status["ready"] and status["steps"]["agents"]["ok"]
+    assert status["steps"]["smtp"] == {
+        "ok": False,
+        "error": "ConnectionError: smtp down",
+        "seconds": status["steps"]["smtp"]["seconds"],
+    }
+
+    failed = Warmup([WarmupStep("agents", broken, required=True)])
+    assert await failed.run() is False
+    assert failed.done and not failed.ready
+
+
+@pytest.mark.unit
+async def test_ready_endpoint_flips_once_warm():
+    """/ready answers 503 while warming and 200 after; /health at once."""
+    release = asyncio.Event()
+    warmup = Warmup([WarmupStep("agents", release.wait, required=True)])
+    app = add_readiness_routes(FastAPI(), warmup)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        task = warmup.start()
+        response = await client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["steps"]["agents"] == {"ok": None}
+        assert (await client.get("/health")).status_code == 200
+
+        release.set()
+        await task
+        response = await client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+
+        await warmup.stop()  # a finished warmup is left alone
+        assert warmup.ready
@@ -2,14 +2,26 @@
 
 """Trend Spotter package initialization."""
 
+import importlib
+
 __version__ = "0.1.2"
 __author__ = "Your Name"
 
-# Import and expose the root_agent for ADK discovery
-# Only import when not running tests to avoid import issues
-try:
-    from .agent import root_agent  # noqa: F401
-except ImportError:
-    # During testing or when dependencies aren't available,
-    # skip the import to allow basic package functionality
-    pass
+# ``root_agent`` is exposed for ADK discovery but loaded on first access
+# (PEP 562), so importing the package or a light module such as
+# ``trend_spotter.cassette`` does not pull in the ADK stack, every sub-agent
+# and praw. See tests/benchmarks/bench_import.py for the cold-start budget.
+_LAZY_ATTRIBUTES = {"root_agent": ".agent"}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
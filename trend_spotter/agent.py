@@ -1,9 +1,9 @@
 # trend_spotter/agent.py
 
 from google.adk.agents import LlmAgent
-from google.adk.tools.agent_tool import AgentTool
 
 from . import __version__, prompt
+from .resilience import GuardedAgentTool
 from .sub_agents.email_agent import email_agent
 
 # Import the sub-agent INSTANCES
@@ -17,10 +17,12 @@ root_agent = LlmAgent(
     name="TrendSpotterOrchestrator",
     description=(f"The manager of a team of specialist AI agents (v{__version__})."),
     instruction=prompt.ORCHESTRATOR_PROMPT,
-    # The Orchestrator's "tools" are its sub-agents, wrapped in AgentTool
+    # The Orchestrator's "tools" are its sub-agents, wrapped in AgentTool.
+    # GuardedAgentTool adds per-agent deadlines, hedging and circuit breakers
+    # (see resilience.py).
     tools=[
-        AgentTool(agent=google_search_agent),
-        AgentTool(agent=reddit_agent),
-        AgentTool(agent=email_agent),
+        GuardedAgentTool(agent=google_search_agent),
+        GuardedAgentTool(agent=reddit_agent),
+        GuardedAgentTool(agent=email_agent),
     ],
 )
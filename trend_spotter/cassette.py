@@ -0,0 +1,259 @@
+# trend_spotter/cassette.py
+"""
+Record/replay cassettes for model and tool traffic.
+
+A cassette is a JSONL file with one entry per model response or tool result:
+
+    {"kind": "model", "name": "reddit_agent", "key": "...", "step": 1,
+     "elapsed": 1.4, "response": {...LlmResponse...}}
+    {"kind": "tool", "name": "search_hot_reddit_posts", "key": "...",
+     "elapsed": 0.8, "response": "Title: ...\\nLink: ..."}
+
+``CassettePlugin`` is an ADK plugin, so it sees every agent in the run,
+including sub-agents executed through ``AgentTool``:
+
+- ``record`` mode passes calls through and appends what came back.
+- ``replay`` mode answers model and function-tool calls from the cassette
+  after sleeping for the recorded latency times ``latency_scale`` (0 means
+  as fast as possible). Nothing reaches Gemini, Google Search, Reddit or
+  SMTP. Google Search is a model-side tool, so it is covered by the model
+  entries.
+
+Replay is a pure lookup, so one cassette can serve many concurrent runs
+(see ``tests/load``). A call is matched by the hash of its request first.
+If the request changed, for example because the prompt was edited, the
+entry recorded at the same conversation step for that agent is used. A
+tool falls back to any result recorded for it.
+
+Configure with environment variables, e.g. for ``adk web`` or the
+authenticated server:
+
+    TREND_SPOTTER_CASSETTE=cassettes/run.jsonl
+    TREND_SPOTTER_CASSETTE_MODE=record          # or replay
+    TREND_SPOTTER_CASSETTE_LATENCY_SCALE=1.0
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.agent_tool import AgentTool
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMissError(Exception):
+    """Raised in replay mode when no recorded entry matches a call."""
+
+
+def _hash(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def model_request_key(agent_name: str, llm_request: LlmRequest) -> str:
+    """Stable key for a model request (agent, model and conversation)."""
+    contents = [
+        content.model_dump(mode="json", exclude_none=True)
+        for content in llm_request.contents
+    ]
+    return _hash(agent_name, llm_request.model, contents)
+
+
+def tool_request_key(tool_name: str, args: Dict[str, Any]) -> str:
+    """Stable key for a tool call (tool name and arguments)."""
+    return _hash(tool_name, args)
+
+
+def conversation_step(llm_request: LlmRequest) -> int:
+    """Number of model turns since the last user text in the request."""
+    step = 0
+    for content in reversed(llm_request.contents):
+        parts = content.parts or []
+        if content.role == "user" and any(part.text for part in parts):
+            break
+        if content.role == "model":
+            step += 1
+    return step
+
+
+class Cassette:
+    """In-memory index of a cassette file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key: Dict[Tuple[str, str, str], dict] = {}
+        self._by_step: Dict[Tuple[str, str, int], dict] = {}
+        self._by_name: Dict[Tuple[str, str], dict] = {}
+        self.entries: List[dict] = []
+
+    def load(self) -> "Cassette":
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+        return self
+
+    def _index(self, entry: dict) -> None:
+        self.entries.append(entry)
+        kind, name = entry["kind"], entry["name"]
+        self._by_key.setdefault((kind, name, entry["key"]), entry)
+        self._by_step.setdefault((kind, name, entry.get("step", 0)), entry)
+        self._by_name.setdefault((kind, name), entry)
+
+    def append(
+        self,
+        kind: str,
+        name: str,
+        key: str,
+        elapsed: float,
+        response: Any,
+        step: int = 0,
+    ) -> None:
+        """Add an entry and persist it immediately (safe to interrupt)."""
+        entry = {
+            "kind": kind,
+            "name": name,
+            "key": key,
+            "step": step,
+            "elapsed": round(elapsed, 4),
+            "response": response,
+        }
+        with self._lock:
+            self._index(entry)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+
+    def find(self, kind: str, name: str, key: str, step: int = 0) -> dict:
+        """Return the entry for a call: by key, then by step, then by name."""
+        entry = (
+            self._by_key.get((kind, name, key))
+            or self._by_step.get((kind, name, step))
+            or (self._by_name.get((kind, name)) if kind == "tool" else None)
+        )
+        if entry is None:
+            raise CassetteMissError(
+                f"No recorded {kind} entry for '{name}' (step {step}) in {self.path}"
+            )
+        return entry
+
+
+class CassettePlugin(BasePlugin):
+    """ADK plugin that records or replays model and tool traffic."""
+
+    def __init__(
+        self,
+        name: str = "trend_spotter_cassette",
+        path: Optional[str] = None,
+        mode: Optional[str] = None,
+        latency_scale: Optional[float] = None,
+    ):
+        super().__init__(name=name)
+        self.path = path or os.environ["TREND_SPOTTER_CASSETTE"]
+        self.mode = (mode or os.getenv("TREND_SPOTTER_CASSETTE_MODE", REPLAY)).lower()
+        if self.mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {self.mode}")
+        if latency_scale is None:
+            latency_scale = float(
+                os.getenv("TREND_SPOTTER_CASSETTE_LATENCY_SCALE", "1.0")
+            )
+        self.latency_scale = latency_scale
+        self.cassette = Cassette(self.path)
+        if self.mode == REPLAY:
+            self.cassette.load()
+        # In-flight recordings: call id -> (key, step, start time)
+        self._pending: Dict[Any, Tuple[str, int, float]] = {}
+
+    async def _replay_delay(self, entry: dict) -> None:
+        delay = entry.get("elapsed", 0.0) * self.latency_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _model_call_id(callback_context) -> Tuple[str, str, str]:
+        return ("model", callback_context.invocation_id, callback_context.agent_name)
+
+    async def before_model_callback(
+        self, *, callback_context, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        agent_name = callback_context.agent_name
+        key = model_request_key(agent_name, llm_request)
+        step = conversation_step(llm_request)
+        if self.mode == REPLAY:
+            entry = self.cassette.find("model", agent_name, key, step)
+            await self._replay_delay(entry)
+            return LlmResponse.model_validate(entry["response"])
+        self._pending[self._model_call_id(callback_context)] = (
+            key,
+            step,
+            time.perf_counter(),
+        )
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        if self.mode != RECORD or llm_response.partial:
+            return None
+        pending = self._pending.pop(self._model_call_id(callback_context), None)
+        if pending is not None:
+            key, step, started = pending
+            self.cassette.append(
+                "model",
+                callback_context.agent_name,
+                key,
+                time.perf_counter() - started,
+                llm_response.model_dump(mode="json", exclude_none=True),
+                step=step,
+            )
+        return None
+
+    async def before_tool_callback(
+        self, *, tool, tool_args: Dict[str, Any], tool_context
+    ) -> Optional[Any]:
+        # Sub-agents are replayed through their own model entries.
+        if isinstance(tool, AgentTool):
+            return None
+        key = tool_request_key(tool.name, tool_args)
+        if self.mode == REPLAY:
+            entry = self.cassette.find("tool", tool.name, key)
+            await self._replay_delay(entry)
+            return entry["response"]
+        self._pending[("tool", tool_context.function_call_id)] = (
+            key,
+            0,
+            time.perf_counter(),
+        )
+        return None
+
+    async def after_tool_callback(
+        self, *, tool, tool_args: Dict[str, Any], tool_context, result: Any
+    ) -> Optional[Any]:
+        if self.mode != RECORD or isinstance(tool, AgentTool):
+            return None
+        pending = self._pending.pop(("tool", tool_context.function_call_id), None)
+        if pending is not None:
+            key, _, started = pending
+            self.cassette.append(
+                "tool", tool.name, key, time.perf_counter() - started, result
+            )
+        return None
+
+
+def plugins_from_env() -> List[str]:
+    """Qualified plugin names to pass as ``extra_plugins`` to the ADK app."""
+    if os.getenv("TREND_SPOTTER_CASSETTE"):
+        return ["trend_spotter.cassette.CassettePlugin"]
+    return []
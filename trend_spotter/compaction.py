@@ -0,0 +1,270 @@
+# trend_spotter/compaction.py
+"""
+Session history compaction.
+
+Every orchestrator turn sends the whole session history to Gemini, and that
+history holds each sub-agent's full output (a Reddit listing, search
+results, the rendered report). A long conversation in the web UI therefore
+re-sends tens of kilobytes per turn, and the server keeps all of it in
+memory. ``HistoryCompactionPlugin`` bounds both at the start of every run:
+
+1. The last ``keep_turns`` turns (a turn starts at a user message) stay
+   verbatim, so the current request and its recent context are intact.
+2. In older turns, tool outputs over ``max_tool_chars`` and texts over
+   ``max_text_chars`` are folded into an excerpt plus a note of how much
+   was left out; thoughts and inline attachments are replaced by such a
+   note. Function call and response pairs keep their IDs.
+3. While the history is still over ``max_tokens`` (estimated at four
+   characters per token) or ``max_bytes`` (stored size), the oldest turns
+   are dropped. If the kept turns alone exceed the caps, all but the
+   current turn are folded as in step 2.
+
+The compacted history is written back to the session service (the ADK's
+in-memory service, or ``localdb://`` from ``sqlite_services.py``), so the
+stored session shrinks too. With other services only the current run's
+context is compacted. Sizes before and after are recorded for
+``/metrics``, next to the model-call durations they affect.
+
+Configuration (environment variables):
+    HISTORY_COMPACTION          Set to false to disable
+    HISTORY_KEEP_TURNS          Turns kept verbatim (default 3)
+    HISTORY_MAX_TOKENS          Estimated tokens per session (default 32000)
+    HISTORY_MAX_BYTES           Stored bytes per session (default 262144)
+    HISTORY_MAX_TOOL_CHARS      Longest old tool output kept (default 1000)
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from .metrics import (
+    SESSION_COMPACTED_BYTES,
+    SESSION_HISTORY_BYTES,
+    SESSION_HISTORY_TOKENS,
+)
+
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class CompactionPolicy:
+    """Limits applied to a session's event history."""
+
+    keep_turns: int = 3
+    max_tokens: int = 32_000
+    max_bytes: int = 256 * 1024
+    max_tool_chars: int = 1_000
+    max_text_chars: int = 2_000
+    excerpt_chars: int = 300
+
+    @classmethod
+    def from_env(cls) -> "CompactionPolicy":
+        return cls(
+            keep_turns=int(os.getenv("HISTORY_KEEP_TURNS", "3")),
+            max_tokens=int(os.getenv("HISTORY_MAX_TOKENS", "32000")),
+            max_bytes=int(os.getenv("HISTORY_MAX_BYTES", str(256 * 1024))),
+            max_tool_chars=int(os.getenv("HISTORY_MAX_TOOL_CHARS", "1000")),
+        )
+
+
+@dataclass
+class CompactionResult:
+    """Sizes of a history before and after compaction."""
+
+    events_before: int
+    events_after: int
+    bytes_before: int
+    bytes_after: int
+    tokens_before: int
+    tokens_after: int
+    dropped_turns: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return self.bytes_after != self.bytes_before
+
+
+def _event_size(event) -> int:
+    return len(event.model_dump_json(exclude_none=True))
+
+
+def _tokens(event) -> int:
+    """Estimated tokens the event adds to a model request."""
+    if event.content is None:
+        return 0
+    return len(event.content.model_dump_json(exclude_none=True)) // CHARS_PER_TOKEN
+
+
+def _fold(text: str, policy: CompactionPolicy) -> str:
+    return (
+        f"{text[: policy.excerpt_chars]}… [{len(text) - policy.excerpt_chars} "
+        "more characters compacted from an earlier turn]"
+    )
+
+
+def _compact_part(part: types.Part, policy: CompactionPolicy) -> types.Part:
+    if part.thought:
+        return types.Part(text="[earlier reasoning compacted]")
+    if part.inline_data is not None:
+        size = len(part.inline_data.data or b"")
+        return types.Part(text=f"[{size}-byte attachment compacted]")
+    response = part.function_response
+    if response is not None and response.response is not None:
+        output = json.dumps(response.response, default=str)
+        if len(output) > policy.max_tool_chars:
+            return types.Part(
+                function_response=types.FunctionResponse(
+                    id=response.id,
+                    name=response.name,
+                    response={"result": _fold(output, policy)},
+                )
+            )
+    if part.text and len(part.text) > policy.max_text_chars:
+        return types.Part(text=_fold(part.text, policy))
+    return part
+
+
+def _turn_starts(events) -> List[int]:
+    return [
+        index
+        for index, event in enumerate(events)
+        if event.author == "user"
+        and event.content is not None
+        and any(part.text for part in event.content.parts or ())
+    ]
+
+
+def compact_events(events: list, policy: CompactionPolicy) -> CompactionResult:
+    """
+    Compact a session's events in place (the list, not the event objects).
+
+    Returns:
+        The sizes before and after.
+    """
+    sizes = [_event_size(event) for event in events]
+    tokens = [_tokens(event) for event in events]
+    result = CompactionResult(
+        events_before=len(events),
+        events_after=len(events),
+        bytes_before=sum(sizes),
+        bytes_after=sum(sizes),
+        tokens_before=sum(tokens),
+        tokens_after=sum(tokens),
+    )
+    starts = _turn_starts(events)
+    if len(starts) <= policy.keep_turns:
+        return result
+    # Events before the first kept turn are older history
+    boundary = starts[-policy.keep_turns] if policy.keep_turns > 0 else len(events)
+
+    def fold(first: int, last: int) -> None:
+        for index in range(first, last):
+            event = events[index]
+            if event.content is None or not event.content.parts:
+                continue
+            parts = [_compact_part(part, policy) for part in event.content.parts]
+            if all(new is old for new, old in zip(parts, event.content.parts)):
+                continue
+            events[index] = event.model_copy(
+                update={"content": types.Content(role=event.content.role, parts=parts)}
+            )
+            sizes[index] = _event_size(events[index])
+            tokens[index] = _tokens(events[index])
+
+    def over_budget(cut: int) -> bool:
+        return (
+            sum(tokens[cut:]) > policy.max_tokens or sum(sizes[cut:]) > policy.max_bytes
+        )
+
+    fold(0, boundary)
+
+    # Drop whole old turns (and anything before the first turn) until the
+    # history fits
+    cut = 0
+    old_starts = [start for start in starts if start < boundary] + [boundary]
+    while cut < boundary and over_budget(cut):
+        cut = next(start for start in old_starts if start > cut)
+        result.dropped_turns += 1
+
+    # Recent turns that alone exceed the caps are folded too, except the
+    # current one
+    if over_budget(cut):
+        fold(boundary, starts[-1])
+
+    if cut:
+        del events[:cut]
+        del sizes[:cut]
+        del tokens[:cut]
+
+    result.events_after = len(events)
+    result.bytes_after = sum(sizes)
+    result.tokens_after = sum(tokens)
+    return result
+
+
+async def store_events(session_service, session) -> bool:
+    """
+    Write a session's compacted events back to its service.
+
+    Returns:
+        False if the service cannot store them (only this run is compacted).
+    """
+    from google.adk.sessions import InMemorySessionService
+
+    if isinstance(session_service, InMemorySessionService):
+        stored = (
+            session_service.sessions.get(session.app_name, {})
+            .get(session.user_id, {})
+            .get(session.id)
+        )
+        if stored is not None and stored is not session:
+            stored.events = list(session.events)
+        return stored is not None
+    replace_events = getattr(session_service, "replace_events", None)
+    if replace_events is None:
+        return False
+    await replace_events(session)
+    return True
+
+
+class HistoryCompactionPlugin(BasePlugin):
+    """Compacts the session history at the start of every run."""
+
+    def __init__(
+        self,
+        name: str = "trend_spotter_history_compaction",
+        policy: Optional[CompactionPolicy] = None,
+    ):
+        super().__init__(name=name)
+        self.policy = policy or CompactionPolicy.from_env()
+
+    async def before_run_callback(self, *, invocation_context) -> None:
+        session = invocation_context.session
+        started = time.perf_counter()
+        result = compact_events(session.events, self.policy)
+        SESSION_HISTORY_BYTES.observe(result.bytes_after)
+        SESSION_HISTORY_TOKENS.observe(result.tokens_after)
+        if not result.changed:
+            return None
+        SESSION_COMPACTED_BYTES.inc(result.bytes_before - result.bytes_after)
+        await store_events(invocation_context.session_service, session)
+        print(
+            f"🗜️  Compacted session {session.id}: "
+            f"{result.bytes_before // 1024} KB -> {result.bytes_after // 1024} KB, "
+            f"~{result.tokens_before} -> ~{result.tokens_after} tokens "
+            f"({result.dropped_turns} turns dropped) in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return None
+
+
+def compaction_plugins() -> List[str]:
+    """The plugin for ``extra_plugins``, unless ``HISTORY_COMPACTION=false``."""
+    if os.getenv("HISTORY_COMPACTION", "true").lower() == "false":
+        return []
+    return ["trend_spotter.compaction.HistoryCompactionPlugin"]
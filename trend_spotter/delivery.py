@@ -0,0 +1,181 @@
+# trend_spotter/delivery.py
+"""
+Concurrent report delivery to large recipient lists.
+
+Recipients are spread over up to ``concurrency`` workers that share the
+SMTP connection pool (``smtp_pool.py``). Each worker therefore sends on its
+own warm session, and a list of a few hundred subscribers is delivered
+in parallel instead of one message at a time. Every recipient gets a
+``RecipientStatus``, and the run is summarised in a ``DeliveryReport`` with
+throughput and latency figures.
+
+A recipient rejected by the server only marks that recipient as failed.
+A connection or login failure stops the delivery. If nothing was sent yet
+the error propagates, so the caller's circuit breaker still sees an SMTP
+outage; otherwise the recipients not reached are marked failed with that
+error and the partial report is returned.
+"""
+
+import copy
+import math
+import os
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.message import Message
+from email.policy import SMTP
+from typing import Callable, Dict, List, Optional, Union
+
+from .smtp_pool import SMTPConnectionPool
+
+# Server rejections that concern one message, not the session.
+_MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+@dataclass
+class RecipientStatus:
+    """Outcome of delivering the report to one recipient."""
+
+    recipient: str
+    ok: bool = False
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+@dataclass
+class DeliveryReport:
+    """Per-recipient statuses and throughput for one delivery."""
+
+    statuses: List[RecipientStatus] = field(default_factory=list)
+    elapsed: float = 0.0
+    concurrency: int = 1
+    connections_opened: int = 0
+
+    @property
+    def sent(self) -> List[str]:
+        return [status.recipient for status in self.statuses if status.ok]
+
+    @property
+    def failed(self) -> List[RecipientStatus]:
+        return [status for status in self.statuses if not status.ok]
+
+    @property
+    def throughput(self) -> float:
+        """Delivered messages per second."""
+        return len(self.sent) / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        latencies = sorted(status.elapsed for status in self.statuses if status.ok)
+        p95 = latencies[math.ceil(len(latencies) * 0.95) - 1] if latencies else 0.0
+        return {
+            "recipients": len(self.statuses),
+            "sent": len(self.sent),
+            "failed": len(self.failed),
+            "elapsed_s": self.elapsed,
+            "messages_per_s": self.throughput,
+            "p95_message_s": p95,
+            "concurrency": self.concurrency,
+            "connections_opened": self.connections_opened,
+        }
+
+
+class PreparedMessage:
+    """
+    A message serialized once and addressed per recipient.
+
+    The headers and MIME body are encoded when the message is prepared;
+    ``for_recipient`` only prepends a folded ``To`` header, so a report
+    sent to hundreds of recipients is rendered and encoded once.
+    """
+
+    def __init__(self, message: Message):
+        # Drop any To header from a copy; the caller's message is unchanged.
+        # A shallow copy suffices: deleting a header rebinds the copy's own
+        # header list, and the MIME parts are only read.
+        message = copy.copy(message)
+        del message["To"]
+        self.payload = message.as_bytes(policy=SMTP)
+
+    def for_recipient(self, recipient: str) -> bytes:
+        return SMTP.fold_binary("To", recipient) + self.payload
+
+
+def default_concurrency(pool: SMTPConnectionPool) -> int:
+    """``SMTP_DELIVERY_CONCURRENCY``, or one worker per pooled connection."""
+    return int(os.getenv("SMTP_DELIVERY_CONCURRENCY", str(pool.max_size)))
+
+
+def deliver(
+    pool: SMTPConnectionPool,
+    sender: str,
+    recipients: List[str],
+    build_message: Callable[[str], Union[str, bytes]],
+    concurrency: Optional[int] = None,
+) -> DeliveryReport:
+    """
+    Send one message per recipient, ``concurrency`` at a time.
+
+    Args:
+        pool: Shared SMTP connection pool to send on.
+        sender: Envelope sender address.
+        recipients: Addresses to deliver to, in order.
+        build_message: Returns the full message text for a recipient.
+        concurrency: Number of parallel workers; defaults to
+            ``default_concurrency(pool)``. Capped by the recipient count.
+
+    Returns:
+        A ``DeliveryReport`` with one status per recipient, in input order.
+    """
+    workers = max(1, min(concurrency or default_concurrency(pool), len(recipients)))
+    report = DeliveryReport(
+        statuses=[RecipientStatus(recipient) for recipient in recipients],
+        concurrency=workers,
+    )
+    connects_before = pool.stats["connects"]
+    aborted = threading.Event()
+    fatal: List[BaseException] = []
+    next_index = iter(range(len(recipients)))
+    index_lock = threading.Lock()
+
+    def worker() -> None:
+        while not aborted.is_set():
+            with index_lock:
+                index = next(next_index, None)
+            if index is None:
+                return
+            status = report.statuses[index]
+            started = time.perf_counter()
+            try:
+                pool.send(sender, status.recipient, build_message(status.recipient))
+                status.ok = True
+            except _MESSAGE_ERRORS as e:
+                status.error = str(e)
+            except Exception as e:
+                status.error = str(e)
+                fatal.append(e)
+                aborted.set()
+            finally:
+                status.elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="smtp-delivery"
+    ) as executor:
+        for _ in range(workers):
+            executor.submit(worker)
+    report.elapsed = time.perf_counter() - started
+    report.connections_opened = pool.stats["connects"] - connects_before
+
+    if fatal:
+        if not report.sent:
+            raise fatal[0]
+        for status in report.statuses:
+            if not status.ok and status.error is None:
+                status.error = f"not sent: {fatal[0]}"
+    return report
@@ -0,0 +1,364 @@
+# trend_spotter/email_spool.py
+"""
+Durable outbound email spool with a background retry worker.
+
+With ``EMAIL_SPOOL_PATH`` set, ``send_email_report`` renders the report,
+writes it to a SQLite outbox (WAL mode) and returns a delivery ID at once.
+SMTP latency and retries therefore stay off the agent's critical path and
+out of the model's hands. A worker thread delivers queued reports through
+the ``email`` guard (see ``resilience.py``):
+
+- If a send fails before anything was delivered (SMTP unreachable, login
+  rejected, breaker open), it is retried with exponential backoff and
+  jitter. After ``EMAIL_SPOOL_MAX_ATTEMPTS`` attempts it is dead-lettered.
+- If a send is partial, the recipients that were reached are recorded. Only
+  the recipients that were not reached are retried.
+- A recipient that bounced is final. Retrying would not change the outcome.
+
+A report waits in the spool until it is delivered or dead-lettered, so a
+restart resumes pending deliveries. SMTP credentials are read from the
+environment at send time and are never stored in the spool.
+"""
+
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+QUEUED = "queued"
+SENDING = "sending"
+SENT = "sent"
+PARTIAL = "partial"
+DEAD = "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    subject TEXT NOT NULL,
+    html_body TEXT NOT NULL,
+    pending TEXT NOT NULL,
+    sent TEXT NOT NULL DEFAULT '[]',
+    failed TEXT NOT NULL DEFAULT '[]',
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt);
+"""
+
+# Delivery callable: (subject, html_body, recipients) -> (sent, failed),
+# where failed holds "recipient (reason)" strings for bounced recipients.
+# Raising means nothing was delivered and the whole send is retried.
+SendFunc = Callable[[str, str, List[str]], Any]
+
+
+class EmailSpool:
+    """SQLite outbox; safe to share between threads and processes."""
+
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = 8,
+        base_delay: float = 30.0,
+        max_delay: float = 3600.0,
+        lease: float = 300.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+        self._clock = clock
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def enqueue(self, subject: str, html_body: str, recipients: List[str]) -> str:
+        """Store a rendered report for delivery and return its delivery ID."""
+        delivery_id = f"em_{uuid.uuid4().hex[:16]}"
+        now = self._clock()
+        self._connect().execute(
+            "INSERT INTO outbox (id, created, updated, subject, html_body, "
+            "pending, status, next_attempt) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                delivery_id,
+                now,
+                now,
+                subject,
+                html_body,
+                json.dumps(recipients),
+                QUEUED,
+                now,
+            ),
+        )
+        return delivery_id
+
+    def claim(self) -> Optional[sqlite3.Row]:
+        """
+        Lease the next due delivery, or return None.
+
+        A lease that is not released (the worker died mid-send) expires, so
+        the delivery is picked up again.
+        """
+        db = self._connect()
+        now = self._clock()
+        while True:
+            row = db.execute(
+                "SELECT * FROM outbox WHERE status IN (?, ?) AND next_attempt <= ? "
+                "ORDER BY next_attempt LIMIT 1",
+                (QUEUED, SENDING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = db.execute(
+                "UPDATE outbox SET status = ?, next_attempt = ?, updated = ? "
+                "WHERE id = ? AND status = ? AND next_attempt = ?",
+                (
+                    SENDING,
+                    now + self.lease,
+                    now,
+                    row["id"],
+                    row["status"],
+                    row["next_attempt"],
+                ),
+            ).rowcount
+            if claimed:
+                return row
+
+    def backoff(self, attempts: int) -> float:
+        """Delay before retry number ``attempts``, jittered in [d/2, d]."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def record_result(
+        self, row: sqlite3.Row, sent: List[str], failed: List[str]
+    ) -> None:
+        """Record a send that delivered to at least some recipients."""
+        all_sent = json.loads(row["sent"]) + sent
+        all_failed = json.loads(row["failed"]) + failed
+        reached = set(sent) | {entry.split(" ", 1)[0] for entry in failed}
+        pending = [r for r in json.loads(row["pending"]) if r not in reached]
+        if pending:
+            # Partially delivered: retry the rest soon, without backoff.
+            self._update(
+                row,
+                QUEUED,
+                pending,
+                all_sent,
+                all_failed,
+                row["attempts"],
+                self._clock(),
+                None,
+            )
+        else:
+            status = PARTIAL if all_failed else SENT
+            self._update(
+                row,
+                status,
+                [],
+                all_sent,
+                all_failed,
+                row["attempts"] + 1,
+                self._clock(),
+                None,
+            )
+
+    def record_failure(self, row: sqlite3.Row, error: str) -> None:
+        """Schedule a retry with backoff, or dead-letter the delivery."""
+        attempts = row["attempts"] + 1
+        if attempts >= self.max_attempts:
+            status, next_attempt = DEAD, self._clock()
+        else:
+            status, next_attempt = QUEUED, self._clock() + self.backoff(attempts)
+        self._update(
+            row,
+            status,
+            json.loads(row["pending"]),
+            json.loads(row["sent"]),
+            json.loads(row["failed"]),
+            attempts,
+            next_attempt,
+            error,
+        )
+
+    def _update(
+        self, row, status, pending, sent, failed, attempts, next_attempt, error
+    ) -> None:
+        self._connect().execute(
+            "UPDATE outbox SET status = ?, pending = ?, sent = ?, failed = ?, "
+            "attempts = ?, next_attempt = ?, last_error = ?, updated = ? "
+            "WHERE id = ?",
+            (
+                status,
+                json.dumps(pending),
+                json.dumps(sent),
+                json.dumps(failed),
+                attempts,
+                next_attempt,
+                error,
+                self._clock(),
+                row["id"],
+            ),
+        )
+
+    def status(self, delivery_id: str) -> Optional[Dict[str, Any]]:
+        """Current state of a delivery, or None for an unknown ID."""
+        row = (
+            self._connect()
+            .execute("SELECT * FROM outbox WHERE id = ?", (delivery_id,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "subject": row["subject"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "sent": json.loads(row["sent"]),
+            "failed": json.loads(row["failed"]),
+            "pending": json.loads(row["pending"]),
+            "next_attempt": row["next_attempt"],
+            "last_error": row["last_error"],
+        }
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """Deliveries that ran out of attempts, oldest first."""
+        rows = (
+            self._connect()
+            .execute("SELECT id FROM outbox WHERE status = ? ORDER BY updated", (DEAD,))
+            .fetchall()
+        )
+        return [self.status(row["id"]) for row in rows]
+
+    def process_one(self, send: SendFunc) -> bool:
+        """Deliver the next due report; returns False when nothing is due."""
+        row = self.claim()
+        if row is None:
+            return False
+        try:
+            sent, failed = send(
+                row["subject"], row["html_body"], json.loads(row["pending"])
+            )
+        except Exception as e:
+            self.record_failure(row, f"{type(e).__name__}: {e}")
+        else:
+            self.record_result(row, sent, failed)
+        return True
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the next queued delivery is due, if any."""
+        row = (
+            self._connect()
+            .execute(
+                "SELECT MIN(next_attempt) AS due FROM outbox WHERE status IN (?, ?)",
+                (QUEUED, SENDING),
+            )
+            .fetchone()
+        )
+        if row["due"] is None:
+            return None
+        return max(0.0, row["due"] - self._clock())
+
+
+class SpoolWorker:
+    """Daemon thread that drains the spool, waking early on new reports."""
+
+    def __init__(self, spool: EmailSpool, send: SendFunc, idle_poll: float = 60.0):
+        self.spool = spool
+        self.send = send
+        self.idle_poll = idle_poll
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="email-spool", daemon=True
+        )
+
+    def start(self) -> "SpoolWorker":
+        self._thread.start()
+        return self
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                while not self._stop.is_set() and self.spool.process_one(self.send):
+                    pass
+                due_in = self.spool.next_due_in()
+            except Exception as e:  # keep the worker alive on spool errors
+                print(f"❌ Email spool worker error: {e}")
+                due_in = None
+            timeout = self.idle_poll if due_in is None else min(due_in, self.idle_poll)
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+
+_spool: Optional[EmailSpool] = None
+_worker: Optional[SpoolWorker] = None
+_spool_lock = threading.Lock()
+
+
+def get_spool(send: SendFunc) -> Optional[EmailSpool]:
+    """
+    The process-wide spool with its worker running, or None when
+    ``EMAIL_SPOOL_PATH`` is not set.
+    """
+    global _spool, _worker
+    path = os.getenv("EMAIL_SPOOL_PATH")
+    if not path:
+        return None
+    with _spool_lock:
+        if _spool is None or _spool.path != path:
+            if _worker is not None:
+                _worker.stop(timeout=5)
+            _spool = EmailSpool(
+                path,
+                max_attempts=int(os.getenv("EMAIL_SPOOL_MAX_ATTEMPTS", "8")),
+                base_delay=float(os.getenv("EMAIL_SPOOL_RETRY_DELAY", "30")),
+                max_delay=float(os.getenv("EMAIL_SPOOL_MAX_RETRY_DELAY", "3600")),
+            )
+            _worker = SpoolWorker(_spool, send).start()
+        return _spool
+
+
+def notify_worker() -> None:
+    """Wake the worker after an enqueue."""
+    if _worker is not None:
+        _worker.notify()
+
+
+def shutdown_spool() -> None:
+    """Stop the worker; queued reports stay in the spool for the next start."""
+    global _spool, _worker
+    with _spool_lock:
+        if _worker is not None:
+            _worker.stop(timeout=5)
+        _spool = _worker = None
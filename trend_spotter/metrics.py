@@ -0,0 +1,328 @@
+# trend_spotter/metrics.py
+"""
+Prometheus metrics for the server, the agents and their outbound calls.
+
+A minimal, dependency-free implementation of counters, gauges and
+histograms, rendered in the Prometheus text format by ``render``. The
+server exposes it at ``/metrics`` (see ``server_metrics.py``).
+
+Recording is lock-free. Each thread increments its own shard of a metric,
+so the request path never waits on another thread; a scrape sums the
+shards. Metrics are defined once at import time, and hot paths bind their
+labels up front (``CACHE_LOOKUPS.labels("session_tokens", "hit")``) so
+recording a value is a dictionary lookup and an addition.
+
+Metrics whose value already lives elsewhere (queue depth, pool counters)
+are read at scrape time through ``function=`` instead of being recorded.
+"""
+
+import math
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import get_ident
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; from fast cache hits to multi-minute report runs.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+Sample = Tuple[str, Dict[str, str], float]
+LabelValues = Tuple[str, ...]
+# A callback returns one value, or a value per tuple of label values
+Callback = Callable[[], Union[float, Dict[LabelValues, float]]]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+class _Value:
+    """A per-thread sharded number: written lock-free, summed when read."""
+
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards: Dict[int, List[float]] = {}
+
+    def add(self, amount: float) -> None:
+        shard = self._shards.get(get_ident())
+        if shard is None:
+            shard = self._shards.setdefault(get_ident(), [0.0])
+        shard[0] += amount
+
+    def get(self) -> float:
+        return sum(shard[0] for shard in list(self._shards.values()))
+
+
+class _CounterChild(_Value):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.add(amount)
+
+
+class _GaugeChild(_Value):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.add(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.add(-amount)
+
+
+class _HistogramChild:
+    """Per-thread bucket counts; the last two slots hold count and sum."""
+
+    __slots__ = ("_bounds", "_shards")
+
+    def __init__(self, bounds: Sequence[float]):
+        self._bounds = bounds
+        self._shards: Dict[int, List[float]] = {}
+
+    def observe(self, value: float) -> None:
+        shard = self._shards.get(get_ident())
+        if shard is None:
+            shard = self._shards.setdefault(
+                get_ident(), [0.0] * (len(self._bounds) + 3)
+            )
+        shard[bisect_left(self._bounds, value)] += 1
+        shard[-2] += 1
+        shard[-1] += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def totals(self) -> List[float]:
+        totals = [0.0] * (len(self._bounds) + 3)
+        for shard in list(self._shards.values()):
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callback] = None,
+        registry: Optional["Registry"] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._children: Dict[LabelValues, object] = {}
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: object):
+        """The child for these label values, created on first use."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _label_dict(self, values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> Iterator[Sample]:
+        if self.function is not None:
+            value = self.function()
+            items = value.items() if isinstance(value, dict) else [((), value)]
+            for values, number in items:
+                yield self.name, self._label_dict(values), float(number)
+            return
+        for values, child in list(self._children.items()):
+            yield self.name, self._label_dict(values), child.get()
+
+
+class Counter(_Metric):
+    """A monotonically increasing count. Name it ``..._total``."""
+
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. requests in flight."""
+
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional["Registry"] = None,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry=registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def samples(self) -> Iterator[Sample]:
+        for values, child in list(self._children.items()):
+            labels = self._label_dict(values)
+            totals = child.totals()
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), totals):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    {**labels, "le": _format_value(bound)},
+                    cumulative,
+                )
+            yield f"{self.name}_count", labels, totals[-2]
+            yield f"{self.name}_sum", labels, totals[-1]
+
+
+class Registry:
+    """The set of metrics rendered by one ``/metrics`` endpoint."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        # Re-registering a name (e.g. a rebuilt app) replaces the old metric
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                    name = f"{name}{{{pairs}}}"
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def render() -> str:
+    """The default registry in the Prometheus text format."""
+    return REGISTRY.render()
+
+
+HTTP_REQUESTS = Counter(
+    "trend_spotter_http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "trend_spotter_http_request_duration_seconds",
+    "HTTP request latency, until the response body was sent.",
+    ("method", "route"),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "trend_spotter_http_requests_in_flight",
+    "HTTP requests being served.",
+)
+RUNS_IN_FLIGHT = Gauge(
+    "trend_spotter_agent_runs_in_flight",
+    "Agent runs (/run, /run_sse, /run_live) being served.",
+)
+STAGE_DURATION = Histogram(
+    "trend_spotter_stage_duration_seconds",
+    "Duration of agent runs, model calls and tool calls.",
+    ("kind", "name"),
+)
+OUTBOUND_DURATION = Histogram(
+    "trend_spotter_outbound_duration_seconds",
+    "Latency of calls to external services (Reddit, SMTP, Google).",
+    ("target", "outcome"),
+)
+CACHE_LOOKUPS = Counter(
+    "trend_spotter_cache_lookups_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result"),
+)
+SESSION_HISTORY_BYTES = Histogram(
+    "trend_spotter_session_history_bytes",
+    "Stored size of a session's events at the start of a run, after compaction.",
+    buckets=(4096, 16384, 65536, 131072, 262144, 524288, 1048576, 4194304),
+)
+SESSION_HISTORY_TOKENS = Histogram(
+    "trend_spotter_session_history_tokens",
+    "Estimated tokens of history sent with a run's model calls, after compaction.",
+    buckets=(1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000, 256000),
+)
+SESSION_COMPACTED_BYTES = Counter(
+    "trend_spotter_session_compacted_bytes_total",
+    "Bytes removed from session histories by compaction.",
+)
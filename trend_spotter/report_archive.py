@@ -0,0 +1,139 @@
+# trend_spotter/report_archive.py
+"""
+Content-addressed archive of rendered trend reports.
+
+Each report page is stored once, gzip-compressed, under the SHA-256 of its
+HTML. Identical reports therefore share a single file, and a report's
+address never changes while its content stays the same. The authenticated
+server serves archived reports at ``/reports/<digest>``:
+
+- The precompressed bytes are sent as they are to clients that accept
+  gzip, and decompressed for clients that don't.
+- The digest is the ETag, and the response is marked ``immutable``, so
+  browsers never revalidate a report they already have.
+
+With ``REPORT_ARCHIVE_DIR`` set, every emailed report is archived. With
+``EMAIL_REPORT_MODE=link`` as well, emails carry a short summary and a link
+to the archived page instead of the full report.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+# Archived reports never change, so caches may keep them for a year without
+# revalidating. "private" because the server puts them behind sign-in.
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+class ReportArchive:
+    """Gzip files named by content hash, fanned out by digest prefix."""
+
+    def __init__(self, root: str, compresslevel: int = 9):
+        self.root = root
+        self.compresslevel = compresslevel
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.html.gz")
+
+    def store(self, html: str) -> str:
+        """Archive ``html`` and return its digest; existing copies are kept."""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # mtime=0 keeps the compressed bytes identical for identical reports.
+        compressed = gzip.compress(data, self.compresslevel, mtime=0)
+        # Write to a temporary file and rename, so readers never see a
+        # partial report even if two workers archive it at the same time.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(compressed)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return digest
+
+    def load_compressed(self, digest: str) -> Optional[bytes]:
+        """The gzip bytes of an archived report, or None if unknown."""
+        if not _DIGEST.fullmatch(digest):
+            return None
+        try:
+            with open(self.path_for(digest), "rb") as archived:
+                return archived.read()
+        except FileNotFoundError:
+            return None
+
+    def load(self, digest: str) -> Optional[str]:
+        """The HTML of an archived report, or None if unknown."""
+        compressed = self.load_compressed(digest)
+        if compressed is None:
+            return None
+        return gzip.decompress(compressed).decode("utf-8")
+
+
+def get_archive() -> Optional[ReportArchive]:
+    """The archive at ``REPORT_ARCHIVE_DIR``, or None when not configured."""
+    root = os.getenv("REPORT_ARCHIVE_DIR")
+    return ReportArchive(root) if root else None
+
+
+def report_url(digest: str) -> str:
+    """Absolute link to an archived report on the authenticated server."""
+    base_url = os.getenv("REPORT_BASE_URL") or os.getenv(
+        "GOOGLE_OAUTH2_REDIRECT_BASE_URL", "http://localhost:8080"
+    )
+    return f"{base_url.rstrip('/')}/reports/{digest}"
+
+
+def _etag_matches(if_none_match: str, etags) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) in etags:
+            return True
+    return False
+
+
+def add_report_routes(app, archive: ReportArchive) -> None:
+    """Serve archived reports at ``GET /reports/{digest}``."""
+    from fastapi import HTTPException, Request, Response
+
+    @app.get("/reports/{digest}")
+    async def archived_report(digest: str, request: Request):
+        """Serve an archived report, precompressed when the client allows."""
+        compressed = archive.load_compressed(digest)
+        if compressed is None:
+            raise HTTPException(status_code=404, detail="Report not found")
+
+        # Each encoding is its own representation, so each gets its own
+        # strong ETag; a conditional request may match either.
+        identity_etag, gzip_etag = f'"{digest}"', f'"{digest}-gzip"'
+        accepts_gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+        etag = gzip_etag if accepts_gzip else identity_etag
+        headers = {
+            "ETag": etag,
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, (identity_etag, gzip_etag)):
+            return Response(status_code=304, headers=headers)
+
+        if accepts_gzip:
+            headers["Content-Encoding"] = "gzip"
+            body = compressed
+        else:
+            body = gzip.decompress(compressed)
+        return Response(body, media_type="text/html; charset=utf-8", headers=headers)
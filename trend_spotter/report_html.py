@@ -0,0 +1,258 @@
+# trend_spotter/report_html.py
+"""
+Single-pass markdown-to-HTML renderer for trend reports.
+
+The renderer is built for the report format defined in ``prompt.py``, not
+for general Markdown:
+
+    **Report Date Range:** June 10, 2025 - June 17, 2025
+
+    **🔥 Top 5 Trends for Agent Developers**
+    1.  **Trend Name**: One or two sentences that may wrap onto
+        indented continuation lines. **(Source: https://...)**
+        * **Developer Impact**: ...
+        * **Prioritization Rationale**: ...
+
+It reads the input once, line by line, and writes HTML as it goes:
+
+- ``#`` headings and lines that are entirely bold become section headings.
+- Numbered items become ``<ol>`` entries. Their ``*``/``-`` bullets become
+  a nested ``<ul>``, and indented lines continue the current item or
+  bullet.
+- Other lines become paragraphs.
+
+Inline markup (``**bold**``, ``[text](url)`` and bare ``http(s)`` URLs) is
+tokenized by one regular expression per line. Everything else is
+HTML-escaped, and only http(s) URLs become links. The running time is
+linear in the input size.
+"""
+
+import re
+from html import escape
+from typing import List, Optional
+
+_HEADING = re.compile(r"(#{1,6})\s+(.+)")
+_ORDERED = re.compile(r"(\d{1,9})[.)]\s+(.*)")
+_BULLET = re.compile(r"[*+-]\s+(.*)")
+# Link text and link URLs stop at any bracket, so the scans started at
+# different ``[`` never overlap: a line of unclosed ``[`` (or of
+# ``[x](https://``) is matched in linear time, not quadratic.
+_INLINE = re.compile(
+    r"\*\*"
+    r"|\[([^\[\]\n]+)\]\((https?://[^\s()\"'\[\]]+)\)"
+    r"|(https?://[^\s\"'()\[\]]+)"
+)
+# Trailing punctuation that ends a sentence rather than a bare URL.
+_URL_TRAILER = ".,;:!?*"
+
+# Bullet labels from the report format, mapped to the template's classes.
+_BULLET_CLASSES = (
+    ("**Developer Impact", "impact"),
+    ("**Prioritization Rationale", "rationale"),
+)
+
+
+def render_inline(text: str) -> str:
+    """Escape ``text`` and render bold, markdown links and bare URLs."""
+    # Escaping first is safe for the tokens: ``&`` stays valid inside
+    # URLs (as ``&amp;``) and quotes and brackets cannot appear in them.
+    bold = False
+
+    def replace(match) -> str:
+        nonlocal bold
+        if match.group(2):
+            return (
+                f'<a class="source-link" href="{match.group(2)}">{match.group(1)}</a>'
+            )
+        url = match.group(3)
+        if url:
+            trimmed = url.rstrip(_URL_TRAILER)
+            return (
+                f'<a class="source-link" href="{trimmed}">{trimmed}</a>'
+                + url[len(trimmed) :]
+            )
+        bold = not bold
+        return "<strong>" if bold else "</strong>"
+
+    html = _INLINE.sub(replace, escape(text, quote=False))
+    if bold:
+        # An unpaired trailing ``**`` is kept as literal text.
+        cut = html.rfind("<strong>")
+        html = html[:cut] + "**" + html[cut + len("<strong>") :]
+    return html
+
+
+def _section_heading(stripped: str) -> Optional[str]:
+    """Text of a line that is a single bold span, e.g. ``**🔥 Top 5...**``."""
+    if (
+        len(stripped) > 4
+        and stripped.startswith("**")
+        and stripped.endswith("**")
+        and "**" not in stripped[2:-2]
+    ):
+        return stripped[2:-2]
+    return None
+
+
+class _Renderer:
+    """Line-at-a-time state machine; see the module docstring."""
+
+    def __init__(self) -> None:
+        self.out: List[str] = []
+        self.paragraph: List[str] = []
+        self.text: List[str] = []  # lines of the open item or bullet
+        self.ordered_open = False
+        self.item_open = False
+        self.bullets_open = False
+        self.bullet_open = False
+        self.top_level_bullets = False
+
+    # -- flushing and closing -------------------------------------------
+
+    def flush_text(self) -> None:
+        if self.text:
+            self.out.append(render_inline(" ".join(self.text)))
+            self.text = []
+
+    def flush_paragraph(self) -> None:
+        if self.paragraph:
+            lines = [render_inline(line) for line in self.paragraph]
+            self.out.append("<p>" + "<br>\n".join(lines) + "</p>")
+            self.paragraph = []
+
+    def close_bullet(self) -> None:
+        if self.bullet_open:
+            self.flush_text()
+            self.out.append("</li>")
+            self.bullet_open = False
+
+    def close_bullets(self) -> None:
+        self.close_bullet()
+        if self.bullets_open:
+            self.out.append("</ul>")
+            self.bullets_open = False
+            self.top_level_bullets = False
+
+    def close_item(self) -> None:
+        self.close_bullets()
+        if self.item_open:
+            self.flush_text()
+            self.out.append("</li>")
+            self.item_open = False
+
+    def close_blocks(self) -> None:
+        self.flush_paragraph()
+        self.close_item()
+        self.close_bullets()
+        if self.ordered_open:
+            self.out.append("</ol>")
+            self.ordered_open = False
+
+    # -- line handlers ----------------------------------------------------
+
+    def heading(self, level: int, text: str, css_class: str = "") -> None:
+        self.close_blocks()
+        attrs = f' class="{css_class}"' if css_class else ""
+        self.out.append(f"<h{level}{attrs}>{render_inline(text)}</h{level}>")
+
+    def ordered_item(self, number: str, text: str) -> None:
+        self.flush_paragraph()
+        self.close_item()
+        if self.top_level_bullets:
+            self.close_bullets()
+        if not self.ordered_open:
+            start = "" if number == "1" else f' start="{int(number)}"'
+            self.out.append(f"<ol{start}>")
+            self.ordered_open = True
+        self.out.append('<li class="trend-item">')
+        self.item_open = True
+        self.text = [text]
+
+    def bullet(self, text: str, indent: int) -> None:
+        self.flush_paragraph()
+        nested = self.item_open and (indent > 0 or self.bullets_open)
+        if not nested and self.ordered_open:
+            self.close_blocks()
+        self.close_bullet()
+        if not self.bullets_open:
+            self.flush_text()
+            self.out.append("<ul>")
+            self.bullets_open = True
+            self.top_level_bullets = not nested
+        css_class = next(
+            (css for prefix, css in _BULLET_CLASSES if text.startswith(prefix)), ""
+        )
+        attrs = f' class="{css_class}"' if css_class else ""
+        self.out.append(f"<li{attrs}>")
+        self.bullet_open = True
+        self.text = [text]
+
+    def plain(self, stripped: str, indent: int, after_blank: bool) -> None:
+        if (self.bullet_open or self.item_open) and (indent > 0 or not after_blank):
+            self.text.append(stripped)
+            return
+        if self.item_open or self.bullets_open or self.ordered_open:
+            self.close_blocks()
+        self.paragraph.append(stripped)
+
+    def feed(self, markdown: str) -> str:
+        after_blank = True
+        for raw_line in markdown.splitlines():
+            line = raw_line.expandtabs(4).rstrip()
+            stripped = line.lstrip()
+            if not stripped:
+                self.flush_paragraph()
+                self.close_bullet()
+                after_blank = True
+                continue
+            indent = len(line) - len(stripped)
+
+            after_blank, was_blank = False, after_blank
+            if indent < 4:
+                match = _HEADING.fullmatch(stripped)
+                if match:
+                    self.heading(len(match.group(1)), match.group(2))
+                    continue
+                section = _section_heading(stripped) if indent == 0 else None
+                if section is not None:
+                    self.heading(2, section, "emoji")
+                    continue
+                match = _ORDERED.fullmatch(stripped)
+                if match:
+                    self.ordered_item(match.group(1), match.group(2))
+                    continue
+            match = _BULLET.fullmatch(stripped)
+            if match:
+                self.bullet(match.group(1), indent)
+            else:
+                self.plain(stripped, indent, was_blank)
+
+        self.close_blocks()
+        return "\n".join(self.out)
+
+
+def render_report_html(markdown: str) -> str:
+    """Render a report in the ``prompt.py`` format to an HTML fragment."""
+    return _Renderer().feed(markdown)
+
+
+def report_headlines(markdown: str) -> List[str]:
+    """
+    Plain-text headlines of the numbered trends, for summaries.
+
+    The headline is the item's leading ``**bold**`` span without its
+    trailing colon, or the item text itself when it has none.
+    """
+    headlines = []
+    for line in markdown.splitlines():
+        stripped = line.expandtabs(4).rstrip()
+        if len(stripped) - len(stripped.lstrip()) >= 4:
+            continue
+        match = _ORDERED.fullmatch(stripped.lstrip())
+        if not match:
+            continue
+        text = match.group(2)
+        if text.startswith("**") and "**" in text[2:]:
+            text = text[2 : text.index("**", 2)]
+        headlines.append(text.strip().rstrip(":").strip())
+    return headlines
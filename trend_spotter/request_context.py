@@ -0,0 +1,84 @@
+# trend_spotter/request_context.py
+"""
+Per-request context (the signed-in user) for agents and tools.
+
+The context lives in a ``contextvars.ContextVar``, not in thread-local
+storage:
+
+- Each asyncio task sees the value of the request that created it, so
+  concurrent requests on one event loop never see each other's user.
+- ``resilience.CallGuard`` runs synchronous tools in a copy of the
+  caller's context, and ``asyncio.to_thread`` does the same, so the value
+  follows a tool onto its worker thread. Use ``run_in_context`` for any
+  other executor.
+- ``request_scope`` resets the previous value on exit, so nothing carries
+  over to the next request served by the same task or thread.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+
+
+@dataclass(frozen=True)
+class RequestContext:
+    """What tools may know about the request they are running for."""
+
+    user_email: Optional[str] = None
+    user_name: Optional[str] = None
+
+
+_current: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar(
+    "trend_spotter_request_context", default=None
+)
+
+
+def current_request() -> Optional[RequestContext]:
+    """The context of the request being served, or None outside one."""
+    return _current.get()
+
+
+def current_user_email() -> Optional[str]:
+    """Email of the signed-in user of the current request, if any."""
+    context = _current.get()
+    return context.user_email if context else None
+
+
+def set_request_context(
+    context: Optional[RequestContext],
+) -> "contextvars.Token[Optional[RequestContext]]":
+    """Set the context without a scope; pass the token to ``reset_request_context``."""
+    return _current.set(context)
+
+
+def reset_request_context(token: "contextvars.Token[Optional[RequestContext]]") -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def request_scope(
+    user_email: Optional[str] = None, user_name: Optional[str] = None
+) -> Iterator[RequestContext]:
+    """Make a request context current for the duration of the block."""
+    context = RequestContext(user_email=user_email, user_name=user_name)
+    token = set_request_context(context)
+    try:
+        yield context
+    finally:
+        reset_request_context(token)
+
+
+def run_in_context(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Bind ``func`` to the caller's context, for executors that don't copy it.
+
+    Example:
+        loop.run_in_executor(pool, run_in_context(tool), arg)
+    """
+    context = contextvars.copy_context()
+
+    def bound(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+
+    return bound
@@ -0,0 +1,385 @@
+# trend_spotter/resilience.py
+"""
+Call policies for sub-agents and tools.
+
+Every outbound call made on behalf of the orchestrator (a sub-agent run
+through ``AgentTool`` or a plain function tool such as the Reddit search)
+goes through a named ``CallGuard`` that enforces:
+
+1. A deadline - a slow Gemini, search or Reddit call can no longer stall
+   the whole orchestrator. The deadline abandons the call, it cannot stop
+   it, so side effects that must finish (the email spool's deliveries)
+   use ``call_to_completion``, which keeps only the circuit breaker.
+2. Hedging - once enough latency samples are collected, a duplicate
+   request is fired when a call crosses its p95 latency and the first
+   answer wins. Hedging is disabled for side-effecting calls (email).
+3. A circuit breaker - after repeated failures (e.g. bad Reddit
+   credentials) calls are short-circuited for a cool-down period so the
+   report degrades gracefully instead of waiting on a dead source.
+
+Policies can be tuned per guard with environment variables, e.g.
+``TREND_SPOTTER_POLICY_REDDIT_TIMEOUT=10`` or
+``TREND_SPOTTER_POLICY_EMAIL_AGENT_HEDGE=false``.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from google.adk.tools.agent_tool import AgentTool
+
+from .metrics import OUTBOUND_DURATION
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit breaker is open."""
+
+
+class CallTimeoutError(Exception):
+    """Raised when a call does not complete within its deadline."""
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    """Deadline, hedging and circuit-breaker settings for one guard."""
+
+    timeout: float = 60.0
+    hedge: bool = True
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 20
+    failure_threshold: int = 5
+    reset_timeout: float = 60.0
+
+
+# Defaults per guard name. Sub-agent guards are named after the agent,
+# function tool guards after the source they talk to.
+DEFAULT_POLICIES: Dict[str, CallPolicy] = {
+    "google_search_agent": CallPolicy(timeout=90.0),
+    "reddit_agent": CallPolicy(timeout=90.0),
+    "email_agent": CallPolicy(timeout=120.0, hedge=False),
+    "reddit": CallPolicy(timeout=30.0),
+    "email": CallPolicy(timeout=60.0, hedge=False),
+}
+
+
+def _env_override(name: str, policy: CallPolicy) -> CallPolicy:
+    """Apply ``TREND_SPOTTER_POLICY_<NAME>_<FIELD>`` overrides to a policy."""
+    prefix = f"TREND_SPOTTER_POLICY_{name.upper()}_"
+    overrides: Dict[str, Any] = {}
+    for field, cast in (
+        ("timeout", float),
+        ("hedge_quantile", float),
+        ("hedge_min_samples", int),
+        ("failure_threshold", int),
+        ("reset_timeout", float),
+    ):
+        value = os.getenv(prefix + field.upper())
+        if value:
+            overrides[field] = cast(value)
+    hedge = os.getenv(prefix + "HEDGE")
+    if hedge:
+        overrides["hedge"] = hedge.lower() in ("1", "true", "yes")
+    return replace(policy, **overrides) if overrides else policy
+
+
+class LatencyWindow:
+    """Sliding window of recent successful call latencies (seconds)."""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the ``q`` quantile of the window, or None when empty."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open circuit breaker.
+
+    The breaker opens after ``failure_threshold`` consecutive failures and
+    rejects calls until ``reset_timeout`` seconds have passed. It then lets
+    a single trial call through; success closes it, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.HALF_OPEN:
+                # Only one trial call; re-open until it reports back.
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                return True
+            return state == self.CLOSED
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+# Worker threads for synchronous tools so that deadlines and hedges can be
+# enforced. A timed-out thread is abandoned, not killed.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TREND_SPOTTER_TOOL_WORKERS", "16")),
+    thread_name_prefix="trend-spotter-tool",
+)
+
+
+class CallGuard:
+    """Applies a ``CallPolicy`` to sync or async calls for one named source."""
+
+    def __init__(self, name: str, policy: CallPolicy):
+        self.name = name
+        self.policy = policy
+        self.latencies = LatencyWindow()
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a hedged duplicate fires, or None to not hedge."""
+        if not self.policy.hedge or len(self.latencies) < self.policy.hedge_min_samples:
+            return None
+        delay = self.latencies.quantile(self.policy.hedge_quantile)
+        if delay is None or delay >= self.policy.timeout:
+            return None
+        return delay
+
+    def _before_call(self) -> float:
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                f"{self.name} is temporarily disabled after repeated failures"
+            )
+        return time.monotonic()
+
+    def _after_call(self, started: float, error: Optional[BaseException]) -> None:
+        elapsed = time.monotonic() - started
+        if error is None:
+            self.latencies.record(elapsed)
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        OUTBOUND_DURATION.labels(self.name, "error" if error else "ok").observe(elapsed)
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a synchronous callable under this guard's policy."""
+        started = self._before_call()
+        try:
+            result = self._call_with_deadline(func, args, kwargs)
+        except BaseException as e:
+            self._after_call(started, e)
+            raise
+        self._after_call(started, None)
+        return result
+
+    def call_to_completion(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a synchronous callable in the caller's thread, without deadline
+        or hedging; the circuit breaker and metrics still apply.
+        """
+        started = self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self._after_call(started, e)
+            raise
+        self._after_call(started, None)
+        return result
+
+    @staticmethod
+    def _submit(func, args, kwargs):
+        # Run in a copy of the caller's context so context variables
+        # survive the hop onto the worker thread.
+        context = contextvars.copy_context()
+        return _executor.submit(context.run, func, *args, **kwargs)
+
+    def _call_with_deadline(self, func, args, kwargs) -> Any:
+        deadline = time.monotonic() + self.policy.timeout
+        futures = {self._submit(func, args, kwargs)}
+        hedge_delay = self.hedge_delay()
+        if hedge_delay is not None:
+            done, _ = wait(futures, timeout=hedge_delay)
+            if not done:
+                print(f"⏱️  {self.name} exceeded p95 ({hedge_delay:.2f}s), hedging...")
+                futures.add(self._submit(func, args, kwargs))
+
+        last_error: Optional[BaseException] = None
+        while futures:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, futures = wait(
+                futures, timeout=remaining, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+        if not futures and last_error is not None:
+            raise last_error
+        raise CallTimeoutError(
+            f"{self.name} did not respond within {self.policy.timeout:.0f}s"
+        )
+
+    async def call_async(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a coroutine (created by ``factory``) under this guard's policy."""
+        started = self._before_call()
+        try:
+            result = await asyncio.wait_for(
+                self._hedged_async(factory), timeout=self.policy.timeout
+            )
+        except asyncio.TimeoutError as e:
+            self._after_call(started, e)
+            raise CallTimeoutError(
+                f"{self.name} did not respond within {self.policy.timeout:.0f}s"
+            ) from e
+        except BaseException as e:
+            self._after_call(started, e)
+            raise
+        self._after_call(started, None)
+        return result
+
+    async def _hedged_async(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        tasks = {asyncio.ensure_future(factory())}
+        try:
+            hedge_delay = self.hedge_delay()
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    print(
+                        f"⏱️  {self.name} exceeded p95 ({hedge_delay:.2f}s), "
+                        f"hedging..."
+                    )
+                    tasks.add(asyncio.ensure_future(factory()))
+
+            last_error: Optional[BaseException] = None
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+_guards: Dict[str, CallGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(name: str) -> CallGuard:
+    """Return the shared guard for ``name``, creating it on first use."""
+    with _guards_lock:
+        guard = _guards.get(name)
+        if guard is None:
+            policy = _env_override(name, DEFAULT_POLICIES.get(name, CallPolicy()))
+            guard = _guards[name] = CallGuard(name, policy)
+        return guard
+
+
+def guarded_tool(name: str, error_message: str = "Error calling {name}: {error}"):
+    """
+    Decorate a synchronous ADK function tool with the ``name`` guard.
+
+    The wrapped tool keeps its signature and docstring (ADK builds the
+    function declaration from them). Any exception, timeout or open circuit
+    is turned into ``error_message`` so the model gets a readable result.
+    """
+
+    def decorator(func: Callable[..., str]) -> Callable[..., str]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> str:
+            try:
+                return get_guard(name).call(func, *args, **kwargs)
+            except Exception as e:
+                message = error_message.format(name=name, error=e)
+                print(f"❌ {message}")
+                return message
+
+        return wrapper
+
+    return decorator
+
+
+class GuardedAgentTool(AgentTool):
+    """
+    ``AgentTool`` that runs its sub-agent under the guard named after it.
+
+    When the sub-agent times out or its circuit is open, the orchestrator
+    receives a short notice instead of an exception so it can finish the
+    report with the remaining sources.
+    """
+
+    async def run_async(self, *, args: dict[str, Any], tool_context) -> Any:
+        parent_run = super().run_async
+        try:
+            return await get_guard(self.name).call_async(
+                lambda: parent_run(args=args, tool_context=tool_context)
+            )
+        except Exception as e:
+            print(f"❌ {self.name} failed: {e}")
+            return (
+                f"{self.name} is unavailable ({e}). Continue without this "
+                f"source and mention the gap in the report."
+            )
@@ -0,0 +1,310 @@
+# trend_spotter/smtp_pool.py
+"""
+Shared, long-lived SMTP connections for report delivery.
+
+Opening a connection for every report costs a TCP connect, the greeting,
+EHLO, a STARTTLS handshake and AUTH before the first byte of mail. The
+pool keeps authenticated sessions open, so a warm send is a single
+MAIL/RCPT/DATA transaction:
+
+- Connections are shared across reports and users, one pool per
+  (server, port, sender). At most ``SMTP_POOL_SIZE`` are open; callers
+  beyond that wait for a free one.
+- A background thread sends NOOP on idle connections every
+  ``SMTP_KEEPALIVE_INTERVAL`` seconds, so servers with short idle timeouts
+  do not drop them. Connections idle for longer than ``SMTP_MAX_IDLE`` are
+  closed.
+- A connection that has been idle since the last keepalive is checked with
+  NOOP before use. Dead connections are replaced transparently. If the
+  server drops a warm connection mid-send, the message is retried once on
+  a fresh connection.
+"""
+
+import atexit
+import os
+import smtplib
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from .metrics import CACHE_LOOKUPS, OUTBOUND_DURATION
+
+# A send on a pooled connection is a hit; opening a new one is a miss
+_CONNECTION_HIT = CACHE_LOOKUPS.labels("smtp_connections", "hit")
+_CONNECTION_MISS = CACHE_LOOKUPS.labels("smtp_connections", "miss")
+_SEND_OK = OUTBOUND_DURATION.labels("smtp", "ok")
+_SEND_ERROR = OUTBOUND_DURATION.labels("smtp", "error")
+
+
+@dataclass
+class _PooledConnection:
+    smtp: smtplib.SMTP
+    last_used: float = field(default_factory=time.monotonic)  # last send
+    last_checked: float = field(default_factory=time.monotonic)  # send or NOOP
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of authenticated SMTP sessions for one sender."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        max_size: int = 4,
+        keepalive_interval: float = 30.0,
+        max_idle: float = 300.0,
+        timeout: float = 30.0,
+        starttls: bool = True,
+        smtp_factory: Callable[..., smtplib.SMTP] = smtplib.SMTP,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_size = max_size
+        self.keepalive_interval = keepalive_interval
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.starttls = starttls
+        self._smtp_factory = smtp_factory
+        self._clock = clock
+        self._idle: Deque[_PooledConnection] = deque()
+        self._open = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._keepalive_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {"connects": 0, "reuses": 0, "reconnects": 0, "noops": 0}
+        self._stats_lock = threading.Lock()
+
+    # -- connection lifecycle -------------------------------------------
+
+    def _connect(self) -> _PooledConnection:
+        smtp = self._smtp_factory(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()  # Enable security
+            smtp.login(self.username, self.password)
+        except Exception:
+            self._quit(smtp)
+            raise
+        self._count("connects")
+        _CONNECTION_MISS.inc()
+        now = self._clock()
+        return _PooledConnection(smtp, last_used=now, last_checked=now)
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    @staticmethod
+    def _quit(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _is_alive(self, conn: _PooledConnection) -> bool:
+        self._count("noops")
+        try:
+            return conn.smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self) -> _PooledConnection:
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("SMTP connection pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()  # most recently used first
+                    break
+                if self._open < self.max_size:
+                    self._open += 1
+                    conn = None
+                    break
+                self._condition.wait()
+
+        if conn is None:
+            try:
+                return self._connect()
+            except Exception:
+                self._discard(None)
+                raise
+
+        # Not covered by a recent keepalive: check before trusting it.
+        # A keepalive_interval of 0 disables NOOPs entirely.
+        idle_for = self._clock() - conn.last_checked
+        if self.keepalive_interval > 0 and idle_for >= self.keepalive_interval:
+            if not self._is_alive(conn):
+                self._count("reconnects")
+                self._quit(conn.smtp)
+                try:
+                    return self._connect()
+                except Exception:
+                    self._discard(None)
+                    raise
+        self._count("reuses")
+        _CONNECTION_HIT.inc()
+        return conn
+
+    def _release(self, conn: _PooledConnection) -> None:
+        conn.last_used = conn.last_checked = self._clock()
+        with self._condition:
+            if self._closed:
+                self._open -= 1
+                self._quit(conn.smtp)
+            else:
+                self._idle.append(conn)
+                self._start_keepalive()
+            self._condition.notify()
+
+    def _discard(self, conn: Optional[_PooledConnection]) -> None:
+        if conn is not None:
+            self._quit(conn.smtp)
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+    # -- public API -----------------------------------------------------
+
+    def send(
+        self,
+        from_addr: str,
+        to_addrs: Union[str, List[str]],
+        message: Union[str, bytes],
+    ) -> Dict[str, Tuple[int, bytes]]:
+        """
+        Send one message on a pooled connection.
+
+        Returns the refused recipients, as ``smtplib.SMTP.sendmail`` does.
+        Rejections by the server (``SMTPRecipientsRefused``,
+        ``SMTPDataError``...) are raised unchanged and leave the connection
+        in the pool. If a warm connection turns out to be dropped, the send
+        is retried once on a new connection.
+        """
+        for attempt in range(2):
+            started = time.perf_counter()
+            conn = self._acquire()
+            try:
+                refused = conn.smtp.sendmail(from_addr, to_addrs, message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self._discard(conn)
+                _SEND_ERROR.observe(time.perf_counter() - started)
+                if attempt:
+                    raise
+                self._count("reconnects")
+                continue
+            except smtplib.SMTPException:
+                # Server rejected this message; the session is still usable.
+                self._release(conn)
+                _SEND_ERROR.observe(time.perf_counter() - started)
+                raise
+            except BaseException:
+                self._discard(conn)
+                _SEND_ERROR.observe(time.perf_counter() - started)
+                raise
+            self._release(conn)
+            _SEND_OK.observe(time.perf_counter() - started)
+            return refused
+        raise AssertionError("unreachable")
+
+    def warm(self) -> None:
+        """Open and log in one connection ahead of the first send."""
+        self._release(self._acquire())
+
+    def keepalive(self) -> None:
+        """NOOP idle connections and close the ones idle for too long."""
+        now = self._clock()
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn in idle:
+            if now - conn.last_used >= self.max_idle or not self._is_alive(conn):
+                self._discard(conn)
+                continue
+            conn.last_checked = self._clock()
+            with self._condition:
+                if self._closed:
+                    self._open -= 1
+                    self._quit(conn.smtp)
+                else:
+                    self._idle.appendleft(conn)
+                self._condition.notify()
+
+    def _start_keepalive(self) -> None:
+        # Called with the condition held.
+        if self._keepalive_thread is None and self.keepalive_interval > 0:
+            self._keepalive_thread = threading.Thread(
+                target=self._keepalive_loop,
+                name=f"smtp-keepalive-{self.host}",
+                daemon=True,
+            )
+            self._keepalive_thread.start()
+
+    def _keepalive_loop(self) -> None:
+        while not self._stop.wait(self.keepalive_interval):
+            self.keepalive()
+
+    def close(self) -> None:
+        """Close idle connections; in-use ones are closed on release."""
+        self._stop.set()
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for conn in idle:
+            self._quit(conn.smtp)
+
+    @property
+    def size(self) -> int:
+        """Number of open connections (idle and in use)."""
+        return self._open
+
+
+_pools: Dict[Tuple[str, int, str], SMTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(host: str, port: int, username: str, password: str) -> SMTPConnectionPool:
+    """Return the shared pool for a sender, creating it on first use."""
+    key = (host, port, username)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool.password != password:
+            # Credentials were rotated: drain the old sessions.
+            pool.close()
+            pool = None
+        if pool is None:
+            pool = SMTPConnectionPool(
+                host,
+                port,
+                username,
+                password,
+                max_size=int(os.getenv("SMTP_POOL_SIZE", "4")),
+                keepalive_interval=float(os.getenv("SMTP_KEEPALIVE_INTERVAL", "30")),
+                max_idle=float(os.getenv("SMTP_MAX_IDLE", "300")),
+                starttls=os.getenv("SMTP_STARTTLS", "true").lower() != "false",
+            )
+            _pools[key] = pool
+        return pool
+
+
+@atexit.register
+def close_pools() -> None:
+    """Close every shared pool (QUIT idle sessions)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,114 @@
+# trend_spotter/stage_timing.py
+"""
+Per-stage wall-clock timings for an agent run.
+
+``StageTimingPlugin`` is an ADK plugin that measures every agent run, model
+call and tool call, including sub-agents executed through ``AgentTool``.
+Stages are named ``agent:<name>``, ``model:<agent name>`` and
+``tool:<tool name>``.
+
+``MetricsPlugin`` measures the same stages for the server's ``/metrics``
+endpoint, as a histogram instead of a list of samples.
+"""
+
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+from .metrics import STAGE_DURATION
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    index = min(len(ordered) - 1, int(q * len(ordered)))
+    return ordered[index]
+
+
+class StageTimingPlugin(BasePlugin):
+    """Collects durations (seconds) per pipeline stage."""
+
+    def __init__(self, name: str = "trend_spotter_stage_timing"):
+        super().__init__(name=name)
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self._started: Dict[Any, float] = {}
+
+    def reset(self) -> None:
+        self.durations.clear()
+        self._started.clear()
+
+    def _start(self, call_id: Any) -> None:
+        self._started[call_id] = time.perf_counter()
+
+    def _stop(self, call_id: Any, stage: str) -> None:
+        started = self._started.pop(call_id, None)
+        if started is not None:
+            self.durations[stage].append(time.perf_counter() - started)
+
+    async def before_agent_callback(self, *, agent, callback_context) -> None:
+        self._start(("agent", callback_context.invocation_id, agent.name))
+
+    async def after_agent_callback(self, *, agent, callback_context) -> None:
+        self._stop(
+            ("agent", callback_context.invocation_id, agent.name),
+            f"agent:{agent.name}",
+        )
+
+    async def before_model_callback(self, *, callback_context, llm_request) -> None:
+        self._start(
+            ("model", callback_context.invocation_id, callback_context.agent_name)
+        )
+
+    async def after_model_callback(self, *, callback_context, llm_response) -> None:
+        if llm_response.partial:
+            return None
+        self._stop(
+            ("model", callback_context.invocation_id, callback_context.agent_name),
+            f"model:{callback_context.agent_name}",
+        )
+
+    async def on_event_callback(self, *, invocation_context, event) -> None:
+        # A model call answered by an earlier plugin (e.g. a cassette replay)
+        # skips after_model_callback; its response event closes the stage.
+        if not event.partial and event.author:
+            self._stop(
+                ("model", invocation_context.invocation_id, event.author),
+                f"model:{event.author}",
+            )
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context) -> None:
+        self._start(("tool", tool_context.function_call_id))
+
+    async def after_tool_callback(
+        self, *, tool, tool_args, tool_context, result
+    ) -> Optional[Any]:
+        self._stop(("tool", tool_context.function_call_id), f"tool:{tool.name}")
+        return None
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, total, mean, p50, p95 and max (seconds) for every stage."""
+        stats = {}
+        for stage, samples in sorted(self.durations.items()):
+            ordered = sorted(samples)
+            stats[stage] = {
+                "count": len(ordered),
+                "total": sum(ordered),
+                "mean": sum(ordered) / len(ordered),
+                "p50": _percentile(ordered, 0.50),
+                "p95": _percentile(ordered, 0.95),
+                "max": ordered[-1],
+            }
+        return stats
+
+
+class MetricsPlugin(StageTimingPlugin):
+    """Records stage durations in ``trend_spotter_stage_duration_seconds``."""
+
+    def __init__(self, name: str = "trend_spotter_metrics"):
+        super().__init__(name=name)
+
+    def _stop(self, call_id: Any, stage: str) -> None:
+        started = self._started.pop(call_id, None)
+        if started is not None:
+            kind, _, name = stage.partition(":")
+            STAGE_DURATION.labels(kind, name).observe(time.perf_counter() - started)
@@ -1,30 +1,43 @@
 # trend_spotter/sub_agents/email_agent.py
 import os
 import re
-import smtplib
-import threading
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Optional
+from html import escape
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 from google.adk.agents import Agent
 
-# Thread-local storage for current user context
-_thread_local = threading.local()
+from ..report_archive import get_archive, report_url
+from ..report_html import render_report_html, report_headlines
+from ..request_context import (
+    RequestContext,
+    current_user_email,
+    set_request_context,
+)
+from ..resilience import CallTimeoutError, get_guard
+
+if TYPE_CHECKING:
+    from ..delivery import DeliveryReport
+
 
 MODEL = "gemini-2.5-flash-preview-05-20"
 
 
 # MCP-style email tool implementation using ADK function pattern
-def set_current_user_email(email: str):
-    """Set the current user's email in thread-local storage."""
-    _thread_local.user_email = email
+def set_current_user_email(email: Optional[str]):
+    """
+    Set the current user's email for the rest of the current context.
+
+    Prefer ``request_context.request_scope``, which also clears it again.
+    """
+    set_request_context(RequestContext(user_email=email))
 
 
 def get_current_user_email() -> Optional[str]:
-    """Get the current user's email from thread-local storage."""
-    return getattr(_thread_local, "user_email", None)
+    """Get the signed-in user's email for the current request."""
+    return current_user_email()
 
 
 def send_email_report(
@@ -46,112 +59,295 @@ def send_email_report(
     Returns:
         A JSON string with the status of the email sending operation
     """
-    try:
-        # Get recipients from thread-local user email or use provided recipient
-        user_email = get_current_user_email()
-        if user_email:
-            recipients = [user_email.strip()]
-        elif recipient_email:
-            recipients = [recipient_email.strip()]
-        else:
-            recipients_env = os.getenv("EMAIL_RECIPIENTS", "<your email address>")
-            recipients = [
-                email.strip() for email in recipients_env.split(",") if email.strip()
-            ]
-
-        print(
-            f"\n📧 Preparing to send email to {len(recipients)} recipient(s): "
-            f"{', '.join(recipients)}..."
-        )
-
-        # Get email configuration from environment variables
-        smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        sender_email = os.getenv("SENDER_EMAIL")
-        sender_password = os.getenv(
-            "SENDER_APP_PASSWORD"
-        )  # App-specific password for Gmail
-
-        if not sender_email or not sender_password:
-            error_msg = (
-                "Email credentials not configured. Please set SENDER_EMAIL and "
-                "SENDER_APP_PASSWORD environment variables."
-            )
-            print(f"❌ {error_msg}")
-            return f"❌ Email failed: {error_msg}"
-
-        # Create HTML email body
-        html_body = _format_report_as_html(report_content, report_date_range)
-
-        # Send email to all recipients
-        sent_to = []
-        failed_to = []
-
-        print(f"📤 Connecting to SMTP server {smtp_server}:{smtp_port}...")
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()  # Enable security
-            server.login(sender_email, sender_password)
-
-            for recipient in recipients:
-                try:
-                    # Create individual email message for each recipient
-                    msg = MIMEMultipart()
-                    msg["From"] = sender_email
-                    msg["To"] = recipient
-                    msg["Subject"] = subject
-                    msg.attach(MIMEText(html_body, "html"))
-
-                    text = msg.as_string()
-                    server.sendmail(sender_email, recipient, text)
-                    sent_to.append(recipient)
-                    print(f"✅ Email sent to {recipient}")
-                except Exception as e:
-                    failed_to.append(f"{recipient} ({str(e)})")
-                    print(f"❌ Failed to send to {recipient}: {str(e)}")
-
-        # Generate summary message
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
-        if sent_to and not failed_to:
-            success_msg = (
-                f"✅ Email successfully sent to {len(sent_to)} recipient(s): "
-                f"{', '.join(sent_to)} at {timestamp}"
-            )
-        elif sent_to and failed_to:
-            success_msg = (
-                f"⚠️  Email sent to {len(sent_to)} recipient(s): {', '.join(sent_to)}. "
-                f"Failed for {len(failed_to)}: {', '.join(failed_to)} at {timestamp}"
-            )
-        else:
-            success_msg = (
-                f"❌ Email failed for all {len(failed_to)} recipient(s): "
-                f"{', '.join(failed_to)} at {timestamp}"
-            )
+    # Get recipients from the request's user email or use provided recipient
+    user_email = get_current_user_email()
+    if user_email:
+        recipients = [user_email.strip()]
+    elif recipient_email:
+        recipients = [recipient_email.strip()]
+    else:
+        recipients_env = os.getenv("EMAIL_RECIPIENTS", "<your email address>")
+        recipients = [
+            email.strip() for email in recipients_env.split(",") if email.strip()
+        ]
+
+    print(
+        f"\n📧 Preparing to send email to {len(recipients)} recipient(s): "
+        f"{', '.join(recipients)}..."
+    )
 
-        print(success_msg)
-        return success_msg
+    # Get email configuration from environment variables
+    smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+    smtp_port = int(os.getenv("SMTP_PORT", "587"))
+    sender_email = os.getenv("SENDER_EMAIL")
+    sender_password = os.getenv(
+        "SENDER_APP_PASSWORD"
+    )  # App-specific password for Gmail
+
+    if not sender_email or not sender_password:
+        error_msg = (
+            "Email credentials not configured. Please set SENDER_EMAIL and "
+            "SENDER_APP_PASSWORD environment variables."
+        )
+        print(f"❌ {error_msg}")
+        return f"❌ Email failed: {error_msg}"
+
+    # Convert the markdown once; the archived page and the full email share
+    # it. With EMAIL_REPORT_MODE=link the email carries a summary and a link
+    # to the archived report instead, so the full page is not built.
+    content_html = _convert_markdown_to_html(report_content)
+    digest = _archive_report(content_html, report_date_range)
+    if digest and os.getenv("EMAIL_REPORT_MODE", "full").lower() == "link":
+        html_body = _format_summary_as_html(
+            report_content, report_date_range, report_url(digest)
+        )
+    else:
+        html_body = _render_page(content_html, report_date_range, _generated_on())
+
+    # With EMAIL_SPOOL_PATH set, hand the rendered report to the durable
+    # spool and return immediately; its worker owns delivery and retries.
+    from ..email_spool import get_spool, notify_worker
+
+    spool = get_spool(_send_spooled_report)
+    if spool is not None:
+        delivery_id = spool.enqueue(subject, html_body, recipients)
+        notify_worker()
+        queued_msg = (
+            f"📬 Email to {len(recipients)} recipient(s) queued for delivery: "
+            f"{', '.join(recipients)}. Delivery ID: {delivery_id}"
+        )
+        print(queued_msg)
+        return queued_msg
 
+    # SMTP delivery runs under the "email" call policy (deadline and circuit
+    # breaker, never hedged). Recipients are resolved above, in the caller's
+    # thread, because the guard executes the delivery on a worker thread.
+    guard = get_guard("email")
+    try:
+        report = guard.call(
+            _deliver_report,
+            smtp_server,
+            smtp_port,
+            sender_email,
+            sender_password,
+            subject,
+            html_body,
+            recipients,
+        )
+    except CallTimeoutError:
+        # The deadline only stops waiting; the worker thread keeps sending.
+        # Reporting a failure would invite a retry and duplicate emails.
+        in_progress_msg = (
+            f"⏳ Email to {len(recipients)} recipient(s) is still being sent "
+            f"after {guard.policy.timeout:.0f}s and will finish in the "
+            f"background: {', '.join(recipients)}. Do not send it again."
+        )
+        print(in_progress_msg)
+        return in_progress_msg
     except Exception as e:
-        error_msg = f"❌ Failed to send email to {recipient_email}: {str(e)}"
+        error_msg = f"❌ Failed to send email to {', '.join(recipients)}: {str(e)}"
         print(error_msg)
         return error_msg
 
+    sent_to = report.sent
+    failed_to = [f"{status.recipient} ({status.error})" for status in report.failed]
 
-def _format_report_as_html(report_content: str, date_range: str) -> str:
+    # Generate summary message
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+    if sent_to and not failed_to:
+        success_msg = (
+            f"✅ Email successfully sent to {len(sent_to)} recipient(s): "
+            f"{', '.join(sent_to)} at {timestamp}"
+        )
+    elif sent_to and failed_to:
+        success_msg = (
+            f"⚠️  Email sent to {len(sent_to)} recipient(s): {', '.join(sent_to)}. "
+            f"Failed for {len(failed_to)}: {', '.join(failed_to)} at {timestamp}"
+        )
+    else:
+        success_msg = (
+            f"❌ Email failed for all {len(failed_to)} recipient(s): "
+            f"{', '.join(failed_to)} at {timestamp}"
+        )
+
+    print(success_msg)
+    return success_msg
+
+
+def _send_spooled_report(
+    subject: str, html_body: str, recipients: List[str]
+) -> Tuple[List[str], List[str]]:
     """
-    Convert the markdown-style report to HTML for better email formatting.
+    Deliver a spooled report; used by the email spool worker.
+
+    Returns:
+        A tuple of (sent, bounced) where bounced entries read
+        "recipient (reason)". Recipients not reached are in neither list,
+        so the spool retries them.
     """
-    # Convert basic markdown to HTML
-    html_content = _convert_markdown_to_html(report_content)
+    # No deadline here: an abandoned send keeps running while the spool
+    # reschedules every pending recipient, so some would get the report
+    # twice. The SMTP socket timeouts bound each step instead.
+    report = get_guard("email").call_to_completion(
+        _deliver_report,
+        os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+        int(os.getenv("SMTP_PORT", "587")),
+        os.getenv("SENDER_EMAIL"),
+        os.getenv("SENDER_APP_PASSWORD"),
+        subject,
+        html_body,
+        recipients,
+    )
+    bounced = [
+        f"{status.recipient} ({status.error})"
+        for status in report.failed
+        if not (status.error or "").startswith("not sent:")
+    ]
+    return report.sent, bounced
+
+
+def resume_spooled_deliveries() -> bool:
+    """Start the spool worker so reports queued before a restart go out."""
+    from ..email_spool import get_spool
+
+    return get_spool(_send_spooled_report) is not None
+
+
+def get_email_delivery_status(delivery_id: str) -> str:
+    """
+    Look up the delivery status of a queued email report.
+
+    Args:
+        delivery_id: The delivery ID returned by send_email_report
+
+    Returns:
+        A short status line for the delivery
+    """
+    from ..email_spool import DEAD, PARTIAL, SENT, get_spool
+
+    spool = get_spool(_send_spooled_report)
+    if spool is None:
+        return "❌ Email spool is not enabled; emails are sent immediately."
+    status = spool.status(delivery_id)
+    if status is None:
+        return f"❌ Unknown delivery ID: {delivery_id}"
+    if status["status"] == SENT:
+        return f"✅ Delivered to {', '.join(status['sent'])}"
+    if status["status"] == PARTIAL:
+        return (
+            f"⚠️  Delivered to {', '.join(status['sent']) or 'nobody'}. "
+            f"Failed for: {', '.join(status['failed'])}"
+        )
+    if status["status"] == DEAD:
+        return (
+            f"❌ Delivery gave up after {status['attempts']} attempt(s): "
+            f"{status['last_error']}"
+        )
+    return (
+        f"⏳ Pending for {', '.join(status['pending'])} "
+        f"({status['attempts']} failed attempt(s) so far)"
+    )
+
+
+def _archive_report(content_html: str, date_range: str) -> Optional[str]:
+    """
+    Store the report page, built around the converted report
+    ``content_html``, in the archive (see ``report_archive.py``).
+
+    Returns:
+        The report's digest, or None when archiving is off or failed; a
+        failure never blocks the email itself.
+    """
+    archive = get_archive()
+    if archive is None:
+        if os.getenv("EMAIL_REPORT_MODE", "full").lower() == "link":
+            print("⚠️  EMAIL_REPORT_MODE=link needs REPORT_ARCHIVE_DIR; sending full")
+        return None
+    try:
+        digest = archive.store(
+            _render_page(
+                content_html, date_range, "🗄️ Archived copy of the emailed report"
+            )
+        )
+    except OSError as e:
+        print(f"⚠️  Failed to archive report: {e}")
+        return None
+    print(f"🗄️  Report archived as {digest[:12]}")
+    return digest
+
+
+def _deliver_report(
+    smtp_server: str,
+    smtp_port: int,
+    sender_email: str,
+    sender_password: str,
+    subject: str,
+    html_body: str,
+    recipients: List[str],
+) -> "DeliveryReport":
+    """
+    Send the rendered report to every recipient on pooled SMTP sessions.
+
+    Recipients are delivered concurrently (see ``delivery.py``). Connection
+    and login failures propagate to the caller's guard; a message rejected
+    for one recipient is recorded in that recipient's status.
+
+    Returns:
+        The ``DeliveryReport`` with per-recipient statuses and metrics.
+    """
+    # Deferred: smtplib (and ssl) are only needed when a report is sent.
+    from ..delivery import PreparedMessage, deliver
+    from ..smtp_pool import get_pool
+
+    # Render and encode the message once; only the To header differs
+    # between recipients.
+    msg = MIMEMultipart()
+    msg["From"] = sender_email
+    msg["Subject"] = subject
+    msg.attach(MIMEText(html_body, "html"))
+    message = PreparedMessage(msg)
+
+    pool = get_pool(smtp_server, smtp_port, sender_email, sender_password)
+    print(f"📤 Sending via pooled SMTP sessions to {smtp_server}:{smtp_port}...")
+    report = deliver(pool, sender_email, recipients, message.for_recipient)
+
+    metrics = report.summary()
+    print(
+        f"📊 Delivered {metrics['sent']}/{metrics['recipients']} in "
+        f"{metrics['elapsed_s']:.2f}s ({metrics['messages_per_s']:.1f} msg/s, "
+        f"{metrics['concurrency']} worker(s), "
+        f"{metrics['connections_opened']} new connection(s))"
+    )
+    for status in report.failed:
+        print(f"❌ Failed to send to {status.recipient}: {status.error}")
+    return report
+
+
+def _compile_template(text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Split a ``$name`` template into static chunks and field names once."""
+    pieces = re.split(r"\$(\w+)", text)
+    return tuple(pieces[0::2]), tuple(pieces[1::2])
 
-    # Basic HTML template with styling
-    html_template = f"""
+
+def _render_template(template, fields: dict) -> str:
+    static, names = template
+    parts = [static[0]]
+    for name, chunk in zip(names, static[1:]):
+        parts.append(fields[name])
+        parts.append(chunk)
+    return "".join(parts)
+
+
+# Basic HTML template with styling, compiled once at import time so each
+# report only joins its three dynamic fields between the static chunks.
+_HTML_TEMPLATE = _compile_template("""
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
-        <title>AI Agent Trends Report - {date_range}</title>
+        <title>AI Agent Trends Report - $date_range</title>
         <style>
-            body {{
+            body {
                 font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
                 line-height: 1.6;
                 color: #333;
@@ -159,110 +355,131 @@ def _format_report_as_html(report_content: str, date_range: str) -> str:
                 margin: 0 auto;
                 padding: 20px;
                 background-color: #f9f9f9;
-            }}
-            .header {{
+            }
+            .header {
                 background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                 color: white;
                 padding: 30px;
                 border-radius: 10px;
                 text-align: center;
                 margin-bottom: 30px;
-            }}
-            .content {{
+            }
+            .content {
                 background: white;
                 padding: 30px;
                 border-radius: 10px;
                 box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            }}
-            .trend-item {{
+            }
+            .trend-item {
                 background: #f8f9fa;
                 border-left: 4px solid #667eea;
                 padding: 15px;
                 margin-bottom: 15px;
                 border-radius: 5px;
-            }}
-            .trend-title {{
+            }
+            .trend-title {
                 font-weight: bold;
                 color: #2c3e50;
                 margin-bottom: 5px;
-            }}
-            .source-link {{
+            }
+            .source-link {
                 color: #667eea;
                 text-decoration: none;
-            }}
-            .source-link:hover {{
+            }
+            .source-link:hover {
                 text-decoration: underline;
-            }}
-            .impact, .rationale {{
+            }
+            .impact, .rationale {
                 margin: 8px 0;
                 padding-left: 15px;
                 color: #555;
-            }}
-            .footer {{
+            }
+            .footer {
                 text-align: center;
                 margin-top: 30px;
                 padding: 20px;
                 color: #777;
                 font-size: 0.9em;
-            }}
-            h1, h2 {{
+            }
+            h1, h2 {
                 color: #2c3e50;
-            }}
-            .emoji {{
+            }
+            .emoji {
                 font-size: 1.2em;
-            }}
+            }
         </style>
     </head>
     <body>
         <div class="header">
             <h1>🤖 AI Agent Trends Report</h1>
-            <p><strong>Report Period:</strong> {date_range}</p>
+            <p><strong>Report Period:</strong> $date_range</p>
             <p>Generated by The Agent Factory Intelligence System</p>
         </div>
 
         <div class="content">
-            {html_content}
+            $content
         </div>
 
         <div class="footer">
             <p>📧 This report was automatically generated and sent by your
             AI Agent Trend Spotter</p>
-            <p>🕒 Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+            <p>$footer_note</p>
         </div>
     </body>
     </html>
-    """
-
-    return html_template
+    """)
 
 
-def _convert_markdown_to_html(markdown_content: str) -> str:
+def _format_report_as_html(report_content: str, date_range: str) -> str:
     """
-    Convert basic markdown formatting to HTML.
+    Convert the markdown-style report to HTML for better email formatting.
     """
-    html_content = markdown_content
+    # Convert basic markdown to HTML
+    html_content = _convert_markdown_to_html(report_content)
+
+    return _render_page(html_content, date_range, _generated_on())
 
-    # Basic conversion - just preserve the content with line breaks
-    html_content = html_content.replace("\n", "<br>\n")
 
-    # Convert headers
-    html_content = html_content.replace(
-        "**🔥 Top 5 Trends for Agent Developers**",
-        '<h2 class="emoji">🔥 Top 5 Trends for Agent Developers</h2>',
+def _format_summary_as_html(report_content: str, date_range: str, url: str) -> str:
+    """
+    Build the short email for link delivery: trend headlines plus a link.
+    """
+    items = "\n".join(
+        f'<li class="trend-item">{escape(headline)}</li>'
+        for headline in report_headlines(report_content)
+    )
+    content = (
+        f'<h2 class="emoji">🔥 This week\'s trends</h2>\n<ol>\n{items}\n</ol>\n'
+        if items
+        else ""
     )
-    html_content = html_content.replace(
-        "**🚀 Top 5 Releases for Agent Developers**",
-        '<h2 class="emoji">🚀 Top 5 Releases for Agent Developers</h2>',
+    content += (
+        f'<p><a class="source-link" href="{escape(url)}">'
+        "📖 Read the full report</a></p>"
     )
-    html_content = html_content.replace(
-        "**🤔 Top 5 Questions from Agent Developers**",
-        '<h2 class="emoji">🤔 Top 5 Questions from Agent Developers</h2>',
+    return _render_page(content, date_range, _generated_on())
+
+
+def _generated_on() -> str:
+    return "🕒 Generated on: " + datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+
+
+def _render_page(content_html: str, date_range: str, footer_note: str) -> str:
+    return _render_template(
+        _HTML_TEMPLATE,
+        {
+            "date_range": date_range,
+            "content": content_html,
+            "footer_note": footer_note,
+        },
     )
 
-    # Bold formatting
-    html_content = re.sub(r"\*\*(.*?)\*\*", r"<strong>\1</strong>", html_content)
 
-    return html_content
+def _convert_markdown_to_html(markdown_content: str) -> str:
+    """
+    Convert the report's markdown to HTML (see ``report_html.py``).
+    """
+    return render_report_html(markdown_content)
 
 
 # Email agent with specific instructions for handling report delivery
@@ -300,6 +517,11 @@ EMAIL_AGENT_PROMPT = """
 **Important:**
 - When you receive a request with report content, immediately use the
   `send_email_report` tool.
+- If the tool answers that the email was queued, delivery and retries are
+  handled in the background. Do NOT call it again; report the delivery ID.
+  Use `get_email_delivery_status` only if asked about a delivery ID.
+- If the tool answers that the email is still being sent, it will finish
+  in the background. Do NOT call it again; report that it is in progress.
 - Do NOT try to format or modify the report content - send it as-is.
 - Extract the date range from phrases like "Report Date Range:
   June 10, 2025 - June 17, 2025".
@@ -317,5 +539,5 @@ email_agent = Agent(
         "MCP-compatible tools."
     ),
     instruction=EMAIL_AGENT_PROMPT,
-    tools=[send_email_report],
+    tools=[send_email_report, get_email_delivery_status],
 )
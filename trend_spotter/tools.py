@@ -1,9 +1,50 @@
 import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
 
-import praw
+from .resilience import guarded_tool
+
+_idle_reddit_clients: List = []
+_reddit_clients_lock = threading.Lock()
+
+
+@contextmanager
+def reddit_client() -> Iterator:
+    """
+    Check out a pooled read-only praw client.
+
+    praw clients are not thread-safe, so concurrent searches (and hedged
+    duplicates) each get their own. A returned client keeps its HTTP
+    session and OAuth token for the next search.
+    """
+    with _reddit_clients_lock:
+        client = _idle_reddit_clients.pop() if _idle_reddit_clients else None
+    if client is None:
+        # Deferred: praw is only needed once the tool actually runs.
+        import praw
+
+        client = praw.Reddit(
+            client_id=os.environ["REDDIT_CLIENT_ID"],
+            client_secret=os.environ["REDDIT_CLIENT_SECRET"],
+            user_agent=os.environ["REDDIT_USER_AGENT"],
+            read_only=True,
+        )
+    try:
+        yield client
+    finally:
+        with _reddit_clients_lock:
+            _idle_reddit_clients.append(client)
+
+
+def warm_reddit_client() -> None:
+    """Open a pooled client's connection and fetch its OAuth token."""
+    with reddit_client() as reddit:
+        next(iter(reddit.subreddit("popular").hot(limit=1)), None)
 
 
 # The function now accepts a LIST of subreddit names
+@guarded_tool("reddit", error_message="Error searching Reddit: {error}")
 def search_hot_reddit_posts(
     subreddit_names: list[str], limit_per_subreddit: int = 5
 ) -> str:
@@ -21,20 +62,10 @@ def search_hot_reddit_posts(
         A dictionary containing the status and a list of formatted post
         strings.
     """
-    try:
-        print(
-            f"\n🔎 Searching Reddit for hot posts in: "
-            f"{', '.join(subreddit_names)}..."
-        )
-
-        reddit = praw.Reddit(
-            client_id=os.environ["REDDIT_CLIENT_ID"],
-            client_secret=os.environ["REDDIT_CLIENT_SECRET"],
-            user_agent=os.environ["REDDIT_USER_AGENT"],
-            read_only=True,
-        )
+    print(f"\n🔎 Searching Reddit for hot posts in: {', '.join(subreddit_names)}...")
 
-        all_posts = []
+    all_posts = []
+    with reddit_client() as reddit:
         # Loop through each subreddit name provided in the list
         for sub_name in subreddit_names:
             print(f"  - Fetching from r/{sub_name}...")
@@ -45,16 +76,8 @@ def search_hot_reddit_posts(
                 if post.score > 5:
                     all_posts.append(f"Title: {post.title}\nLink: {post.url}")
 
-        if not all_posts:
-            return (
-                "No hot posts found meeting the criteria in the specified "
-                "subreddits."
-            )
-
-        print(
-            f"✅ Reddit search complete. Found {len(all_posts)} " f"qualifying posts."
-        )
-        return "\n---\n".join(all_posts)
+    if not all_posts:
+        return "No hot posts found meeting the criteria in the specified subreddits."
 
-    except Exception as e:
-        return f"Error searching Reddit: {e}"
+    print(f"✅ Reddit search complete. Found {len(all_posts)} qualifying posts.")
+    return "\n---\n".join(all_posts)
@@ -4,36 +4,46 @@ User Context Middleware Extension
 
 This middleware extends the authentication system to provide user context
 to agents that need access to the logged-in user's information.
-"""
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+``GoogleOAuth2Middleware`` already sets the request context for the users
+it authenticates, so ``authenticated_server.py`` does not add this
+middleware. It is kept for apps that populate ``request.state.user`` with
+a different authentication layer.
+"""
 
-from trend_spotter.sub_agents.email_agent import set_current_user_email
+from trend_spotter.request_context import request_scope
 
 
-class UserContextMiddleware(BaseHTTPMiddleware):
+class UserContextMiddleware:
     """
-    Middleware to set user context in thread-local storage for use by agents.
+    Pure ASGI middleware that sets the request context (see
+    ``trend_spotter/request_context.py``) for use by agents.
 
     This middleware should be added after the authentication middleware
     so that request.state.user is already populated.
     """
 
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
         """
-        Process the request and set user context if user is authenticated.
+        Process the request with the authenticated user as its context.
         """
-        # Check if user is authenticated (set by auth middleware)
-        user_info = getattr(request.state, "user", None)
-
-        if user_info and user_info.get("email"):
-            # Set the user's email in thread-local storage for the email agent
-            set_current_user_email(user_info["email"])
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
 
-        # Continue with the request
-        response = await call_next(request)
-        return response
+        # Check if user is authenticated (set by auth middleware)
+        user_info = scope.get("state", {}).get("user") or {}
+
+        # The response is produced inside this call, so streamed responses
+        # keep the context; the scope always resets, so no user carries
+        # over to the next request.
+        with request_scope(
+            user_email=user_info.get("email"), user_name=user_info.get("name")
+        ):
+            await self.app(scope, receive, send)
 
 
 def add_user_context_middleware(app):
@@ -4,24 +4,302 @@ Production Deployment Verification Script
 
 This script verifies that all required secrets and configurations are properly
 set up for production deployment to Google Cloud Run.
+
+The checks form a small graph: each one names the checks it needs (the
+project check needs an authenticated gcloud, which needs gcloud). Checks
+whose requirements passed run concurrently, each in its own thread with its
+own timeout, so the preflight takes as long as its slowest chain instead of
+the sum of every ``gcloud`` call. A check whose requirement failed is
+skipped rather than run.
+
+Passing results of the slow external checks (``gcloud``, ``adk``) are
+cached in ``.adk/preflight_cache.json`` for ``--cache-ttl`` seconds, keyed
+by the project and credentials they were run with, so re-running the
+preflight while fixing a configuration only repeats what changed.
+
+Usage:
+    python verify_production_setup.py
+    python verify_production_setup.py --json --no-cache   # deploy workflow
 """
 
+import argparse
+import hashlib
+import json
 import os
+import queue
 import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_CACHE_PATH = Path(".adk/preflight_cache.json")
+DEFAULT_CACHE_TTL = 300.0
+
+# Environment that decides what the cached gcloud/adk checks would report
+CACHE_KEY_VARS = (
+    "GOOGLE_CLOUD_PROJECT",
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    "CLOUDSDK_CONFIG",
+    "CLOUDSDK_CORE_ACCOUNT",
+    "PATH",
+)
+
+
+@dataclass
+class Check:
+    """One preflight check; ``run`` fills a report and returns whether it passed."""
+
+    name: str
+    run: Callable[["CheckReport"], bool]
+    requires: Tuple[str, ...] = ()
+    timeout: float = 30.0
+    cacheable: bool = False
+
+
+@dataclass
+class CheckReport:
+    """Outcome of one check, in the order its messages were produced."""
+
+    name: str
+    timeout: float = 30.0
+    status: str = "pending"  # passed, failed, skipped, timeout
+    seconds: float = 0.0
+    cached: bool = False
+    successes: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return self.status == "passed"
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "status": self.status,
+            "seconds": round(self.seconds, 3),
+            "cached": self.cached,
+            "successes": [m.strip() for m in self.successes],
+            "warnings": [m.strip() for m in self.warnings],
+            "errors": [m.strip() for m in self.errors],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CheckReport":
+        return cls(
+            name=data["name"],
+            status=data["status"],
+            seconds=data["seconds"],
+            successes=[f"   {m}" for m in data["successes"]],
+            warnings=[f"   {m}" for m in data["warnings"]],
+            errors=[f"   {m}" for m in data["errors"]],
+        )
+
+
+class CheckCache:
+    """Passing check results kept on disk for a short TTL."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        ttl: float = DEFAULT_CACHE_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._clock = clock
+        try:
+            self._entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @staticmethod
+    def key(name: str) -> str:
+        fingerprint = "\0".join(os.getenv(var, "") for var in CACHE_KEY_VARS)
+        digest = hashlib.sha256(fingerprint.encode()).hexdigest()[:16]
+        return f"{name}:{digest}"
+
+    def get(self, name: str) -> Optional[CheckReport]:
+        entry = self._entries.get(self.key(name))
+        if entry is None or self._clock() - entry["at"] > self.ttl:
+            return None
+        report = CheckReport.from_dict(entry["report"])
+        report.cached = True
+        return report
+
+    def put(self, report: CheckReport) -> None:
+        if report.passed:
+            self._entries[self.key(report.name)] = {
+                "at": self._clock(),
+                "report": report.to_dict(),
+            }
+
+    def save(self) -> None:
+        now = self._clock()
+        entries = {k: v for k, v in self._entries.items() if now - v["at"] <= self.ttl}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(entries))
+        except OSError as e:
+            print(f"⚠️  Could not save preflight cache: {e}", file=sys.stderr)
+
+
+def run_checks(
+    checks: List[Check],
+    cache: Optional[CheckCache] = None,
+    clock: Callable[[], float] = time.perf_counter,
+) -> List[CheckReport]:
+    """
+    Run a graph of checks, each as soon as the checks it requires passed.
+
+    Every check runs in a daemon thread, so one that overruns its timeout is
+    reported as ``timeout`` and abandoned without holding up the others.
+
+    Returns:
+        One report per check, in the order the checks were given.
+    """
+    names = {check.name for check in checks}
+    for check in checks:
+        unknown = set(check.requires) - names
+        if unknown:
+            raise ValueError(f"Check {check.name} requires unknown {sorted(unknown)}")
+
+    reports: Dict[str, CheckReport] = {}
+    pending = list(checks)
+    running: Dict[str, Tuple[Check, float]] = {}
+    finished: "queue.Queue[CheckReport]" = queue.Queue()
+
+    def execute(check: Check, report: CheckReport, started: float) -> None:
+        try:
+            report.status = "passed" if check.run(report) else "failed"
+        except Exception as e:
+            report.errors.append(f"   ❌ {check.name} crashed: {type(e).__name__}: {e}")
+            report.status = "failed"
+        report.seconds = clock() - started
+        finished.put(report)
+
+    while pending or running:
+        progressed = False
+        for check in list(pending):
+            requirements = [reports.get(name) for name in check.requires]
+            if any(r is None for r in requirements):
+                continue
+            pending.remove(check)
+            progressed = True
+            failed = [r.name for r in requirements if not r.passed]
+            cached = cache.get(check.name) if cache and check.cacheable else None
+            if failed:
+                reports[check.name] = CheckReport(check.name, status="skipped")
+                reports[check.name].warnings.append(
+                    f"   ⏭️  {check.name} skipped: requires {', '.join(failed)}"
+                )
+            elif cached is not None:
+                reports[check.name] = cached
+            else:
+                started = clock()
+                running[check.name] = (check, started)
+                threading.Thread(
+                    target=execute,
+                    args=(
+                        check,
+                        CheckReport(check.name, timeout=check.timeout),
+                        started,
+                    ),
+                    name=f"preflight-{check.name}",
+                    daemon=True,
+                ).start()
+        if not running:
+            if not progressed and pending:
+                raise ValueError(f"Checks form a cycle: {[c.name for c in pending]}")
+            continue
+
+        deadline = min(started + check.timeout for check, started in running.values())
+        try:
+            report = finished.get(timeout=max(0.0, deadline - clock()))
+        except queue.Empty:
+            report = None
+        if report is not None and report.name in running:
+            check, _ = running.pop(report.name)
+            reports[report.name] = report
+            if cache and check.cacheable:
+                cache.put(report)
+        now = clock()
+        for name, (check, started) in list(running.items()):
+            if now - started >= check.timeout:
+                del running[name]
+                reports[name] = CheckReport(
+                    name, status="timeout", seconds=now - started
+                )
+                reports[name].errors.append(
+                    f"   ❌ {name} timed out after {check.timeout:g}s"
+                )
+
+    return [reports[check.name] for check in checks]
 
 
 class ProductionVerifier:
-    def __init__(self):
+    REQUIRED_APIS = (
+        "aiplatform.googleapis.com",
+        "cloudbuild.googleapis.com",
+        "run.googleapis.com",
+        "containerregistry.googleapis.com",
+    )
+
+    def __init__(self, cache: Optional[CheckCache] = None):
+        self.cache = cache
+        self.reports: List[CheckReport] = []
         self.errors = []
         self.warnings = []
         self.success_messages = []
 
-    def verify_environment_variables(self) -> bool:
-        """Verify required environment variables for production."""
-        print("🔍 Verifying environment variables...")
+    @staticmethod
+    def _command(args: List[str], report: CheckReport) -> str:
+        """Run a command within the check's timeout; returns its stdout."""
+        return subprocess.run(
+            args,
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=report.timeout,
+        ).stdout
+
+    def checks(self) -> List[Check]:
+        """The preflight graph; gcloud and adk results may be cached."""
+        return [
+            Check("environment", self.verify_environment_variables, timeout=5),
+            Check("gcloud", self.verify_gcloud_installed, timeout=20, cacheable=True),
+            Check(
+                "gcloud_auth",
+                self.verify_gcloud_auth,
+                requires=("gcloud",),
+                timeout=20,
+                cacheable=True,
+            ),
+            Check(
+                "project_access",
+                self.verify_project_access,
+                requires=("gcloud_auth",),
+                timeout=30,
+                cacheable=True,
+            ),
+            Check(
+                "required_apis",
+                self.verify_required_apis_enabled,
+                requires=("gcloud_auth",),
+                timeout=30,
+                cacheable=True,
+            ),
+            Check("adk", self.verify_adk_installation, timeout=20, cacheable=True),
+            Check("agent_import", self.verify_agent_importable, timeout=60),
+            Check("pipelines", self.verify_deployment_pipelines, timeout=5),
+            Check("secrets_docs", self.verify_github_secrets_documented, timeout=5),
+        ]
 
+    def verify_environment_variables(self, report: CheckReport) -> bool:
+        """Verify required environment variables for production."""
         required_vars = {
             "GOOGLE_CLOUD_PROJECT": "Google Cloud project ID",
             "GOOGLE_CLOUD_LOCATION": "Google Cloud region",
@@ -38,54 +316,48 @@ class ProductionVerifier:
         for var, description in required_vars.items():
             value = os.getenv(var)
             if value:
-                self.success_messages.append(f"   ✅ {var}: {description}")
+                report.successes.append(f"   ✅ {var}: {description}")
             else:
-                self.errors.append(f"   ❌ Missing {var}: {description}")
+                report.errors.append(f"   ❌ Missing {var}: {description}")
 
         # Check Reddit variables (optional but recommended)
         reddit_vars_present = 0
         for var, description in optional_reddit_vars.items():
             value = os.getenv(var)
             if value:
-                self.success_messages.append(f"   ✅ {var}: {description}")
+                report.successes.append(f"   ✅ {var}: {description}")
                 reddit_vars_present += 1
             else:
-                self.warnings.append(f"   ⚠️  Missing {var}: {description}")
+                report.warnings.append(f"   ⚠️  Missing {var}: {description}")
 
         if reddit_vars_present == 0:
-            self.errors.append(
+            report.errors.append(
                 "   ❌ No Reddit API credentials found - " "Reddit agent will not work"
             )
         elif reddit_vars_present < 3:
-            self.warnings.append(
+            report.warnings.append(
                 "   ⚠️  Incomplete Reddit API credentials - "
                 "some features may not work"
             )
 
-        return len([e for e in self.errors if "reddit" not in e.lower()]) == 0
-
-    def verify_gcloud_setup(self) -> bool:
-        """Verify Google Cloud CLI setup."""
-        print("\n🔍 Verifying Google Cloud CLI setup...")
+        return len([e for e in report.errors if "reddit" not in e.lower()]) == 0
 
-        # Check if gcloud is installed
+    def verify_gcloud_installed(self, report: CheckReport) -> bool:
+        """Verify the Google Cloud CLI is installed."""
         try:
-            result = subprocess.run(
-                ["gcloud", "--version"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            self.success_messages.append(
-                f"   ✅ Google Cloud CLI installed: {result.stdout.split()[3]}"
-            )
+            output = self._command(["gcloud", "--version"], report)
         except (subprocess.CalledProcessError, FileNotFoundError):
-            self.errors.append("   ❌ Google Cloud CLI not installed")
+            report.errors.append("   ❌ Google Cloud CLI not installed")
             return False
+        report.successes.append(
+            f"   ✅ Google Cloud CLI installed: {output.split()[3]}"
+        )
+        return True
 
-        # Check authentication
+    def verify_gcloud_auth(self, report: CheckReport) -> bool:
+        """Verify gcloud has an active account."""
         try:
-            result = subprocess.run(
+            account = self._command(
                 [
                     "gcloud",
                     "auth",
@@ -93,56 +365,46 @@ class ProductionVerifier:
                     "--filter=status:ACTIVE",
                     "--format=value(account)",
                 ],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            if result.stdout.strip():
-                self.success_messages.append(
-                    f"   ✅ Authenticated as: {result.stdout.strip()}"
-                )
-            else:
-                self.errors.append("   ❌ No active gcloud authentication")
-                return False
+                report,
+            ).strip()
         except subprocess.CalledProcessError:
-            self.errors.append("   ❌ Failed to check gcloud authentication")
+            report.errors.append("   ❌ Failed to check gcloud authentication")
             return False
+        if not account:
+            report.errors.append("   ❌ No active gcloud authentication")
+            return False
+        report.successes.append(f"   ✅ Authenticated as: {account}")
+        return True
 
-        # Check project access
+    def verify_project_access(self, report: CheckReport) -> bool:
+        """Verify the account can read the project."""
         project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
-        if project_id:
-            try:
-                subprocess.run(
-                    ["gcloud", "projects", "describe", project_id],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                )
-                self.success_messages.append(f"   ✅ Can access project: {project_id}")
-            except subprocess.CalledProcessError:
-                self.errors.append(f"   ❌ Cannot access project: {project_id}")
-                return False
-
+        if not project_id:
+            return True  # reported by the environment check
+        try:
+            self._command(["gcloud", "projects", "describe", project_id], report)
+        except subprocess.CalledProcessError:
+            report.errors.append(f"   ❌ Cannot access project: {project_id}")
+            return False
+        report.successes.append(f"   ✅ Can access project: {project_id}")
         return True
 
-    def verify_github_secrets_documented(self) -> bool:
+    def verify_github_secrets_documented(self, report: CheckReport) -> bool:
         """Verify GitHub secrets documentation exists."""
-        print("\n🔍 Verifying GitHub secrets documentation...")
-
-        secrets_doc = Path("GITHUB_SECRETS_SETUP.md")
-        if secrets_doc.exists():
-            self.success_messages.append(
-                "   ✅ GitHub secrets setup documentation exists"
-            )
-            return True
-        else:
-            self.warnings.append("   ⚠️  GitHub secrets setup documentation missing")
-            return False
+        for secrets_doc in (
+            Path("GITHUB_SECRETS_SETUP.md"),
+            Path("documentation/GITHUB_SECRETS_SETUP.md"),
+        ):
+            if secrets_doc.exists():
+                report.successes.append(
+                    "   ✅ GitHub secrets setup documentation exists"
+                )
+                return True
+        report.warnings.append("   ⚠️  GitHub secrets setup documentation missing")
+        return False
 
-    def verify_deployment_pipelines(self) -> bool:
+    def verify_deployment_pipelines(self, report: CheckReport) -> bool:
         """Verify CI/CD pipeline configurations."""
-        print("\n🔍 Verifying deployment pipelines...")
-
         pipeline_files = {
             ".github/workflows/ci.yml": "Main CI/CD pipeline",
             ".github/workflows/deploy-adk.yml": "ADK deployment pipeline",
@@ -152,83 +414,65 @@ class ProductionVerifier:
         all_exist = True
         for file_path, description in pipeline_files.items():
             if Path(file_path).exists():
-                self.success_messages.append(f"   ✅ {description}: {file_path}")
+                report.successes.append(f"   ✅ {description}: {file_path}")
             else:
-                self.errors.append(f"   ❌ Missing {description}: {file_path}")
+                report.errors.append(f"   ❌ Missing {description}: {file_path}")
                 all_exist = False
 
         return all_exist
 
-    def verify_adk_installation(self) -> bool:
-        """Verify ADK installation and functionality."""
-        print("\n🔍 Verifying ADK installation...")
-
+    def verify_adk_installation(self, report: CheckReport) -> bool:
+        """Verify the ADK CLI is installed."""
         try:
-            result = subprocess.run(
-                ["adk", "--version"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            self.success_messages.append(
-                f"   ✅ ADK installed: {result.stdout.strip()}"
-            )
+            output = self._command(["adk", "--version"], report)
         except (subprocess.CalledProcessError, FileNotFoundError):
-            self.errors.append("   ❌ ADK not installed or not in PATH")
+            report.errors.append("   ❌ ADK not installed or not in PATH")
             return False
+        report.successes.append(f"   ✅ ADK installed: {output.strip()}")
+        return True
 
-        # Check if agent can be discovered
+    def verify_agent_importable(self, report: CheckReport) -> bool:
+        """Verify the agent can be discovered."""
         try:
             from trend_spotter.agent import root_agent
-
-            self.success_messages.append(f"   ✅ Agent discoverable: {root_agent.name}")
         except ImportError as e:
-            self.errors.append(f"   ❌ Cannot import agent: {e}")
+            report.errors.append(f"   ❌ Cannot import agent: {e}")
             return False
-
+        report.successes.append(f"   ✅ Agent discoverable: {root_agent.name}")
         return True
 
-    def verify_required_apis_enabled(self) -> bool:
-        """Verify required Google Cloud APIs are enabled."""
-        print("\n🔍 Verifying required Google Cloud APIs...")
-
-        required_apis = [
-            "aiplatform.googleapis.com",
-            "cloudbuild.googleapis.com",
-            "run.googleapis.com",
-            "containerregistry.googleapis.com",
-        ]
-
+    def verify_required_apis_enabled(self, report: CheckReport) -> bool:
+        """Verify required Google Cloud APIs are enabled (one gcloud call)."""
         project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
         if not project_id:
-            self.errors.append("   ❌ GOOGLE_CLOUD_PROJECT not set")
+            report.errors.append("   ❌ GOOGLE_CLOUD_PROJECT not set")
             return False
 
-        all_enabled = True
-        for api in required_apis:
-            try:
-                result = subprocess.run(
+        try:
+            enabled = set(
+                self._command(
                     [
                         "gcloud",
                         "services",
                         "list",
                         "--enabled",
-                        f"--filter=name:{api}",
-                        "--format=value(name)",
+                        f"--project={project_id}",
+                        "--format=value(config.name)",
                     ],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                )
-
-                if result.stdout.strip():
-                    self.success_messages.append(f"   ✅ API enabled: {api}")
-                else:
-                    self.warnings.append(f"   ⚠️  API not enabled: {api}")
-                    all_enabled = False
-            except subprocess.CalledProcessError:
-                self.warnings.append(f"   ⚠️  Cannot check API status: {api}")
+                    report,
+                ).split()
+            )
+        except subprocess.CalledProcessError:
+            report.warnings.append("   ⚠️  Cannot check API status")
+            return True
 
+        all_enabled = True
+        for api in self.REQUIRED_APIS:
+            if api in enabled:
+                report.successes.append(f"   ✅ API enabled: {api}")
+            else:
+                report.warnings.append(f"   ⚠️  API not enabled: {api}")
+                all_enabled = False
         return all_enabled
 
     def generate_secrets_setup_commands(self) -> List[str]:
@@ -260,24 +504,38 @@ class ProductionVerifier:
 
         return commands
 
+    def run_checks(self) -> bool:
+        """Run the check graph and collect its messages; True if all passed."""
+        self.reports = run_checks(self.checks(), cache=self.cache)
+        if self.cache is not None:
+            self.cache.save()
+        for report in self.reports:
+            self.success_messages.extend(report.successes)
+            self.warnings.extend(report.warnings)
+            self.errors.extend(report.errors)
+        return all(report.passed for report in self.reports) and not self.errors
+
+    def to_json(self, seconds: float) -> dict:
+        return {
+            "ok": all(report.passed for report in self.reports) and not self.errors,
+            "seconds": round(seconds, 3),
+            "checks": [report.to_dict() for report in self.reports],
+        }
+
     def run_verification(self) -> bool:
-        """Run all verification checks."""
+        """Run all verification checks and print the summary."""
         print("🚀 Starting Production Deployment Verification\n")
         print("=" * 60)
 
-        checks = [
-            self.verify_environment_variables,
-            self.verify_gcloud_setup,
-            self.verify_adk_installation,
-            self.verify_deployment_pipelines,
-            self.verify_github_secrets_documented,
-            self.verify_required_apis_enabled,
-        ]
+        started = time.perf_counter()
+        all_passed = self.run_checks()
+        elapsed = time.perf_counter() - started
 
-        all_passed = True
-        for check in checks:
-            if not check():
-                all_passed = False
+        print("⏱️  CHECK TIMINGS")
+        for report in self.reports:
+            timing = "cached" if report.cached else f"{report.seconds:.2f}s"
+            print(f"   {report.name:16}{report.status:>9}{timing:>10}")
+        print(f"   {'total':16}{'':>9}{elapsed:>9.2f}s")
 
         print("\n" + "=" * 60)
         print("📋 VERIFICATION SUMMARY")
@@ -305,7 +563,7 @@ class ProductionVerifier:
                 print(cmd)
 
         print("\n" + "=" * 60)
-        if all_passed and not self.errors:
+        if all_passed:
             print("🎉 ALL CHECKS PASSED! Ready for production deployment.")
             print("\n📝 Next steps:")
             print("   1. Ensure all GitHub secrets are configured")
@@ -321,11 +579,30 @@ class ProductionVerifier:
             print("   3. Re-run this verification script")
 
         print("=" * 60)
-        return all_passed and not self.errors
-
-
-def main():
+        return all_passed
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Verify a production deployment")
+    parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON only"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL,
+        help="Seconds to reuse passing gcloud/adk results (default 300)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Run every check afresh"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main verification function."""
+    args = parse_args(argv)
+
     # Load environment variables from .env file if it exists
     env_file = Path(".env")
     if env_file.exists():
@@ -336,8 +613,14 @@ def main():
                     key, value = line.split("=", 1)
                     os.environ[key] = value
 
-    verifier = ProductionVerifier()
-    success = verifier.run_verification()
+    cache = None if args.no_cache else CheckCache(ttl=args.cache_ttl)
+    verifier = ProductionVerifier(cache=cache)
+    if args.json:
+        started = time.perf_counter()
+        success = verifier.run_checks()
+        print(json.dumps(verifier.to_json(time.perf_counter() - started), indent=2))
+    else:
+        success = verifier.run_verification()
     return 0 if success else 1
 
 
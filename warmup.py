@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Background warmup and the ``/ready`` endpoint.
+
+A fresh instance used to accept traffic as soon as uvicorn listened, and
+its first requests paid for everything still cold: importing the agent
+graph, the first Reddit OAuth token, the SMTP login, Google's OIDC
+metadata and signing certificates. ``Warmup`` does that work in the
+background when the server starts, and ``/ready`` answers 503 until it is
+done, so Cloud Run (through a startup probe) only routes requests to warm
+instances. ``/health`` answers 200 as soon as the process serves at all.
+
+Each step runs concurrently with the others; a failed optional step is
+logged and the instance still becomes ready (the request that needs the
+client then creates it). A failed required step keeps ``/ready`` at 503.
+
+Configuration (environment variables):
+    WARMUP_ENABLED    Set to false to skip warmup; /ready is then always 200
+"""
+
+import asyncio
+import inspect
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class WarmupStep:
+    """One thing to warm; ``run`` is a function or a coroutine function."""
+
+    name: str
+    run: Callable[[], object]
+    required: bool = False
+
+
+class Warmup:
+    """Runs warmup steps in the background and tracks readiness."""
+
+    def __init__(
+        self,
+        steps: List[WarmupStep],
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.steps = list(steps)
+        self._clock = clock
+        self.results: Dict[str, dict] = {}
+        self.done = False
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """All steps finished and every required one succeeded."""
+        return self.done and all(
+            self.results[step.name]["ok"] for step in self.steps if step.required
+        )
+
+    async def _run_step(self, step: WarmupStep) -> None:
+        started = self._clock()
+        try:
+            if inspect.iscoroutinefunction(step.run):
+                await step.run()
+            else:
+                await asyncio.to_thread(step.run)
+        except Exception as e:
+            result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            print(f"⚠️  Warmup step {step.name} failed: {e}")
+        else:
+            result = {"ok": True}
+        result["seconds"] = round(self._clock() - started, 3)
+        self.results[step.name] = result
+
+    async def run(self) -> bool:
+        """
+        Run every step concurrently.
+
+        Returns:
+            Whether the instance is ready.
+        """
+        self.started_at = self._clock()
+        await asyncio.gather(*(self._run_step(step) for step in self.steps))
+        self.seconds = round(self._clock() - self.started_at, 3)
+        self.done = True
+        if self.ready:
+            print(f"🔥 Warmup finished in {self.seconds:.2f}s - ready for traffic")
+        else:
+            print("❌ A required warmup step failed - /ready stays unavailable")
+        return self.ready
+
+    def start(self) -> "asyncio.Task":
+        """Run the steps in a background task on the current event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancel an unfinished warmup (on shutdown)."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "done": self.done,
+            "seconds": self.seconds,
+            "steps": {
+                step.name: self.results.get(step.name, {"ok": None})
+                for step in self.steps
+            },
+        }
+
+
+def _agents_step(agents_dir: str) -> WarmupStep:
+    def load_agents():
+        from prefork import preload_agents
+
+        if not preload_agents(agents_dir):
+            raise RuntimeError(f"No agent could be loaded from {agents_dir}")
+
+    return WarmupStep("agents", load_agents, required=True)
+
+
+def _smtp_step() -> WarmupStep:
+    def login():
+        from trend_spotter.smtp_pool import get_pool
+
+        get_pool(
+            os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+            int(os.getenv("SMTP_PORT", "587")),
+            os.environ["SENDER_EMAIL"],
+            os.environ["SENDER_APP_PASSWORD"],
+        ).warm()
+
+    return WarmupStep("smtp", login)
+
+
+def _google_oauth_step(client_id: str) -> WarmupStep:
+    async def fetch():
+        from google_token_verifier import get_discovery, get_verifier
+
+        await asyncio.gather(get_discovery().get(), get_verifier(client_id).certs())
+
+    return WarmupStep("google_oauth", fetch)
+
+
+def default_steps(agents_dir: str = ".") -> List[WarmupStep]:
+    """The steps for this configuration; clients not configured are skipped."""
+    steps = [_agents_step(agents_dir)]
+    if os.getenv("REDDIT_CLIENT_ID"):
+        from trend_spotter.tools import warm_reddit_client
+
+        steps.append(WarmupStep("reddit", warm_reddit_client))
+    if os.getenv("SENDER_EMAIL") and os.getenv("SENDER_APP_PASSWORD"):
+        steps.append(_smtp_step())
+    client_id = os.getenv("GOOGLE_OAUTH2_CLIENT_ID")
+    if client_id and os.getenv("GOOGLE_OAUTH2_CLIENT_SECRET"):
+        steps.append(_google_oauth_step(client_id))
+    return steps
+
+
+def warmup_enabled() -> bool:
+    return os.getenv("WARMUP_ENABLED", "true").lower() != "false"
+
+
+def add_readiness_routes(app, warmup: Optional[Warmup]):
+    """
+    Serve ``/ready`` (200 once ``warmup`` succeeded, else 503) and ``/health``.
+
+    Both are public, so probes need no login. With ``warmup`` None the
+    instance is always ready.
+    """
+    from fastapi.responses import JSONResponse
+
+    @app.get("/ready", include_in_schema=False)
+    async def ready():
+        if warmup is None:
+            return {"ready": True}
+        return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+
+    @app.get("/health", include_in_schema=False)
+    async def health():
+        return {"status": "ok"}
+
+    return app